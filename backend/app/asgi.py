@@ -13,4 +13,17 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# pylint: disable=wrong-import-position
+import library_service.feeds  # pylint: disable=unused-import # регистрирует фоновые обновления
+from library_service.covers import shutdown_thumbnail_pool
+from library_service.lifespan import LifespanApplication
+from library_service.opac.client import open_client_session, close_client_session
+from library_service.opac.refresher import start_refreshers, stop_refreshers
+
+application = LifespanApplication(
+    django_application,
+    startup=[open_client_session, start_refreshers],
+    shutdown=[stop_refreshers, close_client_session, shutdown_thumbnail_pool],
+)
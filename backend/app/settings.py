@@ -130,7 +130,163 @@ MEDIA_URL = "/media/"
 
 FORCE_SCRIPT_NAME = '/uz'
 
-REST_FRAMEWORK = {"DEFAULT_AUTHENTICATION_CLASSES": ("rest_framework_simplejwt.authentication.JWTAuthentication",)}
+# JSON кодируется и разбирается orjson (см. library_service.renderers); отдельный view может вернуть
+# стандартные rest_framework.renderers.JSONRenderer / parsers.JSONParser через renderer_classes / parser_classes
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": ("rest_framework_simplejwt.authentication.JWTAuthentication",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "library_service.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "library_service.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
+}
+
+# Сколько элементов ParallelListSerializer представляет одновременно (у каждого вложенного списка свой предел)
+PARALLEL_LIST_SERIALIZER = {"CONCURRENCY": 16}
+
+# Пул соединений с OPAC (один на воркер, см. library_service.opac.client)
+OPAC_CLIENT = {
+    "LIMIT": 100,
+    "LIMIT_PER_HOST": 32,
+    "DNS_CACHE_TTL": 300,
+    "KEEPALIVE_TIMEOUT": 30,
+}
+
+# Таймауты, предохранители и ограничение параллельности по семействам эндпоинтов OPAC
+# (см. library_service.opac.resilience). Значения семейства дополняют DEFAULT
+OPAC_RESILIENCE = {
+    "DEFAULT": {
+        "TIMEOUT": 10,  # секунды на запрос вместе с чтением ответа
+        "CONCURRENCY": 32,  # одновременных запросов на воркер
+        "MAX_WAIT": 5,  # сколько ждать свободного места, прежде чем отказать
+        "FAILURE_THRESHOLD": 5,  # подряд идущих отказов до размыкания
+        "LATENCY_THRESHOLD": 5,  # ответ медленнее этого считается отказом
+        "RESET_TIMEOUT": 30,  # через сколько секунд пробовать снова
+    },
+    "search": {"TIMEOUT": 15, "CONCURRENCY": 16},
+    "records": {"CONCURRENCY": 64},
+    "readers": {},
+    "login": {"CONCURRENCY": 16},
+    "reference": {"CONCURRENCY": 8},
+    "covers": {"CONCURRENCY": 8},
+}
+
+# Кэш записей OPAC (см. library_service.opac.book.record_cache)
+OPAC_RECORD_CACHE = {
+    "TTL": 300,
+    "MAX_BYTES": 32 * 1024 * 1024,
+}
+
+# Кэш результатов поиска (см. library_service.opac.book.search_cache)
+OPAC_SEARCH_CACHE = {
+    "TTL": 60,
+    "MAX_BYTES": 64 * 1024 * 1024,
+}
+
+# Разбиение поиска с ИЛИ верхнего уровня на параллельные подзапросы (см. library_service.opac.api.expression)
+OPAC_SEARCH_PLANNER = {
+    "ENABLED": True,
+    "MAX_BRANCHES": 8,
+}
+
+# Кэш полных выдач по всем БД, из которого отдаются следующие страницы поиска
+OPAC_RESULT_CACHE = {
+    "TTL": 300,
+    "MAX_BYTES": 64 * 1024 * 1024,
+}
+
+# Постраничная выдача поиска (см. library_service.pagination)
+CATALOG_SEARCH_PAGINATION = {
+    "PAGE_SIZE": 20,
+    "MAX_PAGE_SIZE": 100,
+}
+
+# Фасеты поиска: сколько самых частых значений отдавать (кроме года)
+CATALOG_FACETS = {
+    "LIMIT": 20,
+}
+
+# Откуда отвечает поиск по каталогу: "opac" - запросы к OPAC, "mirror" - локальное зеркало
+# (library_service.opac.mirror), а OPAC - только для наличия экземпляров и БД, которые еще не загружены
+CATALOG_SEARCH_BACKEND = "opac"
+
+# Зеркало каталога: SCENARIOS - какие префиксы сценариев OPAC отвечают каким полям зеркала; выражения с другими
+# сценариями отправляются в OPAC. Загрузка - командой harvest_catalog или в фоне (HARVEST_IN_BACKGROUND)
+CATALOG_MIRROR = {
+    "SCENARIOS": {"A=": "author", "T=": "title", "S=": "subject", "K=": "keyword"},
+    "BATCH_SIZE": 100,
+    "CONCURRENCY": 8,
+    "RECHECK": 100,
+    # Сколько пустых пачек подряд за водяной отметкой считаются концом БД (допустимый разрыв в MFN -
+    # END_EMPTY_BATCHES * BATCH_SIZE удаленных записей подряд)
+    "END_EMPTY_BATCHES": 5,
+    "LIVE_AVAILABILITY": 50,
+    "HARVEST_IN_BACKGROUND": False,
+    "HARVEST_INTERVAL": 3600,
+}
+
+# Подсказки в строке поиска (см. library_service.opac.suggest). Индекс пополняется свежими (не из кэша)
+# выдачами поиска и раз в SCAN_INTERVAL секунд выражениями SCAN_EXPRESSIONS по всем БД (например, ["T=$"] для небольшого каталога)
+CATALOG_SUGGEST = {
+    "MAX_ENTRIES": 200_000,
+    "MAX_LENGTH": 200,
+    "MIN_PREFIX": 2,
+    "LIMIT": 10,
+    "MAX_LIMIT": 50,
+    "SCAN": 500,
+    "SCAN_EXPRESSIONS": [],
+    "SCAN_INTERVAL": 6 * 3600,
+}
+
+# Лента анонсов обновляется в фоне раз в INTERVAL секунд; снимок старше MAX_STALENESS обновляется по запросу
+ANNOUNCEMENTS_FEED = {
+    "INTERVAL": 300,
+    "MAX_STALENESS": 1800,
+}
+
+# Кэш сведений о читателях OPAC: флаги allowed/debtor/gone устаревают быстрее остальных данных
+OPAC_READER_CACHE = {
+    "TTL": 3600,
+    "STATUS_TTL": 60,
+    "MAX_BYTES": 8 * 1024 * 1024,
+}
+
+# Сколько записей выдачи читателя разрешается одновременно запрашивать в OPAC; найденные id книг
+# кэшируются в памяти (CACHE_TTL, CACHE_MAX_BYTES), дальше берутся из LoanRecord
+OPAC_LOAN_RESOLVER = {
+    "CONCURRENCY": 8,
+    "CACHE_TTL": 24 * 3600,
+    "CACHE_MAX_BYTES": 4 * 1024 * 1024,
+}
+
+# Обложки книг (см. library_service.covers): файлы хранятся по хэшу содержимого, миниатюры делаются в пуле процессов
+COVERS = {
+    "ROOT": MEDIA_ROOT / "covers",
+    "THUMBNAIL_SIZE": (200, 300),
+    "WORKERS": 2,
+    "INDEX_TTL": 7 * 24 * 3600,  # через сколько перепроверять, не сменилась ли обложка в OPAC
+    "MAX_AGE": 30 * 24 * 3600,  # Cache-Control для браузеров
+}
+
+# Справочники OPAC (сценарии поиска, список БД)
+REFERENCE_DATA = {
+    "INTERVAL": 3600,
+    "MAX_STALENESS": 24 * 3600,
+}
+
+# Пакетная загрузка записей OPAC поиском по MFN (см. library_service.opac.api.book.opac_records_retrieve)
+OPAC_BATCH_RETRIEVE = {
+    # Префикс сценария поиска по MFN. Пусто - пакетная загрузка не используется
+    "MFN_SEARCH_PREFIX": "",
+    "MAX_IDS_PER_SEARCH": 50,
+}
+
+# Время жизни снимка связей БД OPAC и библиотек в воркерах, которые не получили сигнал об изменении (секунды)
+CATALOG_TOPOLOGY_TTL = 60
 
 SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
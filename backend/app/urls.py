@@ -30,7 +30,7 @@ from adrf.routers import DefaultRouter as AsyncDefaultRouter
 
 from library_service.views.basket import BasketViewset
 from library_service.views.bitrix import BitrixAuthView
-from library_service.views.catalog import BookViewset, LibraryViewset, ScenarioViewset
+from library_service.views.catalog import BookViewset, CoverView, DatabaseViewset, LibraryViewset, ScenarioViewset
 from library_service.views.library_settings import LibrarySettingsViewSet
 from library_service.views.order import BorrowedViewset, OrderViewset
 from library_service.views.profile import ProfileViewset, ProfileBannedViewset
@@ -39,11 +39,13 @@ from library_service.views.comments import OrderCommentViewset, OrderItemComment
 from library_service.views.auth import AuthViewset, AuthThirdPartyViewset, LogoutViewset
 from library_service.views.moderator import ReadersViewset
 from library_service.views.moderator import StaffViewset
+from library_service.views.opac import OpacMetricsView
 
 router = AsyncDefaultRouter()
 router.register("book", BookViewset, basename="book")
 router.register("library", LibraryViewset, basename="library")
 router.register("scenario", ScenarioViewset, basename="scenario")
+router.register("database", DatabaseViewset, basename="database")
 router.register("basket", BasketViewset, basename="basket")
 router.register("profile", ProfileViewset, basename="profile")
 router.register("profile/banned", ProfileBannedViewset, basename="profile-banned")
@@ -67,6 +69,8 @@ urlpatterns = [
     path("api/auth/third-party/", AuthThirdPartyViewset.as_view()),
     path("api/auth/refresh/", TokenRefreshView.as_view()),
     path("api/auth/logout/", LogoutViewset.as_view()),
+    path("api/opac/metrics/", OpacMetricsView.as_view()),
+    path("api/cover/<str:book_id>/", CoverView.as_view(), name="cover"),
     # path("api/auth/logout/", TokenBlacklistView.as_view()),
     path("api/", include(router.urls)),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
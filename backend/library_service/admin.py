@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from library_service.models.catalog import Library, LibraryDatabase
+from library_service.models.catalog import Library, LibraryDatabase, LoanRecord, MirrorRecord, MirrorWatermark
 from library_service.models.order import Order, OrderHistory, OrderItem
 from library_service.models.user import Basket, BasketItem, UserProfile
 from library_service.models.comments import OrderComment, OrderItemComment
@@ -67,6 +67,24 @@ class LibraryDatabaseAdmin(admin.ModelAdmin):
     list_display = ["id", "database", "library"]
 
 
+@admin.register(LoanRecord)
+class LoanRecordAdmin(admin.ModelAdmin):
+    list_display = ["id", "database", "record", "book_id"]
+    search_fields = ["record", "book_id"]
+
+
+@admin.register(MirrorRecord)
+class MirrorRecordAdmin(admin.ModelAdmin):
+    list_display = ["id", "database", "mfn", "created", "harvested_at"]
+    list_filter = ["database"]
+    search_fields = ["title", "author"]
+
+
+@admin.register(MirrorWatermark)
+class MirrorWatermarkAdmin(admin.ModelAdmin):
+    list_display = ["id", "database", "mfn", "created", "harvested_at"]
+
+
 @admin.register(OrderComment)
 class OrderCommentAdmin(admin.ModelAdmin):
     list_display = ["id", "comment"]
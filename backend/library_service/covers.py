@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from aiohttp import ClientSession
+from django.conf import settings
+
+from library_service.opac.api.covers import opac_cover
+from library_service.opac.book import record_key, record_retrieve
+from library_service.opac.singleflight import single_flight
+from library_service.thumbnails import make_thumbnail
+
+BOOK_ID = re.compile(r"^[A-Za-z0-9]+_[A-Za-z0-9]+$")
+THUMBNAIL_SUFFIX = ".thumb.jpg"
+
+
+@dataclass(frozen=True)
+class Cover:
+    path: Path
+    content_type: str
+    digest: str
+
+
+def covers_root() -> Path:
+    return Path(settings.COVERS["ROOT"])
+
+
+# Файлы раскладываются по первым символам хэша, чтобы в одном каталоге не было слишком много файлов
+def content_path(digest: str, suffix: str = "") -> Path:
+    return covers_root() / digest[:2] / f"{digest}{suffix}"
+
+
+# Для каждой книги хранится только хэш и тип ее обложки; одинаковые обложки разных книг лежат в одном файле
+def index_path(book_id: str) -> Path:
+    return covers_root() / "books" / book_id
+
+
+def write_atomic(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def thumbnail_pool() -> ProcessPoolExecutor:
+    global _pool  # pylint: disable=global-statement
+    if _pool is None:
+        # spawn: дочерним процессам не нужно наследовать состояние воркера (цикл событий, соединения)
+        _pool = ProcessPoolExecutor(settings.COVERS["WORKERS"], mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+async def shutdown_thumbnail_pool():
+    global _pool  # pylint: disable=global-statement
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _read_index(book_id: str) -> tuple[str, str] | None:
+    index = index_path(book_id)
+    try:
+        if time.time() - index.stat().st_mtime > settings.COVERS["INDEX_TTL"]:
+            return None
+        digest, content_type = index.read_text().split("\n")
+        if not content_path(digest).exists():
+            return None
+        return digest, content_type
+    except (OSError, ValueError):
+        return None
+
+
+async def _fetch_original(client: ClientSession, book_id: str) -> tuple[str, str] | None:
+    book = await record_retrieve(client, *record_key(book_id))
+    if not book.cover:
+        return None
+
+    data, content_type = await opac_cover(client, book.cover)
+    digest = await asyncio.to_thread(_store_original, book_id, data, content_type)
+
+    return digest, content_type
+
+
+def _store_original(book_id: str, data: bytes, content_type: str) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    if not content_path(digest).exists():
+        write_atomic(content_path(digest), data)
+    write_atomic(index_path(book_id), f"{digest}\n{content_type}".encode())
+    return digest
+
+
+async def _thumbnail(digest: str) -> bool:
+    size = tuple(settings.COVERS["THUMBNAIL_SIZE"])
+    return await asyncio.get_running_loop().run_in_executor(
+        thumbnail_pool(), make_thumbnail, str(content_path(digest)), str(content_path(digest, THUMBNAIL_SUFFIX)), size
+    )
+
+
+# Обложка книги из дискового кэша; при первом обращении скачивается из OPAC и уменьшается.
+# Если миниатюру сделать не удалось (нет Pillow, неизвестный формат), отдается исходный файл.
+# Работа с диском идет в потоках, чтобы не останавливать цикл событий
+async def cover_retrieve(client: ClientSession, book_id: str, full: bool = False) -> Cover | None:
+    if not BOOK_ID.match(book_id):
+        return None
+
+    indexed = await asyncio.to_thread(_read_index, book_id)
+    if indexed is None:
+        indexed = await single_flight.do("cover", book_id, lambda: _fetch_original(client, book_id))
+        if indexed is None:
+            return None
+    digest, content_type = indexed
+
+    if not full:
+        thumbnail = content_path(digest, THUMBNAIL_SUFFIX)
+        exists = await asyncio.to_thread(thumbnail.exists)
+        if exists or await single_flight.do("thumbnail", digest, lambda: _thumbnail(digest)):
+            return Cover(thumbnail, "image/jpeg", f"{digest}-thumb")
+
+    return Cover(content_path(digest), content_type, digest)
@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+
+from aiohttp import ClientSession
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from library_service.opac.api.databases import opac_databases
+from library_service.opac.api.scenarios import OpacScenario, opac_scenarios
+from library_service.opac.api.book import opac_search
+from library_service.opac.book import books_announces_list
+from library_service.opac.mirror import harvest_catalog
+from library_service.opac.refresher import PeriodicRefresher
+from library_service.opac.suggest import suggest_index
+from library_service.opac.topology import aget_topology
+from library_service.serializers.catalog import BookSerializer, DatabaseSerializer, ScenarioSerializer
+
+
+async def load_announcements(client: ClientSession) -> list[dict]:
+    books = await books_announces_list(client)
+    return BookSerializer(books, many=True).data
+
+
+# Лента анонсов на главной: собирается в фоне, запросы отдают готовый снимок без обращения к OPAC
+announcements_feed: PeriodicRefresher[list[dict]] = PeriodicRefresher(
+    "announcements",
+    load_announcements,
+    interval=settings.ANNOUNCEMENTS_FEED["INTERVAL"],
+    max_staleness=settings.ANNOUNCEMENTS_FEED["MAX_STALENESS"],
+)
+
+
+@dataclass(frozen=True)
+class ReferenceEntry:
+    data: list
+    etag: str
+
+
+def reference_entry(data: list) -> ReferenceEntry:
+    body = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, sort_keys=True).encode()
+    return ReferenceEntry(data, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+
+
+def scenarios_key(database: str | None = None) -> str:
+    return "scenarios" if database is None else f"scenarios:{database}"
+
+
+async def load_reference(client: ClientSession) -> dict[str, ReferenceEntry]:
+    topology = await aget_topology()
+    databases = sorted({database for _, database in topology.databases()})
+
+    opac_databases_list, *scenarios = await asyncio.gather(
+        opac_databases(client),
+        *(opac_scenarios(client, database) for database in databases),
+    )
+
+    entries = {"databases": reference_entry(DatabaseSerializer(opac_databases_list, many=True).data)}
+
+    # Сценарии почти совпадают между БД, в общий список каждый префикс попадает один раз
+    merged: dict[str, OpacScenario] = {}
+    for database, database_scenarios in zip(databases, scenarios):
+        entries[scenarios_key(database)] = reference_entry(ScenarioSerializer(database_scenarios, many=True).data)
+        for scenario in database_scenarios:
+            merged.setdefault(scenario.prefix, scenario)
+    entries[scenarios_key()] = reference_entry(ScenarioSerializer(list(merged.values()), many=True).data)
+
+    return entries
+
+
+# Справочники OPAC (сценарии поиска по всем БД и список БД) меняются редко, отдаются из памяти с ETag
+reference_data: PeriodicRefresher[dict[str, ReferenceEntry]] = PeriodicRefresher(
+    "reference",
+    load_reference,
+    interval=settings.REFERENCE_DATA["INTERVAL"],
+    max_staleness=settings.REFERENCE_DATA["MAX_STALENESS"],
+)
+
+
+# Обход каталога для подсказок: записи выдач добавляются в индекс.
+# Идет мимо кэшей поиска, чтобы большие выдачи не вытесняли из них пользовательские запросы
+async def scan_suggestions(client: ClientSession) -> int:
+    databases = sorted({database for _, database in (await aget_topology()).databases()})
+    for expression in settings.CATALOG_SUGGEST["SCAN_EXPRESSIONS"]:
+        for database in databases:
+            suggest_index.add_records(await opac_search(client, database, expression))
+    return len(suggest_index)
+
+
+suggest_scan: PeriodicRefresher[int] = PeriodicRefresher(
+    "suggest",
+    scan_suggestions,
+    interval=settings.CATALOG_SUGGEST["SCAN_INTERVAL"],
+    max_staleness=settings.CATALOG_SUGGEST["SCAN_INTERVAL"],
+)
+
+
+async def harvest_mirror(client: ClientSession) -> dict[str, int]:
+    return {result.database: result.watermark for result in await harvest_catalog(client)}
+
+
+# Фоновая загрузка зеркала каталога; в нескольких воркерах лучше запускать команду harvest_catalog по расписанию
+mirror_harvest: PeriodicRefresher[dict[str, int]] = PeriodicRefresher(
+    "mirror",
+    harvest_mirror,
+    interval=settings.CATALOG_MIRROR["HARVEST_INTERVAL"],
+    max_staleness=settings.CATALOG_MIRROR["HARVEST_INTERVAL"],
+    register=settings.CATALOG_MIRROR["HARVEST_IN_BACKGROUND"],
+)
@@ -0,0 +1,37 @@
+from typing import Awaitable, Callable, Iterable
+
+Hook = Callable[[], Awaitable[None]]
+
+
+# Django не умеет обрабатывать lifespan, поэтому перехватываем его сами и отдаем остальное Django
+class LifespanApplication:
+    def __init__(self, app, startup: Iterable[Hook] = (), shutdown: Iterable[Hook] = ()):
+        self.app = app
+        self.startup = list(startup)
+        self.shutdown = list(shutdown)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "lifespan":
+            return await self.app(scope, receive, send)
+
+        while True:
+            message = await receive()
+
+            if message["type"] == "lifespan.startup":
+                try:
+                    for hook in self.startup:
+                        await hook()
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    await send({"type": "lifespan.startup.failed", "message": str(error)})
+                    return None
+                await send({"type": "lifespan.startup.complete"})
+
+            elif message["type"] == "lifespan.shutdown":
+                try:
+                    for hook in self.shutdown:
+                        await hook()
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    await send({"type": "lifespan.shutdown.failed", "message": str(error)})
+                    return None
+                await send({"type": "lifespan.shutdown.complete"})
+                return None
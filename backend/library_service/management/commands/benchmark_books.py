@@ -0,0 +1,68 @@
+import dataclasses
+import gc
+import timeit
+import tracemalloc
+from typing import Callable
+
+from django.core.management.base import BaseCommand
+
+from library_service.opac.api.book import OpacBook
+from library_service.opac.api.decoding import decode_list
+from library_service.opac.book import Book
+from library_service.management.samples import generate_books
+
+
+# Обычные объекты с __dict__ и теми же полями, как у Book до перехода на слоты
+class DictObject:
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+
+def field_values(instance) -> dict:
+    return {field.name: getattr(instance, field.name) for field in dataclasses.fields(instance)}
+
+
+def dict_book(book: OpacBook, library: int) -> DictObject:
+    slotted = Book.from_opac(book, library)
+    fields = field_values(slotted)
+    fields["links"] = [DictObject(**field_values(link)) for link in slotted.links]
+    fields["holdings"] = [DictObject(**field_values(holding)) for holding in slotted.holdings]
+    return DictObject(**fields)
+
+
+def allocated(build: Callable[[], list]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+class Command(BaseCommand):
+    help = "Measures memory per record and construction time of Book for large search results"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--records", type=int, default=10_000, help="Search result size")
+        parser.add_argument("--exemplars", type=int, default=5, help="Exemplars per record")
+        parser.add_argument("--repeat", type=int, default=5, help="Best of N runs")
+
+    def handle(self, *args, **options):
+        count = options["records"]
+        payload = OpacBook.schema().dump(generate_books(count, options["exemplars"]), many=True)
+        records = decode_list(OpacBook, payload)
+
+        # Записи OPAC общие для всех вариантов, поэтому считаются отдельно
+        records_size = allocated(lambda: decode_list(OpacBook, payload))
+
+        self.stdout.write(f"{count} records, OpacBook: {records_size / count:.0f} bytes/record")
+        for name, build in [("dict", dict_book), ("slots", Book.from_opac)]:
+            size = allocated(lambda build=build: [build(record, 1) for record in records])
+            self.stdout.write(f"{name:>6} Book: {size / count:.0f} bytes/record")
+
+        seconds = min(
+            timeit.repeat(lambda: [Book.from_opac(record, 1) for record in records], number=1, repeat=options["repeat"])
+        )
+        self.stdout.write(f"Book construction: {seconds / count * 1e6:.2f} us/record")
@@ -0,0 +1,35 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from library_service.opac.api.book import OpacBook
+from library_service.opac.api.decoding import decode_list
+from library_service.opac.book import Book
+from library_service.management.samples import generate_books
+
+
+class Command(BaseCommand):
+    help = "Compares marshmallow-based and precompiled decoding of OPAC search responses"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 2000], help="Search result sizes")
+        parser.add_argument("--exemplars", type=int, default=5, help="Exemplars per record")
+        parser.add_argument("--repeat", type=int, default=5, help="Best of N runs")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'records':>8} {'schema, ms':>12} {'decoder, ms':>12} {'speedup':>8}")
+
+        for size in options["sizes"]:
+            payload = OpacBook.schema().dump(generate_books(size, options["exemplars"]), many=True)
+
+            def schema_path(payload=payload):
+                return [Book.from_opac(book, 1) for book in OpacBook.schema().load(payload, many=True)]
+
+            def decoder_path(payload=payload):
+                return [Book.from_opac(book, 1) for book in decode_list(OpacBook, payload)]
+
+            schema_time = min(timeit.repeat(schema_path, number=1, repeat=options["repeat"])) * 1000
+            decoder_time = min(timeit.repeat(decoder_path, number=1, repeat=options["repeat"])) * 1000
+            self.stdout.write(
+                f"{size:>8} {schema_time:>12.2f} {decoder_time:>12.2f} {schema_time / decoder_time:>7.1f}x"
+            )
@@ -0,0 +1,99 @@
+import timeit
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from library_service.opac.book import Book
+from library_service.parsers import ORJSONParser
+from library_service.renderers import ORJSONRenderer
+from library_service.serializers.catalog import BookSerializer, ScenarioSerializer
+from library_service.management.samples import generate_books, generate_scenarios
+
+
+def user(i: int) -> dict:
+    return {
+        "id": i,
+        "username": f"user{i}",
+        "first_name": "Иван",
+        "last_name": "Иванов",
+        "library_card": f"{i:08d}",
+        "campus_id": f"{i}",
+        "mira_id": f"{i}",
+        "fullname": "Иванов Иван Иванович",
+        "department": "Институт информационных технологий и анализа данных",
+    }
+
+
+# Ответ списка заказов для сотрудников той же формы, что и у OrderSerializer
+def staff_orders(count: int, books: list[dict]) -> list[dict]:
+    orders = []
+    for i in range(count):
+        order_books = [books[(i + j) % len(books)] for j in range(3)]
+        orders.append(
+            {
+                "id": i,
+                "library": {"id": 1, "name": "Научно-техническая библиотека", "address": "Лермонтова, 83"},
+                "statuses": [
+                    {"description": "", "status": status, "date": "2025-03-01T12:30:15.123456+08:00", "staff": None}
+                    for status in ("NEW", "PROCESSING", "READY")
+                ],
+                "books": [
+                    {
+                        "id": i * 3 + j,
+                        "book": book,
+                        "status": "READY",
+                        "description": "",
+                        "handed_date": "2025-03-02T10:00:00+08:00",
+                        "to_return_date": "2025-04-02",
+                        "returned_date": None,
+                        "analogous_order_item": None,
+                    }
+                    for j, book in enumerate(order_books)
+                ],
+                "user": user(i),
+                "books_to_return": [],
+            }
+        )
+    return orders
+
+
+class Command(BaseCommand):
+    help = "Compares JSON rendering and parsing of the largest API responses with json and orjson"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--records", type=int, default=1_000, help="Books in a search response")
+        parser.add_argument("--orders", type=int, default=300, help="Orders in a staff order list")
+        parser.add_argument("--repeat", type=int, default=5, help="Best of N runs")
+
+    def best(self, function, repeat: int) -> float:
+        return min(timeit.repeat(function, number=1, repeat=repeat)) * 1e3
+
+    def handle(self, *args, **options):
+        books = BookSerializer(
+            [Book.from_opac(record, 1) for record in generate_books(options["records"])], many=True
+        ).data
+        responses = [
+            (f"search ({options['records']} books)", books),
+            (f"staff orders ({options['orders']})", staff_orders(options["orders"], books)),
+            ("scenarios", ScenarioSerializer(generate_scenarios(100), many=True).data),
+        ]
+
+        for name, data in responses:
+            content = JSONRenderer().render(data)
+            if ORJSONRenderer().render(data) != content:
+                raise CommandError(f"{name}: orjson output differs from json")
+            if ORJSONParser().parse(BytesIO(content)) != JSONParser().parse(BytesIO(content)):
+                raise CommandError(f"{name}: orjson parsing differs from json")
+
+            self.stdout.write(f"{name}: {len(content) / 1024:.0f} KiB")
+            for label, renderer, parser in [
+                ("json", JSONRenderer(), JSONParser()),
+                ("orjson", ORJSONRenderer(), ORJSONParser()),
+            ]:
+                render = self.best(lambda renderer=renderer, data=data: renderer.render(data), options["repeat"])
+                parse = self.best(
+                    lambda parser=parser, content=content: parser.parse(BytesIO(content)), options["repeat"]
+                )
+                self.stdout.write(f"{label:>8}: render {render:8.2f} ms, parse {parse:8.2f} ms")
@@ -0,0 +1,61 @@
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_dataclasses.serializers import DataclassSerializer
+
+from library_service.opac.api.scenarios import OpacScenario
+from library_service.opac.book import Book
+from library_service.serializers.catalog import BookSerializer, ScenarioSerializer
+from library_service.management.samples import generate_books, generate_scenarios
+
+
+# Прежние сериализаторы, строящие дерево полей DRF при каждом создании
+class DataclassBookSerializer(DataclassSerializer):
+    class Meta:
+        dataclass = Book
+
+
+class DataclassScenarioSerializer(DataclassSerializer):
+    class Meta:
+        dataclass = OpacScenario
+
+
+# Поиск - один сериализатор со списком; заказы - отдельный сериализатор на книгу каждой позиции
+def serialize_list(serializer: type, items: list) -> list:
+    return serializer(items, many=True).data
+
+
+def serialize_each(serializer: type, items: list) -> list:
+    return [serializer(item).data for item in items]
+
+
+class Command(BaseCommand):
+    help = "Measures per-item serialization cost of search results and staff order lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--records", type=int, default=1_000, help="Items per list")
+        parser.add_argument("--exemplars", type=int, default=5, help="Exemplars per record")
+        parser.add_argument("--repeat", type=int, default=5, help="Best of N runs")
+
+    def per_item(self, serialize, serializer: type, items: list, repeat: int) -> float:
+        seconds = min(timeit.repeat(lambda: serialize(serializer, items), number=1, repeat=repeat))
+        return seconds / len(items) * 1e6
+
+    def handle(self, *args, **options):
+        count = options["records"]
+        books = [Book.from_opac(record, 1) for record in generate_books(count, options["exemplars"])]
+        scenarios = generate_scenarios(count)
+
+        cases = [
+            ("search", books, serialize_list, DataclassBookSerializer, BookSerializer),
+            ("order items", books, serialize_each, DataclassBookSerializer, BookSerializer),
+            ("scenarios", scenarios, serialize_list, DataclassScenarioSerializer, ScenarioSerializer),
+        ]
+
+        self.stdout.write(f"{count} items, {options['exemplars']} exemplars per book")
+        for name, items, serialize, dataclass, plain in cases:
+            if serialize(dataclass, items) != serialize(plain, items):
+                raise CommandError(f"{name}: plain serializer output differs from DataclassSerializer")
+            before = self.per_item(serialize, dataclass, items, options["repeat"])
+            after = self.per_item(serialize, plain, items, options["repeat"])
+            self.stdout.write(f"{name:>12}: dataclass {before:8.2f} us/item, plain {after:8.2f} us/item")
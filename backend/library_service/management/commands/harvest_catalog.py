@@ -0,0 +1,25 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from library_service.opac.client import opac_client_session
+from library_service.opac.mirror import HarvestResult, harvest_catalog
+
+
+class Command(BaseCommand):
+    help = "Copies OPAC records into the local catalog mirror, continuing from the last harvested MFN"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", nargs="+", help="OPAC databases (default: all library databases)")
+        parser.add_argument("--full", action="store_true", help="Re-harvest from the first record")
+
+    def handle(self, *args, **options):
+        async def harvest() -> list[HarvestResult]:
+            async with opac_client_session() as client:
+                return await harvest_catalog(client, options["database"], options["full"])
+
+        for result in asyncio.run(harvest()):
+            self.stdout.write(
+                f"{result.database}: {result.harvested} harvested, {result.deleted} deleted, "
+                f"watermark {result.watermark}"
+            )
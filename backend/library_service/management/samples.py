@@ -0,0 +1,50 @@
+from library_service.opac.api.book import OpacBook, OpacBookExemplar, OpacBookInfo
+from library_service.opac.api.scenarios import OpacScenario
+
+DATABASES = ("ISTU", "NTD", "ZIMA")
+AUTHORS = ("Иванов И. И.", "Петров П. П.", "Сидоров С. С.", "Кузнецов К. К.")
+TITLES = ("Высшая математика", "Физика", "Теоретическая механика", "Сопротивление материалов", "Химия")
+SCENARIOS = [
+    OpacScenario("A=", "Автор"),
+    OpacScenario("T=", "Заглавие"),
+    OpacScenario("S=", "Рубрика"),
+    OpacScenario("K=", "Ключевые слова"),
+    OpacScenario("IN=", "Инвентарный номер"),
+]
+
+
+# Большие синтетические выдачи OPAC для бенчмарков
+def generate_books(count: int, exemplars: int = 5) -> list[OpacBook]:
+    books = []
+    for i in range(count):
+        author = AUTHORS[i % len(AUTHORS)]
+        title = f"{TITLES[i % len(TITLES)]} {i}"
+        books.append(
+            OpacBook(
+                f"{DATABASES[i % len(DATABASES)]}_{i + 1}",
+                f"{author} {title}",
+                OpacBookInfo(
+                    [author],
+                    [],
+                    [title],
+                    [f"978-5-{i:06d}"],
+                    ["rus"],
+                    ["RU"],
+                    ["Иркутск"],
+                    ["ИРНИТУ"],
+                    ["SUBJECT"],
+                    ["KEYWORD"],
+                ),
+                True,
+                2000 + i % 25,
+                [OpacBookExemplar(f"{i}-{j}", 1, "ok", sigla="ЧЗ") for j in range(exemplars)],
+                brief=f"{author} {title}",
+                cover=f"/covers/{i}.jpg",
+                created="20250101",
+            )
+        )
+    return books
+
+
+def generate_scenarios(count: int) -> list[OpacScenario]:
+    return (SCENARIOS * (count // len(SCENARIOS) + 1))[:count]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library_service", "0031_userprofile_current_role"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoanRecord",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("database", models.CharField(max_length=255, verbose_name="База данных")),
+                ("record", models.CharField(max_length=255, verbose_name="Идентификатор записи OPAC")),
+                ("book_id", models.CharField(max_length=255, verbose_name="Id книги")),
+            ],
+            options={
+                "verbose_name": "Запись выдачи",
+                "verbose_name_plural": "Записи выдачи",
+                "constraints": [models.UniqueConstraint(fields=("database", "record"), name="unique_loan_record")],
+            },
+        ),
+    ]
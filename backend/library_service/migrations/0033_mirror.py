@@ -0,0 +1,99 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:18
+
+from django.db import migrations, models
+
+TABLE = "library_service_mirrorrecord"
+FTS_TABLE = f"{TABLE}_fts"
+
+# SQLite: FTS5 с внешним содержимым, синхронизируется триггерами
+SQLITE_CREATE = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(author, title, subject, keyword, content='{TABLE}', content_rowid='id')",
+    f"""CREATE TRIGGER {TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, author, title, subject, keyword)
+        VALUES (new.id, new.author, new.title, new.subject, new.keyword);
+    END""",
+    f"""CREATE TRIGGER {TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, author, title, subject, keyword)
+        VALUES ('delete', old.id, old.author, old.title, old.subject, old.keyword);
+    END""",
+    f"""CREATE TRIGGER {TABLE}_au AFTER UPDATE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, author, title, subject, keyword)
+        VALUES ('delete', old.id, old.author, old.title, old.subject, old.keyword);
+        INSERT INTO {FTS_TABLE}(rowid, author, title, subject, keyword)
+        VALUES (new.id, new.author, new.title, new.subject, new.keyword);
+    END""",
+]
+SQLITE_DROP = [f"DROP TRIGGER {TABLE}_{suffix}" for suffix in ("ai", "ad", "au")] + [f"DROP TABLE {FTS_TABLE}"]
+
+# PostgreSQL: вычисляемый tsvector с весами A-D по полям и GIN-индекс
+POSTGRESQL_CREATE = [
+    f"""ALTER TABLE {TABLE} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', author), 'A') ||
+        setweight(to_tsvector('simple', title), 'B') ||
+        setweight(to_tsvector('simple', subject), 'C') ||
+        setweight(to_tsvector('simple', keyword), 'D')
+    ) STORED""",
+    f"CREATE INDEX {TABLE}_search_vector ON {TABLE} USING GIN (search_vector)",
+]
+POSTGRESQL_DROP = [f"DROP INDEX {TABLE}_search_vector", f"ALTER TABLE {TABLE} DROP COLUMN search_vector"]
+
+# На остальных СУБД индекса нет, поиск по зеркалу проверяет все записи БД
+STATEMENTS = {
+    "sqlite": (SQLITE_CREATE, SQLITE_DROP),
+    "postgresql": (POSTGRESQL_CREATE, POSTGRESQL_DROP),
+}
+
+
+def create_fulltext_index(apps, schema_editor):
+    for statement in STATEMENTS.get(schema_editor.connection.vendor, ([], []))[0]:
+        schema_editor.execute(statement)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    for statement in STATEMENTS.get(schema_editor.connection.vendor, ([], []))[1]:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library_service", "0032_loanrecord"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MirrorWatermark",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("database", models.CharField(max_length=255, unique=True, verbose_name="База данных")),
+                ("mfn", models.PositiveIntegerField(default=0, verbose_name="Последний MFN")),
+                ("created", models.CharField(blank=True, max_length=32, verbose_name="Последняя дата создания")),
+                ("harvested_at", models.DateTimeField(blank=True, null=True, verbose_name="Последняя загрузка")),
+            ],
+            options={
+                "verbose_name": "Состояние зеркала БД",
+                "verbose_name_plural": "Состояние зеркала БД",
+            },
+        ),
+        migrations.CreateModel(
+            name="MirrorRecord",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("database", models.CharField(max_length=255, verbose_name="База данных")),
+                ("mfn", models.PositiveIntegerField(verbose_name="MFN")),
+                ("record", models.JSONField(verbose_name="Запись OPAC")),
+                ("author", models.TextField(blank=True, verbose_name="Авторы")),
+                ("title", models.TextField(blank=True, verbose_name="Заглавия")),
+                ("subject", models.TextField(blank=True, verbose_name="Рубрики")),
+                ("keyword", models.TextField(blank=True, verbose_name="Ключевые слова")),
+                ("created", models.CharField(blank=True, max_length=32, verbose_name="Дата создания в OPAC")),
+                ("harvested_at", models.DateTimeField(verbose_name="Загружена")),
+            ],
+            options={
+                "verbose_name": "Запись зеркала каталога",
+                "verbose_name_plural": "Записи зеркала каталога",
+                "constraints": [models.UniqueConstraint(fields=("database", "mfn"), name="unique_mirror_record")],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
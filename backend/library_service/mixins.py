@@ -3,6 +3,8 @@ from aiohttp import ClientSession
 from adrf import mixins as amixins
 from rest_framework.exceptions import PermissionDenied
 
+from library_service.opac.client import opac_client_session
+
 
 # Довольно костыльное решение, чтобы избежать случаев, когда два запроса одновременно обращаются к БД (data races)
 # Лучше вместо этого использовать транзакции - @transaction.atomic
@@ -48,34 +50,34 @@ class ClientSessionMixin:
 
 class SessionListModelMixin(ClientSessionMixin, amixins.ListModelMixin):
     async def alist(self, *args, **kwargs):
-        async with ClientSession() as client:
+        async with opac_client_session() as client:
             self.client_session = client
             return await super().alist(*args, **kwargs)
 
 
 class SessionRetrieveModelMixin(ClientSessionMixin, amixins.RetrieveModelMixin):
     async def aretrieve(self, *args, **kwargs):
-        async with ClientSession() as client:
+        async with opac_client_session() as client:
             self.client_session = client
             return await super().aretrieve(*args, **kwargs)
 
 
 class SessionCreateModelMixin(ClientSessionMixin, amixins.CreateModelMixin):
     async def acreate(self, *args, **kwargs):
-        async with ClientSession() as client:
+        async with opac_client_session() as client:
             self.client_session = client
             return await super().acreate(*args, **kwargs)
 
 
 class SessionUpdateModelMixin(ClientSessionMixin, amixins.UpdateModelMixin):
     async def aupdate(self, *args, **kwargs):
-        async with ClientSession() as client:
+        async with opac_client_session() as client:
             self.client_session = client
             return await super().aupdate(*args, **kwargs)
 
 
 class SessionDestroyModelMixin(ClientSessionMixin, amixins.DestroyModelMixin):
     async def adestroy(self, *args, **kwargs):
-        async with ClientSession() as client:
+        async with opac_client_session() as client:
             self.client_session = client
             return await super().adestroy(*args, **kwargs)
@@ -23,3 +23,55 @@ class LibraryDatabase(models.Model):
 
     def __str__(self):
         return f"{self.database} - {self.library.description}"
+
+
+# Соответствие записи из выдачи читателя (БД, идентификатор OPAC) и id книги в каталоге; не меняется со временем
+class LoanRecord(models.Model):
+    database = models.CharField(max_length=255, verbose_name="База данных")
+    record = models.CharField(max_length=255, verbose_name="Идентификатор записи OPAC")
+    book_id = models.CharField(max_length=255, verbose_name="Id книги")
+
+    class Meta:
+        verbose_name = "Запись выдачи"
+        verbose_name_plural = "Записи выдачи"
+        constraints = [models.UniqueConstraint(fields=["database", "record"], name="unique_loan_record")]
+
+    def __str__(self):
+        return f"{self.database} {self.record} - {self.book_id}"
+
+
+# Локальная копия записи OPAC для поиска без обращения к OPAC (см. library_service.opac.mirror).
+# Поля author/title/subject/keyword - значения через перевод строки, по ним строится полнотекстовый индекс
+class MirrorRecord(models.Model):
+    database = models.CharField(max_length=255, verbose_name="База данных")
+    mfn = models.PositiveIntegerField(verbose_name="MFN")
+    record = models.JSONField(verbose_name="Запись OPAC")
+    author = models.TextField(blank=True, verbose_name="Авторы")
+    title = models.TextField(blank=True, verbose_name="Заглавия")
+    subject = models.TextField(blank=True, verbose_name="Рубрики")
+    keyword = models.TextField(blank=True, verbose_name="Ключевые слова")
+    created = models.CharField(max_length=32, blank=True, verbose_name="Дата создания в OPAC")
+    harvested_at = models.DateTimeField(verbose_name="Загружена")
+
+    class Meta:
+        verbose_name = "Запись зеркала каталога"
+        verbose_name_plural = "Записи зеркала каталога"
+        constraints = [models.UniqueConstraint(fields=["database", "mfn"], name="unique_mirror_record")]
+
+    def __str__(self):
+        return f"{self.database}_{self.mfn}"
+
+
+# Докуда загружена БД: следующий проход начинается с mfn + 1
+class MirrorWatermark(models.Model):
+    database = models.CharField(max_length=255, unique=True, verbose_name="База данных")
+    mfn = models.PositiveIntegerField(default=0, verbose_name="Последний MFN")
+    created = models.CharField(max_length=32, blank=True, verbose_name="Последняя дата создания")
+    harvested_at = models.DateTimeField(null=True, blank=True, verbose_name="Последняя загрузка")
+
+    class Meta:
+        verbose_name = "Состояние зеркала БД"
+        verbose_name_plural = "Состояние зеркала БД"
+
+    def __str__(self):
+        return f"{self.database} - {self.mfn}"
@@ -3,6 +3,10 @@ from dataclasses_json import DataClassJsonMixin, config, Undefined
 from aiohttp import ClientSession
 from django.conf import settings
 
+from library_service.opac.api.decoding import decode_list
+from library_service.opac.resilience import guarded
+from library_service.opac.singleflight import coalesce
+
 
 @dataclass
 class OpacAnnounce(DataClassJsonMixin):
@@ -10,8 +14,10 @@ class OpacAnnounce(DataClassJsonMixin):
     link: str
 
 
+@coalesce
+@guarded("reference")
 async def opac_announces_list(client: ClientSession) -> list[OpacAnnounce]:
     r = await client.get(f"{settings.OPAC_HOSTNAME}/api/announces")
     r.raise_for_status()
 
-    return OpacAnnounce.schema().load(await r.json(), many=True)
+    return decode_list(OpacAnnounce, await r.json())
@@ -1,8 +1,13 @@
+import asyncio
 from dataclasses import dataclass
 from dataclasses_json import DataClassJsonMixin, config, Undefined
-from aiohttp import ClientSession
+from aiohttp import ClientError, ClientResponseError, ClientSession
 from django.conf import settings
 
+from library_service.opac.api.decoding import decode, decode_list, lazy
+from library_service.opac.resilience import guarded
+from library_service.opac.singleflight import coalesce
+
 
 @dataclass
 class OpacBookLink(DataClassJsonMixin):
@@ -44,13 +49,15 @@ class OpacBook(DataClassJsonMixin):
     info: OpacBookInfo
     order: bool
     year: int
-    exemplars: list[OpacBookExemplar]
+    exemplars: list[OpacBookExemplar] = lazy()  # Разбирается только при обращении к экземплярам
     brief: str | None = None
     cover: str | None = None
     links: list[OpacBookLink] | None = None
     created: str | None = None
 
 
+@coalesce
+@guarded("search")
 async def opac_search(client: ClientSession, database: str, expression: str) -> list[OpacBook]:
     payload = {"database": database, "expression": expression, "format": "@opac_plain"}
 
@@ -58,20 +65,85 @@ async def opac_search(client: ClientSession, database: str, expression: str) ->
 
     r = await client.post(f"{settings.OPAC_HOSTNAME}/api/search", json=payload, params=params)
     r.raise_for_status()
-    return OpacBook.schema().load(await r.json(), many=True)
+    return decode_list(OpacBook, await r.json())
 
 
+@coalesce
+@guarded("records")
 async def opac_book_retrieve(client: ClientSession, database: str, mfn: int) -> OpacBook:
     params = {"format": "@opac_plain", "extended": "true"}
 
     r = await client.get(f"{settings.OPAC_HOSTNAME}/api/books/by/mfn/{database}/{mfn}", params=params)
     r.raise_for_status()
-    return OpacBook.schema().load(await r.json())
+    return decode(OpacBook, await r.json())
 
 
+@coalesce
+@guarded("records")
 async def opac_book_retrieve_by_id(client: ClientSession, database: str, book_id: str) -> OpacBook:
     params = {"format": "@opac_plain", "extended": "true", "db": database, "id": book_id}
 
     r = await client.get(f"{settings.OPAC_HOSTNAME}/api/books/", params=params)
     r.raise_for_status()
-    return OpacBook.schema().load(await r.json())
+    return decode(OpacBook, await r.json())
+
+
+# Записи одной БД, найденные пачками через поиск по MFN (OPAC_BATCH_RETRIEVE).
+# Ошибка поиска пробрасывается при strict=True, иначе пачка считается пустой
+async def _search_records(
+    client: ClientSession, database: str, mfns: list[str], prefix: str, strict: bool
+) -> dict[str, OpacBook]:
+    size = settings.OPAC_BATCH_RETRIEVE["MAX_IDS_PER_SEARCH"]
+
+    async def search(chunk: list[str]) -> list[OpacBook]:
+        try:
+            return await opac_search(client, database, "+".join(f"{prefix}{mfn}" for mfn in chunk))
+        except ClientError:
+            if strict:
+                raise
+            return []
+
+    records: dict[str, OpacBook] = {}
+    requested = set(mfns)
+    chunks = [mfns[i : i + size] for i in range(0, len(mfns), size)]
+    for found in await asyncio.gather(*[search(chunk) for chunk in chunks]):
+        for book in found:
+            mfn = book.id.replace("/", "_").split("_")[1]
+            if mfn in requested:
+                records[mfn] = book
+    return records
+
+
+# Записи одной БД по MFN: пачками через поиск по MFN (OPAC_BATCH_RETRIEVE), остальные - поштучно.
+# Отсутствующей считается только запись, на которую OPAC ответил 404; остальные ошибки пробрасываются.
+# strict=False: не найденные пачками (или при ошибке поиска) запрашиваются поштучно.
+# strict=True: отсутствующей считается и запись, которой нет в выдаче поиска по MFN, а ошибка поиска
+# пробрасывается (например, чтобы зеркало не удалило существующие записи)
+async def opac_records_retrieve(
+    client: ClientSession, database: str, mfns: list[str], strict: bool = False, concurrency: int | None = None
+) -> dict[str, OpacBook]:
+    records: dict[str, OpacBook] = {}
+
+    prefix = settings.OPAC_BATCH_RETRIEVE["MFN_SEARCH_PREFIX"]
+    if prefix:
+        records = await _search_records(client, database, mfns, prefix, strict)
+        if strict:
+            return records
+
+    semaphore = asyncio.Semaphore(concurrency or len(mfns) or 1)
+
+    async def retrieve(mfn: str) -> OpacBook | None:
+        async with semaphore:
+            try:
+                return await opac_book_retrieve(client, database, mfn)
+            except ClientResponseError as error:
+                if error.status != 404:
+                    raise
+                return None
+
+    rest = [mfn for mfn in mfns if mfn not in records]
+    for mfn, book in zip(rest, await asyncio.gather(*[retrieve(mfn) for mfn in rest])):
+        if book is not None:
+            records[mfn] = book
+
+    return records
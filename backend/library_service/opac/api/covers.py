@@ -0,0 +1,15 @@
+from aiohttp import ClientSession
+from django.conf import settings
+
+from library_service.opac.resilience import guarded
+from library_service.opac.singleflight import coalesce
+
+
+# path - путь обложки из записи OPAC (OpacBook.cover)
+@coalesce
+@guarded("covers")
+async def opac_cover(client: ClientSession, path: str) -> tuple[bytes, str]:
+    r = await client.get(settings.OPAC_HOSTNAME.removesuffix("/opac") + path)
+    r.raise_for_status()
+
+    return await r.read(), r.content_type
@@ -3,6 +3,10 @@ from dataclasses_json import DataClassJsonMixin, config, Undefined
 from aiohttp import ClientSession
 from django.conf import settings
 
+from library_service.opac.api.decoding import decode_list
+from library_service.opac.resilience import guarded
+from library_service.opac.singleflight import coalesce
+
 
 @dataclass
 class OpacDatabase(DataClassJsonMixin):
@@ -12,8 +16,10 @@ class OpacDatabase(DataClassJsonMixin):
     description: str | None = None
 
 
+@coalesce
+@guarded("reference")
 async def opac_databases(client: ClientSession) -> list[OpacDatabase]:
     r = await client.get(f"{settings.OPAC_HOSTNAME}/api/databases")
     r.raise_for_status()
 
-    return OpacDatabase.schema().load(await r.json(), many=True)
+    return decode_list(OpacDatabase, await r.json())
@@ -0,0 +1,150 @@
+import dataclasses
+import types
+import typing
+from collections.abc import Sequence
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class OpacDecodeError(ValueError):
+    pass
+
+
+# Список, который разбирает вложенные объекты только при первом обращении к элементам.
+# len() не требует разбора, поэтому Book.copies ничего не стоит.
+class LazyList(Sequence):
+    __slots__ = ("_raw", "_convert", "_items")
+
+    def __init__(self, raw: list, convert: Callable[[Any], Any]):
+        self._raw = raw
+        self._convert = convert
+        self._items: list | None = None
+
+    def _decoded(self) -> list:
+        if self._items is None:
+            self._items = [self._convert(item) for item in self._raw]
+            self._raw = None
+        return self._items
+
+    # Текущее содержимое без принудительного разбора (для оценки размера в кэше)
+    def peek(self) -> list:
+        return self._raw if self._items is None else self._items
+
+    def __len__(self) -> int:
+        return len(self._raw if self._items is None else self._items)
+
+    def __getitem__(self, index):
+        return self._decoded()[index]
+
+    def __iter__(self):
+        return iter(self._decoded())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (LazyList, list)):
+            return self._decoded() == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self._decoded())
+
+
+def lazy(**kwargs) -> dataclasses.Field:
+    # pylint: disable-next=invalid-field-call
+    return dataclasses.field(metadata={"opac_lazy": True}, **kwargs)
+
+
+def _to_int(value):
+    return value if isinstance(value, int) or value is None else int(value)
+
+
+def _identity(value):
+    return value
+
+
+# pylint: disable-next=too-many-return-statements
+def _converter(annotation, is_lazy: bool = False) -> Callable[[Any], Any]:
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin in (typing.Union, types.UnionType):
+        inner = [arg for arg in args if arg is not type(None)]
+        if len(inner) == 1:
+            convert = _converter(inner[0], is_lazy)
+            if convert is _identity:
+                return _identity
+            return lambda value: None if value is None else convert(value)
+        return _identity
+
+    if origin is list:
+        item = _converter(args[0]) if args else _identity
+        if item is _identity:
+            return _identity
+        if is_lazy:
+            return lambda value: LazyList(value, item)
+        return lambda value: [item(v) for v in value]
+
+    if dataclasses.is_dataclass(annotation):
+        return decoder(annotation)
+
+    if annotation is int:
+        return _to_int
+
+    return _identity
+
+
+_decoders: dict[type, Callable[[dict], Any]] = {}
+
+
+# Собирает (один раз на класс) функцию разбора словаря в dataclass без marshmallow-схем.
+# Лишние ключи игнорируются, как и с Undefined.EXCLUDE.
+def decoder(cls: type[T]) -> Callable[[dict], T]:
+    if cls in _decoders:
+        return _decoders[cls]
+
+    hints = typing.get_type_hints(cls)
+    namespace: dict[str, Any] = {"cls": cls, "OpacDecodeError": OpacDecodeError}
+    arguments = []
+
+    for field in dataclasses.fields(cls):
+        if not field.init:
+            continue
+
+        convert = _converter(hints[field.name], field.metadata.get("opac_lazy", False))
+        namespace[f"convert_{field.name}"] = convert
+        call = "{}" if convert is _identity else f"convert_{field.name}({{}})"
+
+        if field.default is not dataclasses.MISSING:
+            namespace[f"default_{field.name}"] = field.default
+            value = f'data.get("{field.name}", default_{field.name})'
+            arguments.append(f"{field.name}={call.format(value)}")
+        elif field.default_factory is not dataclasses.MISSING:
+            namespace[f"factory_{field.name}"] = field.default_factory
+            value = f'data["{field.name}"]'
+            arguments.append(f'{field.name}={call.format(value)} if "{field.name}" in data else factory_{field.name}()')
+        else:
+            value = f'data["{field.name}"]'
+            arguments.append(f"{field.name}={call.format(value)}")
+
+    source = "\n".join(
+        [
+            "def decode(data):",
+            "    try:",
+            f"        return cls({', '.join(arguments)})",
+            "    except (KeyError, TypeError, ValueError) as error:",
+            f'        raise OpacDecodeError(f"Invalid {cls.__name__}: {{error!r}}") from error',
+        ]
+    )
+    exec(source, namespace)  # pylint: disable=exec-used
+
+    _decoders[cls] = namespace["decode"]
+    return _decoders[cls]
+
+
+def decode(cls: type[T], data: dict) -> T:
+    return decoder(cls)(data)
+
+
+def decode_list(cls: type[T], data: list[dict]) -> list[T]:
+    convert = decoder(cls)
+    return [convert(item) for item in data]
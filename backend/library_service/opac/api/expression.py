@@ -0,0 +1,208 @@
+import re
+from dataclasses import dataclass
+
+OPERATORS = "+*^()"
+WHITESPACE = re.compile(r"\s+")
+
+
+# Разбивает поисковое выражение OPAC на операторы и термы; кавычки внутри терма сохраняются как есть
+def tokenize(expression: str) -> list[str]:
+    tokens: list[str] = []
+    term: list[str] = []
+    quoted = False
+
+    def flush():
+        text = WHITESPACE.sub(" ", "".join(term)).strip()
+        if text:
+            tokens.append(text)
+        term.clear()
+
+    for char in expression:
+        if char == '"':
+            quoted = not quoted
+            term.append(char)
+        elif char in OPERATORS and not quoted:
+            flush()
+            tokens.append(char)
+        else:
+            term.append(char)
+    flush()
+
+    return tokens
+
+
+def _matching_paren(tokens: list[str], start: int) -> int:
+    depth = 0
+    for i in range(start, len(tokens)):
+        if tokens[i] == "(":
+            depth += 1
+        elif tokens[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
+def _is_term(token: str) -> bool:
+    # Скобки вокруг (G)/(F) - это операторы, их не трогаем
+    return token not in OPERATORS and "=" in token
+
+
+# Приводит логически одинаковые выражения к одному виду: регистр, пробелы, лишние скобки
+def normalize_expression(expression: str) -> str:
+    tokens = tokenize(expression.upper())
+
+    changed = True
+    while changed:
+        changed = False
+
+        # (A=X) -> A=X
+        for i in range(len(tokens) - 2):
+            if tokens[i] == "(" and _is_term(tokens[i + 1]) and tokens[i + 2] == ")":
+                tokens[i : i + 3] = [tokens[i + 1]]
+                changed = True
+                break
+
+        # ((...)) -> (...)
+        for i in range(len(tokens) - 1):
+            if tokens[i] == "(" and tokens[i + 1] == "(":
+                inner = _matching_paren(tokens, i + 1)
+                if inner != -1 and _matching_paren(tokens, i) == inner + 1:
+                    del tokens[inner + 1], tokens[i]
+                    changed = True
+                    break
+
+        # (...) вокруг всего выражения -> ...
+        if len(tokens) > 2 and tokens[0] == "(" and _matching_paren(tokens, 0) == len(tokens) - 1:
+            tokens = tokens[1:-1]
+            changed = True
+
+    return "".join(tokens)
+
+
+class ExpressionSyntaxError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Term:
+    text: str
+
+
+# Цепочка одинаковых операторов: + (ИЛИ), * (И), ^ (И НЕ). * и ^ связывают сильнее +
+@dataclass(frozen=True)
+class Operation:
+    operator: str
+    items: tuple
+
+
+Node = Term | Operation
+
+# + и * не зависят от порядка операндов, ^ - зависит
+COMMUTATIVE = "+*"
+
+
+class _Parser:
+    # expression := chain ("+" chain)*
+    # chain := atom (("*" | "^") atom)*
+    # atom := TERM | "(" expression ")"
+    def __init__(self, tokens: list[str]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> str | None:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise ExpressionSyntaxError("Unexpected end of expression")
+        self.position += 1
+        return token
+
+    def parse(self) -> Node:
+        node = self.expression()
+        if self.peek() is not None:
+            raise ExpressionSyntaxError(f"Unexpected {self.peek()!r}")
+        return node
+
+    def expression(self) -> Node:
+        items = [self.chain()]
+        while self.peek() == "+":
+            self.take()
+            items.append(self.chain())
+        return items[0] if len(items) == 1 else Operation("+", tuple(items))
+
+    def chain(self) -> Node:
+        node = self.atom()
+        while self.peek() in ("*", "^"):
+            operator = self.take()
+            right = self.atom()
+            if isinstance(node, Operation) and node.operator == operator:
+                node = Operation(operator, (*node.items, right))
+            else:
+                node = Operation(operator, (node, right))
+        return node
+
+    def atom(self) -> Node:
+        token = self.take()
+        if token == "(":
+            node = self.expression()
+            if self.take() != ")":
+                raise ExpressionSyntaxError("Expected ')'")
+            return node
+        if not _is_term(token):
+            raise ExpressionSyntaxError(f"Unexpected {token!r}")
+        return Term(token)
+
+
+def parse(expression: str) -> Node:
+    return _Parser(tokenize(expression)).parse()
+
+
+def to_string(node: Node) -> str:
+    if isinstance(node, Term):
+        return node.text
+
+    # Скобки нужны вокруг + внутри * или ^ и вокруг не первого операнда цепочки * или ^ (они вычисляются слева направо)
+    def operand(index: int, item: Node) -> str:
+        text = to_string(item)
+        if isinstance(item, Operation) and (item.operator == "+" or node.operator != "+" and index > 0):
+            return f"({text})"
+        return text
+
+    return node.operator.join(operand(index, item) for index, item in enumerate(node.items))
+
+
+# Раскрывает вложенные одинаковые операции, убирает повторы и упорядочивает операнды + и *
+def normalize(node: Node) -> Node:
+    if isinstance(node, Term):
+        return node
+
+    items: list[Node] = []
+    for item in map(normalize, node.items):
+        if isinstance(item, Operation) and item.operator == node.operator and node.operator in COMMUTATIVE:
+            items.extend(item.items)
+        else:
+            items.append(item)
+
+    if node.operator in COMMUTATIVE:
+        items = sorted(set(items), key=to_string)
+
+    return items[0] if len(items) == 1 else Operation(node.operator, tuple(items))
+
+
+# Разбивает выражение с ИЛИ верхнего уровня на подзапросы, которые можно выполнить параллельно.
+# Ветвей не больше max_branches: лишние объединяются в группы. Выражение без ИЛИ возвращается как есть
+def plan_search(expression: str, max_branches: int) -> list[str]:
+    try:
+        node = normalize(parse(expression))
+    except ExpressionSyntaxError:
+        return [expression]
+
+    if not isinstance(node, Operation) or node.operator != "+" or max_branches < 2:
+        return [expression]
+
+    size = -(-len(node.items) // max_branches)
+    groups = [node.items[i : i + size] for i in range(0, len(node.items), size)]
+    return [to_string(group[0] if len(group) == 1 else Operation("+", group)) for group in groups]
@@ -3,6 +3,10 @@ from dataclasses_json import DataClassJsonMixin, config, Undefined, LetterCase
 from aiohttp import ClientSession
 from django.conf import settings
 
+from library_service.opac.api.decoding import decode
+from library_service.opac.resilience import guarded
+from library_service.opac.singleflight import coalesce
+
 
 @dataclass
 class AuthResponse(DataClassJsonMixin):
@@ -34,40 +38,46 @@ class UserInfo(DataClassJsonMixin):
     mail: str | None = None
 
 
+@guarded("login")
 async def login_reader(client: ClientSession, username: str, password: str) -> AuthResponse:
     payload = {"username": username, "password": password}
 
     r = await client.post(f"{settings.OPAC_HOSTNAME}/api/login/reader", json=payload)
     r.raise_for_status()
-    return AuthResponse.schema().load(await r.json())
+    return decode(AuthResponse, await r.json())
 
 
+@guarded("login")
 async def login_librarian(client: ClientSession, username: str, password: str) -> AuthResponse:
     payload = {"username": username, "password": password}
 
     r = await client.post(f"{settings.OPAC_HOSTNAME}/api/login/librarian", json=payload)
     r.raise_for_status()
-    return AuthResponse.schema().load(await r.json())
+    return decode(AuthResponse, await r.json())
 
 
+@guarded("login")
 async def login_admin(client: ClientSession, username: str, password: str) -> AuthResponse:
     payload = {"username": username, "password": password}
 
     r = await client.post(f"{settings.OPAC_HOSTNAME}/api/login/admin", json=payload)
     r.raise_for_status()
-    return AuthResponse.schema().load(await r.json())
+    return decode(AuthResponse, await r.json())
 
 
+@coalesce
+@guarded("login")
 async def get_login_info(client: ClientSession, access_token: str) -> UserInfo:
     headers = {"Authorization": f"Bearer {access_token}"}
 
     r = await client.get(f"{settings.OPAC_HOSTNAME}/api/readers/info", headers=headers)
     r.raise_for_status()
-    return UserInfo.schema().load(await r.json())
+    return decode(UserInfo, await r.json())
 
+@guarded("login")
 async def login_universal(client: ClientSession, username: str, password: str) -> AuthUniversalResponse:
     payload = {"username": username, "password": password}
 
     r = await client.post(f"{settings.OPAC_HOSTNAME}/api/login/universal", json=payload)
     r.raise_for_status()
-    return AuthUniversalResponse.schema().load(await r.json())
\ No newline at end of file
+    return decode(AuthUniversalResponse, await r.json())
\ No newline at end of file
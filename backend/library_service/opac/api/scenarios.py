@@ -3,6 +3,10 @@ from dataclasses_json import DataClassJsonMixin, config, Undefined
 from aiohttp import ClientSession
 from django.conf import settings
 
+from library_service.opac.api.decoding import decode_list
+from library_service.opac.resilience import guarded
+from library_service.opac.singleflight import coalesce
+
 
 @dataclass
 class OpacScenario(DataClassJsonMixin):
@@ -11,8 +15,10 @@ class OpacScenario(DataClassJsonMixin):
     description: str | None = None
 
 
+@coalesce
+@guarded("reference")
 async def opac_scenarios(client: ClientSession, database: str) -> list[OpacScenario]:
     r = await client.get(f"{settings.OPAC_HOSTNAME}/api/scenarios/{database}")
     r.raise_for_status()
 
-    return OpacScenario.schema().load(await r.json(), many=True)
+    return decode_list(OpacScenario, await r.json())
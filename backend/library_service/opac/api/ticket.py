@@ -3,6 +3,10 @@ from dataclasses_json import DataClassJsonMixin, config, Undefined
 from aiohttp import ClientSession
 from django.conf import settings
 
+from library_service.opac.api.decoding import decode, decode_list
+from library_service.opac.resilience import guarded
+from library_service.opac.singleflight import coalesce
+
 headers = {"X-ISTU-Request": settings.OPAC_INTERNAL_TOKEN}
 
 
@@ -39,22 +43,28 @@ class OpacLoan(DataClassJsonMixin):
     description: str | None = None
 
 
+@coalesce
+@guarded("readers")
 async def opac_reader_info_by_mira(client: ClientSession, mira_id) -> OpacReader:
     r = await client.get(f"{settings.OPAC_HOSTNAME}/api/readers/mira/internal/{mira_id}", headers=headers)
     r.raise_for_status()
 
-    return OpacReader.schema().load(await r.json())
+    return decode(OpacReader, await r.json())
 
 
+@coalesce
+@guarded("readers")
 async def opac_reader_info_by_ticket(client: ClientSession, ticket_id) -> OpacReader:
     r = await client.get(f"{settings.OPAC_HOSTNAME}/api/readers/internal/{ticket_id}", headers=headers)
     r.raise_for_status()
 
-    return OpacReader.schema().load(await r.json())
+    return decode(OpacReader, await r.json())
 
 
+@coalesce
+@guarded("readers")
 async def opac_reader_loans(client: ClientSession, ticket_id) -> list[OpacLoan]:
     r = await client.get(f"{settings.OPAC_HOSTNAME}/api/readers/loans/internal/{ticket_id}", headers=headers)
     r.raise_for_status()
 
-    return OpacLoan.schema().load(await r.json(), many=True)
+    return decode_list(OpacLoan, await r.json())
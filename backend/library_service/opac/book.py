@@ -1,22 +1,71 @@
-from dataclasses import dataclass
-from typing import Iterable
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from typing import AsyncIterator, Iterable
 
 import asyncio
-from aiohttp import ClientSession
+import heapq
+import re
+from aiohttp import ClientError, ClientSession
 from django.conf import settings
 
 from library_service.opac.api.announces import opac_announces_list
-from library_service.models.catalog import Library, LibraryDatabase
-from library_service.opac.api.book import OpacBook, opac_book_retrieve, opac_search, opac_book_retrieve_by_id
+from library_service.models.catalog import Library
+from library_service.opac.api.book import (
+    OpacBook,
+    opac_book_retrieve,
+    opac_book_retrieve_by_id,
+    opac_records_retrieve,
+    opac_search,
+)
+from library_service.opac.api.expression import normalize_expression, plan_search
+from library_service.opac.cache import TTLCache
+from library_service.opac.mirror import mirror_search
+from library_service.opac.resilience import OpacUnavailableError
+from library_service.opac.suggest import suggest_index
+from library_service.opac.topology import aget_topology
 
+# Кэш записей OPAC по ключу (database, mfn)
+record_cache: TTLCache[tuple[str, str], OpacBook] = TTLCache(
+    ttl=settings.OPAC_RECORD_CACHE["TTL"],
+    max_bytes=settings.OPAC_RECORD_CACHE["MAX_BYTES"],
+)
 
-@dataclass
+# Кэш результатов поиска по ключу (database, нормализованное выражение)
+search_cache: TTLCache[tuple[str, str], list[OpacBook]] = TTLCache(
+    ttl=settings.OPAC_SEARCH_CACHE["TTL"],
+    max_bytes=settings.OPAC_SEARCH_CACHE["MAX_BYTES"],
+    group=lambda key: key[0],
+)
+
+# Обложки отдаются через наш кэш (library_service.covers, маршрут "cover" в app.urls), а не напрямую из OPAC.
+# Префикс берется из FORCE_SCRIPT_NAME, а не из reverse(): книги строятся и вне запросов (фоновые обновления),
+# где префикс скрипта не установлен, и кэшируются между запросами
+COVER_URL_PREFIX = f"{(settings.FORCE_SCRIPT_NAME or '').rstrip('/')}/api/cover/"
+
+# Кэш объединенной выдачи по ключу (нормализованное выражение, библиотека) для постраничной отдачи
+result_cache: TTLCache[tuple[str, int | None], list["Book"]] = TTLCache(
+    ttl=settings.OPAC_RESULT_CACHE["TTL"],
+    max_bytes=settings.OPAC_RESULT_CACHE["MAX_BYTES"],
+)
+
+
+@dataclass(frozen=True, slots=True)
 class BookLink:
     url: str
     description: str | None
 
 
-@dataclass
+# Где есть книга: после объединения выдач одна запись может быть в нескольких библиотеках
+@dataclass(frozen=True, slots=True)
+class BookHolding:
+    library: int
+    id: str
+    copies: int
+    can_be_ordered: bool
+
+
+# Неизменяемая запись каталога. Списковые поля - те же списки, что в OpacBook, без копирования
+@dataclass(frozen=True, slots=True, kw_only=True)
 class Book:
     id: str
     library: int
@@ -24,7 +73,7 @@ class Book:
     year: int
     copies: int
     can_be_ordered: bool
-    links: list[BookLink]
+    links: tuple[BookLink, ...]
     # pylint: disable=duplicate-code
     author: list[str]
     collective: list[str]
@@ -40,30 +89,39 @@ class Book:
     cover: str | None
     brief: str | None
     created: str | None
+    holdings: tuple[BookHolding, ...]
 
-    def __init__(self, book: OpacBook, library: int):
-        self.id = book.id.replace("/", "_")
-        self.library = library
-        self.description = book.description
-        self.year = book.year
-        self.copies = len(book.exemplars)
-        self.can_be_ordered = book.order
-        self.links = [BookLink(link.url, link.description) for link in (book.links or [])]
-        self.author = book.info.author
-        self.collective = book.info.collective
-        self.title = book.info.title
-        self.isbn = book.info.isbn
-        self.language = book.info.language
-        self.country = book.info.country
-        self.city = book.info.city
-        self.publisher = book.info.publisher
-        self.subject = book.info.subject
-        self.keyword = book.info.keyword
-        self.cover = (
-            settings.OPAC_HOSTNAME.removesuffix("/opac") + book.cover if book.cover else None
-        )  # TODO: по идее, лучше проксировать
-        self.brief = book.brief
-        self.created = book.created
+    @classmethod
+    def from_opac(cls, book: OpacBook, library: int) -> "Book":
+        info = book.info
+        book_id = book.id.replace("/", "_")
+        copies = len(book.exemplars)
+        return cls(
+            id=book_id,
+            library=library,
+            description=book.description,
+            year=book.year,
+            copies=copies,
+            can_be_ordered=book.order,
+            links=tuple(BookLink(link.url, link.description) for link in book.links) if book.links else (),
+            author=info.author,
+            collective=info.collective,
+            title=info.title,
+            isbn=info.isbn,
+            language=info.language,
+            country=info.country,
+            city=info.city,
+            publisher=info.publisher,
+            subject=info.subject,
+            keyword=info.keyword,
+            cover=f"{COVER_URL_PREFIX}{book_id}/" if book.cover else None,
+            brief=book.brief,
+            created=book.created,
+            holdings=(BookHolding(library, book_id, copies, book.order),),
+        )
+
+    def with_holdings(self, holdings: tuple[BookHolding, ...]) -> "Book":
+        return replace(self, holdings=holdings)
 
 
 # Obtain database name and mfn id
@@ -71,29 +129,239 @@ def split_book_id(book_id: str) -> tuple[str, str]:
     return book_id.split("_")
 
 
-async def books_list(client: ClientSession, libraries: Iterable[Library], expression: str) -> list[Book]:
+def record_key(book_id: str) -> tuple[str, str]:
+    database, mfn = split_book_id(book_id.replace("/", "_"))
+    return database, mfn
+
+
+def invalidate_book(book_id: str) -> bool:
+    return record_cache.invalidate(record_key(book_id))
+
+
+def invalidate_database(database: str) -> int:
+    return record_cache.invalidate_where(lambda key: key[0] == database)
+
+
+async def record_retrieve(client: ClientSession, database: str, mfn: str) -> OpacBook:
+    key = (database, str(mfn))
+    book = record_cache.get(key)
+    if book is None:
+        book = await opac_book_retrieve(client, database, mfn)
+        record_cache.set(key, book)
+    return book
+
+
+# Загружает недостающие в кэше записи одной БД: сначала пачками через поиск по MFN, остальное поштучно
+async def records_retrieve(client: ClientSession, database: str, mfns: list[str]) -> dict[tuple[str, str], OpacBook]:
+    records = {}
+    for mfn, book in (await opac_records_retrieve(client, database, mfns)).items():
+        records[(database, mfn)] = book
+        record_cache.set((database, mfn), book)
+    return records
+
+
+# Как book_retrieve_safe, но для списка id: результат в порядке входных id, None для ненайденных книг
+async def book_retrieve_many(client: ClientSession, book_ids: Iterable[str]) -> list[Book | None]:
+    book_ids = list(book_ids)
+
+    keys: dict[str, tuple[str, str]] = {}
+    for book_id in book_ids:
+        try:
+            keys[book_id] = record_key(book_id)
+        except ValueError:
+            pass
+
+    topology = await aget_topology()
+
+    records: dict[tuple[str, str], OpacBook] = {}
+    missing: dict[str, list[str]] = defaultdict(list)
+    for key in set(keys.values()):
+        if not topology.has_database(key[0]):
+            continue
+        record = record_cache.get(key)
+        if record is None:
+            missing[key[0]].append(key[1])
+        else:
+            records[key] = record
+
+    groups = await asyncio.gather(*[records_retrieve(client, database, mfns) for database, mfns in missing.items()])
+    for group in groups:
+        records.update(group)
+
+    result: list[Book | None] = []
+    for book_id in book_ids:
+        key = keys.get(book_id)
+        record = records.get(key) if key is not None else None
+        result.append(Book.from_opac(record, topology.library_of(key[0])) if record is not None else None)
+    return result
+
+
+WORDS = re.compile(r"\w+")
+ISBN_NOISE = re.compile(r"[^0-9X]")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(WORDS.findall(text.casefold()))
+
+
+# Признаки, по которым записи из разных БД считаются одной книгой: любой общий ISBN или название + первый автор + год
+def duplicate_keys(book: Book) -> list[tuple]:
+    keys: list[tuple] = [("isbn", isbn) for isbn in {ISBN_NOISE.sub("", isbn.upper()) for isbn in book.isbn} if isbn]
+    if book.title:
+        creator = (book.author or book.collective or [""])[0]
+        keys.append(("title", _normalize(book.title[0]), _normalize(creator), book.year))
+    return keys
+
+
+# Объединяет выдачи БД (в порядке топологии) за один проход.
+# k-путевое слияние по месту в выдаче своей БД (OPAC сортирует по релевантности), при равном месте - по порядку БД,
+# поэтому лучшие совпадения каждой БД оказываются в начале. Дубликаты сворачиваются в первую (лучшую) запись,
+# их наличие добавляется в ее holdings. Сворачиваются только записи из разных БД: разные записи одной БД с общим
+# признаком (тома, части, переиздания) - разные книги. Та же запись (БД в нескольких библиотеках) сворачивается
+def merge_results(results: list[list[Book]]) -> list[Book]:
+    ranked = heapq.merge(
+        *([(rank, order, book) for rank, book in enumerate(books)] for order, books in enumerate(results)),
+        key=lambda item: item[:2],
+    )
+
+    merged: list[Book] = []
+    holdings: list[tuple[BookHolding, ...]] = []
+    # Для каждой объединенной записи - какая запись из какой БД в нее вошла
+    records: list[dict[str, str]] = []
+    seen: dict[tuple, list[int]] = defaultdict(list)
+    for _, _, book in ranked:
+        database = split_book_id(book.id)[0]
+        keys = duplicate_keys(book)
+        primary = next(
+            (index for key in keys for index in seen.get(key, ()) if records[index].get(database, book.id) == book.id),
+            None,
+        )
+        if primary is None:
+            primary = len(merged)
+            merged.append(book)
+            holdings.append(book.holdings)
+            records.append({database: book.id})
+        else:
+            holdings[primary] += book.holdings
+            records[primary][database] = book.id
+
+        for key in keys:
+            if primary not in seen[key]:
+                seen[key].append(primary)
+
+    # Записи с дубликатами заменяются копиями с общим holdings; исходные Book не меняются
+    return [book if book.holdings is own else book.with_holdings(own) for book, own in zip(merged, holdings)]
+
+
+# Наличие экземпляров меняется чаще, чем обновляется зеркало: для первых записей выдачи оно берется из OPAC.
+# Если OPAC недоступен, остаются данные зеркала
+async def live_availability(client: ClientSession, database: str, books: list[OpacBook]) -> list[OpacBook]:
+    head = books[: settings.CATALOG_MIRROR["LIVE_AVAILABILITY"]]
+    keys = [record_key(book.id) for book in head]
+
+    live = {}
+    for key in keys:
+        record = record_cache.get(key)
+        if record is not None:
+            live[key] = record
+
+    missing = [mfn for _, mfn in keys if (database, mfn) not in live]
+    if missing:
+        try:
+            live.update(await records_retrieve(client, database, missing))
+        except (ClientError, OpacUnavailableError):
+            pass
+
+    return [live.get(key, book) for key, book in zip(keys, head)] + books[len(head) :]
+
+
+# Выражение с ИЛИ верхнего уровня выполняется как несколько параллельных подзапросов, каждый со своим кэшем:
+# повторный поиск с частично совпадающими ветвями не идет в OPAC за уже известными.
+# С CATALOG_SEARCH_BACKEND = "mirror" поиск идет по локальному зеркалу, если оно может ответить
+async def search_retrieve(client: ClientSession, database: str, expression: str, split: bool = True) -> list[OpacBook]:
+    # Нормализованное выражение - только ключ кэша (и запрос к зеркалу); в OPAC уходит то, что ввел пользователь
+    normalized = normalize_expression(expression)
+    key = (database, normalized)
+    result = search_cache.get(key)
+    if result is not None:
+        return result
+
+    if settings.CATALOG_SEARCH_BACKEND == "mirror":
+        result = await mirror_search(database, normalized)
+        if result is not None:
+            suggest_index.add_records(result)
+            result = await live_availability(client, database, result)
+            search_cache.set(key, result)
+            return result
+
+    planner = settings.OPAC_SEARCH_PLANNER
+    branches = plan_search(expression, planner["MAX_BRANCHES"]) if split and planner["ENABLED"] else [expression]
+    if len(branches) == 1:
+        result = await opac_search(client, database, expression)
+        # В подсказки идут только свежие выдачи, повторный поиск из кэша не завышает счетчики
+        suggest_index.add_records(result)
+    else:
+        results = await asyncio.gather(*(search_retrieve(client, database, branch, False) for branch in branches))
+        # Ветви объединяются в порядке MFN, как OPAC отвечает на целый запрос: merge_results берет позицию за ранг
+        unique = {book.id: book for books in results for book in books}
+        result = sorted(unique.values(), key=lambda book: int(record_key(book.id)[1]))
+
+    search_cache.set(key, result)
+    return result
+
+
+async def books_list(client: ClientSession, expression: str, library: int | None = None) -> list[Book]:
     tasks = []
-    async for library in libraries:
-        databases: Iterable[LibraryDatabase] = library.databases.all()
-        async for db in databases:
+    for library_id, database in (await aget_topology()).databases(library):
 
-            async def task(library=library, db=db) -> list[Book]:
-                search_result = await opac_search(client, db.database, expression)
-                return [Book(book, library.id) for book in search_result]
+        async def task(library_id=library_id, database=database) -> list[Book]:
+            search_result = await search_retrieve(client, database, expression)
+            return [Book.from_opac(book, library_id) for book in search_result]
 
-            tasks.append(task())
+        tasks.append(task())
 
     result: list[list[Book]] = await asyncio.gather(*tasks)
-    return [book for book_list in result for book in book_list]
+    return merge_results(result)
+
+
+# Выдача books_list, сохраненная для следующих страниц; cached=True - взять сохраненную, если она еще есть
+async def books_result(
+    client: ClientSession, expression: str, library: int | None = None, cached: bool = False
+) -> list[Book]:
+    key = (normalize_expression(expression), library)
+    result = result_cache.get(key) if cached else None
+    if result is None:
+        result = await books_list(client, expression, library)
+        result_cache.set(key, result)
+    return result
+
+
+# Как books_list, но отдает выдачу каждой БД сразу по готовности: (библиотека, БД, книги или ошибка)
+async def books_list_iter(
+    client: ClientSession, expression: str, library: int | None = None
+) -> AsyncIterator[tuple[int, str, list[Book] | Exception]]:
+    async def task(library_id: int, database: str) -> tuple[int, str, list[Book] | Exception]:
+        try:
+            search_result = await search_retrieve(client, database, expression)
+            return library_id, database, [Book.from_opac(book, library_id) for book in search_result]
+        except (ClientError, OpacUnavailableError) as error:
+            return library_id, database, error
+
+    tasks = [asyncio.ensure_future(task(*pair)) for pair in (await aget_topology()).databases(library)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Клиент мог отключиться, не дождавшись остальных БД
+        for pending in tasks:
+            pending.cancel()
 
 
 async def books_announces_list(client: ClientSession) -> list[Book]:
     announces = await opac_announces_list(client)
-    
+
     # NOTE: тут вылетит исключение, если не зарегистрирована БД ISTU
-    istu_library = (
-        await LibraryDatabase.objects.filter(database="ISTU").prefetch_related("library").afirst()
-    ).library  # По идее, все анонсы отсылают на ISTU
+    istu_library = (await aget_topology()).library_of("ISTU")  # По идее, все анонсы отсылают на ISTU
 
     tasks = []
     for announce in announces:
@@ -102,7 +370,7 @@ async def books_announces_list(client: ClientSession) -> list[Book]:
             # TODO: привести это в порядок
             expresssion = announce.link.removeprefix("/opac/index.html?db=ISTU&expression=")  # Спс за такой удобный апи
             book = (await opac_search(client, "ISTU", expresssion))[0]
-            return Book(book, istu_library.id)
+            return Book.from_opac(book, istu_library)
 
         tasks.append(task())
 
@@ -111,16 +379,16 @@ async def books_announces_list(client: ClientSession) -> list[Book]:
 
 async def book_retrieve(client: ClientSession, book_id: str) -> Book:
     database, mfn = split_book_id(book_id)
-    library = (await LibraryDatabase.objects.filter(database=database).prefetch_related("library").afirst()).library
-    book = await opac_book_retrieve(client, database, mfn)
+    library = (await aget_topology()).library_of(database)
+    book = await record_retrieve(client, database, mfn)
 
-    return Book(book, library.id)
+    return Book.from_opac(book, library)
 
 
 async def book_retrieve_safe(client: ClientSession, book_id: str, library: Library | None = None) -> Book | None:
     try:
         database, _ = split_book_id(book_id)
-        if library is not None and not await library.databases.filter(database=database).aexists():
+        if library is not None and not (await aget_topology()).has_database(database, library.id):
             return None
 
         return await book_retrieve(client, book_id)
@@ -129,7 +397,8 @@ async def book_retrieve_safe(client: ClientSession, book_id: str, library: Libra
 
 
 async def book_retrieve_by_id(client: ClientSession, database: str, book_id: str) -> Book:
-    library = (await LibraryDatabase.objects.filter(database=database).prefetch_related("library").afirst()).library
+    library = (await aget_topology()).library_of(database)
     book = await opac_book_retrieve_by_id(client, database, book_id)
+    record_cache.set(record_key(book.id), book)
 
-    return Book(book, library.id)
+    return Book.from_opac(book, library)
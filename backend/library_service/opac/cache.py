@@ -0,0 +1,152 @@
+import sys
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field, fields, is_dataclass
+from threading import Lock
+from typing import Any, Callable, Generic, Hashable, TypeVar
+
+from library_service.opac.api.decoding import LazyList
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+MISSING = object()
+
+
+def estimate_size(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, LazyList):
+        return size + estimate_size(value.peek())
+    if isinstance(value, dict):
+        return size + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(item) for item in value)
+    if is_dataclass(value):
+        return size + sum(estimate_size(getattr(value, f.name, None)) for f in fields(value))
+    return size
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    hits_by_group: Counter = field(default_factory=Counter)
+    misses_by_group: Counter = field(default_factory=Counter)
+
+
+# LRU-кэш с временем жизни записей и ограничением на суммарный размер в байтах.
+# Методы не содержат await, поэтому безопасны для asyncio; Lock нужен для потоков sync_to_async.
+# group - необязательная функция ключа, по которой попадания/промахи дополнительно считаются по группам
+class TTLCache(Generic[K, V]):
+    def __init__(
+        self,
+        ttl: float,
+        max_bytes: int,
+        sizeof: Callable[[Any], int] = estimate_size,
+        clock: Callable[[], float] = time.monotonic,
+        group: Callable[[K], str] | None = None,
+    ):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.clock = clock
+        self.group = group
+        self.counters = CacheStats()
+        self.current_bytes = 0
+        self._entries: OrderedDict[K, tuple[V, float, int]] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, MISSING, count=False) is not MISSING
+
+    def get(self, key: K, default=None, count: bool = True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= self.clock():
+                self._remove(key)
+                self.counters.expirations += 1
+                entry = None
+
+            if count:
+                self._count(key, hit=entry is not None)
+            if entry is None:
+                return default
+
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: K, value: V, ttl: float | None = None):
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, self.clock() + (self.ttl if ttl is None else ttl), size)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.counters.evictions += 1
+
+    def invalidate(self, key: K) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            self.counters.invalidations += 1
+            return True
+
+    def invalidate_where(self, predicate: Callable[[K], bool]) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            self.counters.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        stats = {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.counters.hits,
+            "misses": self.counters.misses,
+            "evictions": self.counters.evictions,
+            "expirations": self.counters.expirations,
+            "invalidations": self.counters.invalidations,
+        }
+        if self.group is not None:
+            stats["hits_by_group"] = dict(self.counters.hits_by_group)
+            stats["misses_by_group"] = dict(self.counters.misses_by_group)
+        return stats
+
+    def _count(self, key: K, hit: bool):
+        if hit:
+            self.counters.hits += 1
+        else:
+            self.counters.misses += 1
+
+        if self.group is not None:
+            (self.counters.hits_by_group if hit else self.counters.misses_by_group)[self.group(key)] += 1
+
+    def _remove(self, key: K):
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
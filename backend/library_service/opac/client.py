@@ -0,0 +1,130 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from typing import AsyncIterator
+
+from aiohttp import ClientSession, TCPConnector, TraceConfig
+from django.conf import settings
+
+
+# Один долгоживущий пул соединений с OPAC на воркер (открывается/закрывается через ASGI lifespan)
+@dataclass
+class PoolCounters:
+    requests: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    connections_queued: int = 0
+
+
+counters = PoolCounters()
+
+_session: ClientSession | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_client_settings() -> dict:
+    return {
+        "LIMIT": 100,
+        "LIMIT_PER_HOST": 32,
+        "DNS_CACHE_TTL": 300,
+        "KEEPALIVE_TIMEOUT": 30,
+        **getattr(settings, "OPAC_CLIENT", {}),
+    }
+
+
+def _trace_config() -> TraceConfig:
+    async def on_request_end(*_):
+        counters.requests += 1
+
+    async def on_connection_create_end(*_):
+        counters.connections_created += 1
+
+    async def on_connection_reuseconn(*_):
+        counters.connections_reused += 1
+
+    async def on_connection_queued_start(*_):
+        counters.connections_queued += 1
+
+    trace_config = TraceConfig()
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace_config.on_connection_queued_start.append(on_connection_queued_start)
+    return trace_config
+
+
+def create_client_session() -> ClientSession:
+    client_settings = get_client_settings()
+    connector = TCPConnector(
+        limit=client_settings["LIMIT"],
+        limit_per_host=client_settings["LIMIT_PER_HOST"],
+        ttl_dns_cache=client_settings["DNS_CACHE_TTL"],
+        use_dns_cache=True,
+        keepalive_timeout=client_settings["KEEPALIVE_TIMEOUT"],
+    )
+    return ClientSession(connector=connector, trace_configs=[_trace_config()])
+
+
+def get_client_session() -> ClientSession | None:
+    if _session is None or _session.closed:
+        return None
+
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+    # Сессия привязана к циклу событий, в котором была создана
+    return _session if running_loop is _loop else None
+
+
+async def open_client_session():
+    global _session, _loop  # pylint: disable=global-statement
+
+    if get_client_session() is None:
+        _session = create_client_session()
+        _loop = asyncio.get_running_loop()
+
+
+async def close_client_session():
+    global _session, _loop  # pylint: disable=global-statement
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _loop = None
+
+
+@asynccontextmanager
+async def opac_client_session() -> AsyncIterator[ClientSession]:
+    session = get_client_session()
+    if session is not None:
+        yield session
+        return
+
+    # Нет общего пула (например, runserver или тесты без lifespan) - работаем по-старому, сессией на запрос
+    async with ClientSession() as client:
+        yield client
+
+
+def pool_stats() -> dict:
+    client_settings = get_client_settings()
+    stats = {
+        "active": False,
+        "limit": client_settings["LIMIT"],
+        "limit_per_host": client_settings["LIMIT_PER_HOST"],
+        "dns_cache_ttl": client_settings["DNS_CACHE_TTL"],
+        **asdict(counters),
+    }
+
+    if _session is None or _session.closed:
+        return stats
+
+    connector: TCPConnector = _session.connector
+    # pylint: disable=protected-access
+    stats["active"] = True
+    stats["acquired"] = len(connector._acquired)
+    stats["idle"] = sum(len(connections) for connections in connector._conns.values())
+    stats["idle_per_host"] = {f"{key.host}:{key.port}": len(value) for key, value in connector._conns.items()}
+    # pylint: enable=protected-access
+    return stats
@@ -0,0 +1,53 @@
+from collections import Counter
+from typing import Callable, Iterable
+
+from library_service.opac.book import Book
+
+# Поля книги, по которым считаются фасеты и можно уточнять выдачу
+FACETS: dict[str, Callable[[Book], Iterable]] = {
+    "year": lambda book: (book.year,) if book.year else (),
+    "language": lambda book: book.language,
+    "author": lambda book: book.author,
+    "publisher": lambda book: book.publisher,
+    "subject": lambda book: book.subject,
+}
+
+
+def parse_facets(value: str | None) -> list[str]:
+    if value is None:
+        return []
+    names = [name for name in value.split(",") if name]
+    return [name for name in FACETS if not names or name in names]
+
+
+def parse_filters(query_params) -> dict[str, set[str]]:
+    return {name: set(values) for name in FACETS if (values := query_params.getlist(name))}
+
+
+def filters_key(filters: dict[str, set[str]]) -> list:
+    return [[name, sorted(values)] for name, values in sorted(filters.items())]
+
+
+# Несколько значений одного фасета - ИЛИ, разные фасеты - И
+def filter_books(books: list[Book], filters: dict[str, set[str]]) -> list[Book]:
+    if not filters:
+        return books
+    checks = [(FACETS[name], values) for name, values in filters.items()]
+    return [book for book in books if all(values.intersection(map(str, get(book))) for get, values in checks)]
+
+
+# Счетчики значений за один проход по выдаче. Год отдается гистограммой по возрастанию,
+# остальные фасеты - limit самых частых значений
+def aggregate_facets(books: list[Book], names: list[str], limit: int) -> dict[str, list[dict]]:
+    counters = {name: Counter() for name in names}
+    getters = [(FACETS[name], counters[name]) for name in names]
+
+    for book in books:
+        for get, counter in getters:
+            counter.update(set(get(book)))
+
+    result = {}
+    for name, counter in counters.items():
+        values = sorted(counter.items()) if name == "year" else counter.most_common(limit)
+        result[name] = [{"value": value, "count": count} for value, count in values]
+    return result
@@ -0,0 +1,73 @@
+import asyncio
+
+from aiohttp import ClientError, ClientSession
+from django.conf import settings
+
+from library_service.models.catalog import LoanRecord
+from library_service.opac.api.ticket import OpacLoan
+from library_service.opac.book import book_retrieve_by_id
+from library_service.opac.cache import TTLCache
+from library_service.opac.topology import UnknownDatabaseError
+
+# Соответствие (БД, запись OPAC) -> id книги не меняется, но в памяти держится ограниченно:
+# вытесненное снова находится в LoanRecord
+loan_cache: TTLCache[tuple[str, str], str] = TTLCache(
+    ttl=settings.OPAC_LOAN_RESOLVER["CACHE_TTL"],
+    max_bytes=settings.OPAC_LOAN_RESOLVER["CACHE_MAX_BYTES"],
+)
+
+
+def loan_key(loan: OpacLoan) -> tuple[str, str]:
+    return loan.db, loan.book
+
+
+async def _load_known(keys: set[tuple[str, str]]) -> dict[tuple[str, str], str]:
+    records = LoanRecord.objects.filter(record__in={record for _, record in keys}).values_list(
+        "database", "record", "book_id"
+    )
+    return {(database, record): book_id async for database, record, book_id in records if (database, record) in keys}
+
+
+# Находит id книг для выдач читателя: сначала в памяти, затем в БД, оставшиеся - параллельно в OPAC.
+# Выдачи, запись которых OPAC не вернул, в результат не попадают
+async def resolve_loans(client: ClientSession, loans: list[OpacLoan]) -> dict[tuple[str, str], str]:
+    keys = {loan_key(loan) for loan in loans}
+    resolved = {}
+    for key in keys:
+        book_id = loan_cache.get(key)
+        if book_id is not None:
+            resolved[key] = book_id
+
+    missing = keys - resolved.keys()
+    if missing:
+        known = await _load_known(missing)
+        resolved.update(known)
+        missing -= known.keys()
+
+    if missing:
+        semaphore = asyncio.Semaphore(settings.OPAC_LOAN_RESOLVER["CONCURRENCY"])
+
+        async def resolve(key: tuple[str, str]) -> str | None:
+            async with semaphore:
+                try:
+                    return (await book_retrieve_by_id(client, *key)).id
+                except (ClientError, UnknownDatabaseError):
+                    return None
+
+        ordered = list(missing)
+        fetched = {
+            key: book_id for key, book_id in zip(ordered, await asyncio.gather(*map(resolve, ordered))) if book_id
+        }
+
+        await LoanRecord.objects.abulk_create(
+            [
+                LoanRecord(database=database, record=record, book_id=book_id)
+                for (database, record), book_id in fetched.items()
+            ],
+            ignore_conflicts=True,
+        )
+        resolved.update(fetched)
+
+    for key, book_id in resolved.items():
+        loan_cache.set(key, book_id)
+    return resolved
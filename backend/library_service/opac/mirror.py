@@ -0,0 +1,243 @@
+import re
+from dataclasses import dataclass
+from typing import Callable
+
+from aiohttp import ClientSession
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from library_service.models.catalog import MirrorRecord, MirrorWatermark
+from library_service.opac.api.book import OpacBook, opac_records_retrieve
+from library_service.opac.api.decoding import decode
+from library_service.opac.api.expression import ExpressionSyntaxError, Node, Operation, parse
+from library_service.opac.topology import aget_topology
+
+FIELDS = ("author", "title", "subject", "keyword")
+# Веса полей в tsvector
+WEIGHTS = dict(zip(FIELDS, "ABCD"))
+# Таблицы полнотекстового индекса и его столбцы создаются миграцией 0033_mirror
+TABLE = "library_service_mirrorrecord"
+FTS_TABLE = f"{TABLE}_fts"
+
+WORDS = re.compile(r"\w+")
+
+
+class UnsupportedExpressionError(ValueError):
+    pass
+
+
+def record_fields(book: OpacBook) -> dict[str, list[str]]:
+    return {
+        "author": book.info.author + book.info.collective,
+        "title": book.info.title,
+        "subject": book.info.subject,
+        "keyword": book.info.keyword,
+    }
+
+
+def _normalize(value: str) -> str:
+    return " ".join(value.upper().split())
+
+
+# Терм выражения OPAC: "A=ТОЛСТОЙ$" - поле author, значение начинается с "ТОЛСТОЙ"
+@dataclass(frozen=True)
+class MirrorTerm:
+    field: str
+    value: str
+    truncated: bool
+
+    def matches(self, fields: dict[str, list[str]]) -> bool:
+        if self.truncated:
+            return any(_normalize(value).startswith(self.value) for value in fields[self.field])
+        return any(_normalize(value) == self.value for value in fields[self.field])
+
+
+def _term(text: str) -> MirrorTerm:
+    scenario, _, value = text.strip('"').partition("=")
+    field = settings.CATALOG_MIRROR["SCENARIOS"].get(f"{scenario}=")
+    if field is None:
+        raise UnsupportedExpressionError(f"Unsupported scenario {scenario}=")
+
+    truncated = value.endswith("$")
+    return MirrorTerm(field, _normalize(value[:-1] if truncated else value), truncated)
+
+
+# Проверка записи по выражению с той же семантикой, что и у OPAC: термы сравниваются с целыми значениями полей
+def compile_matcher(node: Node) -> Callable[[dict[str, list[str]]], bool]:
+    if not isinstance(node, Operation):
+        return _term(node.text).matches
+
+    matchers = [compile_matcher(item) for item in node.items]
+    if node.operator == "+":
+        return lambda fields: any(match(fields) for match in matchers)
+    if node.operator == "*":
+        return lambda fields: all(match(fields) for match in matchers)
+    first, rest = matchers[0], matchers[1:]
+    return lambda fields: first(fields) and not any(match(fields) for match in rest)
+
+
+# Запрос к полнотекстовому индексу отбирает кандидатов (надмножество ответа), точную проверку делает compile_matcher.
+# None - индекс не сужает выборку (например, "T=$")
+def fts5_query(node: Node) -> str | None:
+    if not isinstance(node, Operation):
+        term = _term(node.text)
+        words = WORDS.findall(term.value.lower())
+        if not words:
+            return None
+        return f'{term.field} : "{" ".join(words)}"' + (" *" if term.truncated else "")
+
+    if node.operator == "^":
+        return fts5_query(node.items[0])
+
+    parts = [fts5_query(item) for item in node.items]
+    if node.operator == "+":
+        return None if None in parts else "(" + " OR ".join(parts) + ")"
+    parts = [part for part in parts if part is not None]
+    return "(" + " AND ".join(parts) + ")" if parts else None
+
+
+def tsquery(node: Node) -> str | None:
+    if not isinstance(node, Operation):
+        term = _term(node.text)
+        words = WORDS.findall(term.value.lower())
+        if not words:
+            return None
+        weight = WEIGHTS[term.field]
+        lexemes = [f"{word}:{weight}" for word in words[:-1]]
+        lexemes.append(f"{words[-1]}:{'*' if term.truncated else ''}{weight}")
+        return "(" + " <-> ".join(lexemes) + ")"
+
+    if node.operator == "^":
+        return tsquery(node.items[0])
+
+    parts = [tsquery(item) for item in node.items]
+    if node.operator == "+":
+        return None if None in parts else "(" + " | ".join(parts) + ")"
+    parts = [part for part in parts if part is not None]
+    return "(" + " & ".join(parts) + ")" if parts else None
+
+
+def _candidates(database: str, node: Node):
+    records = MirrorRecord.objects.filter(database=database)
+
+    if connection.vendor == "sqlite":
+        query = fts5_query(node)
+        if query is not None:
+            records = records.filter(
+                id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [query])
+            )
+    elif connection.vendor == "postgresql":
+        query = tsquery(node)
+        if query is not None:
+            records = records.filter(
+                id__in=RawSQL(
+                    f"SELECT id FROM {TABLE} WHERE search_vector @@ to_tsquery('simple', %s)",
+                    [query],
+                )
+            )
+
+    return records.order_by("mfn").values_list("record", flat=True)
+
+
+# Поиск по зеркалу в порядке MFN, как отвечает OPAC. None - зеркало не может ответить:
+# БД еще не загружена или в выражении есть сценарии, которых нет в зеркале (например, поиск по экземплярам)
+async def mirror_search(database: str, expression: str) -> list[OpacBook] | None:
+    try:
+        node = parse(expression)
+        match = compile_matcher(node)
+    except (ExpressionSyntaxError, UnsupportedExpressionError):
+        return None
+
+    if not await MirrorWatermark.objects.filter(database=database, harvested_at__isnull=False).aexists():
+        return None
+
+    books = []
+    async for record in _candidates(database, node):
+        book = decode(OpacBook, record)
+        if match(record_fields(book)):
+            books.append(book)
+    return books
+
+
+# Отсутствующая (удаленная) запись - нет в выдаче поиска по MFN или 404; остальные ошибки прерывают загрузку,
+# чтобы не удалить лишнего
+async def fetch_records(client: ClientSession, database: str, mfns: list[int]) -> dict[int, OpacBook]:
+    records = await opac_records_retrieve(
+        client, database, [str(mfn) for mfn in mfns], strict=True, concurrency=settings.CATALOG_MIRROR["CONCURRENCY"]
+    )
+    return {int(mfn): book for mfn, book in records.items()}
+
+
+def mirror_record(database: str, mfn: int, book: OpacBook, harvested_at) -> MirrorRecord:
+    fields = record_fields(book)
+    return MirrorRecord(
+        database=database,
+        mfn=mfn,
+        record=book.to_dict(),
+        created=book.created or "",
+        harvested_at=harvested_at,
+        **{name: "\n".join(values) for name, values in fields.items()},
+    )
+
+
+@dataclass
+class HarvestResult:
+    database: str
+    harvested: int
+    deleted: int
+    watermark: int
+
+
+# Загружает записи БД пачками по MFN начиная с водяной отметки. Последние RECHECK записей до отметки
+# перечитываются (свежие записи чаще правят). OPAC не сообщает последний MFN, поэтому концом БД считаются
+# END_EMPTY_BATCHES пустых пачек подряд за отметкой: записи после серии удаленных MFN не теряются.
+# Отметка сохраняется после каждой пачки, прерванная загрузка продолжится с того же места. harvested_at ставится,
+# только когда проход дошел до конца БД: до этого mirror_search не отвечает за эту БД, и поиск идет в OPAC
+async def harvest_database(client: ClientSession, database: str, full: bool = False) -> HarvestResult:
+    config = settings.CATALOG_MIRROR
+    watermark, _ = await MirrorWatermark.objects.aget_or_create(database=database)
+    result = HarvestResult(database, 0, 0, watermark.mfn)
+
+    mfn = 1 if full else max(1, watermark.mfn + 1 - config["RECHECK"])
+    empty = 0
+    while empty < config["END_EMPTY_BATCHES"]:
+        mfns = list(range(mfn, mfn + config["BATCH_SIZE"]))
+        records = await fetch_records(client, database, mfns)
+        empty = empty + 1 if not records and mfn > watermark.mfn else 0
+
+        harvested_at = timezone.now()
+        await MirrorRecord.objects.abulk_create(
+            [mirror_record(database, record_mfn, book, harvested_at) for record_mfn, book in records.items()],
+            update_conflicts=True,
+            unique_fields=["database", "mfn"],
+            update_fields=["record", *FIELDS, "created", "harvested_at"],
+        )
+        deleted, _ = await MirrorRecord.objects.filter(
+            database=database, mfn__in=[mfn for mfn in mfns if mfn not in records]
+        ).adelete()
+
+        result.harvested += len(records)
+        result.deleted += deleted
+        if records:
+            watermark.mfn = max(watermark.mfn, *records)
+            watermark.created = max(watermark.created, *(book.created or "" for book in records.values()))
+            await watermark.asave()
+
+        mfn += config["BATCH_SIZE"]
+
+    # Пустая БД тоже считается загруженной
+    watermark.harvested_at = timezone.now()
+    await watermark.asave()
+
+    result.watermark = watermark.mfn
+    return result
+
+
+async def harvest_catalog(
+    client: ClientSession, databases: list[str] | None = None, full: bool = False
+) -> list[HarvestResult]:
+    if databases is None:
+        databases = sorted({database for _, database in (await aget_topology()).databases()})
+    return [await harvest_database(client, database, full) for database in databases]
@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+
+from aiohttp import ClientSession
+from django.conf import settings
+
+from library_service.opac.api.login import UserInfo
+from library_service.opac.api.ticket import OpacReader, opac_reader_info_by_mira, opac_reader_info_by_ticket
+from library_service.opac.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class CachedReader:
+    reader: OpacReader
+    fetched_at: float
+
+
+# Кэш читателей OPAC по ключу ("ticket", номер билета) или ("mira", mira id).
+# ФИО, подразделение и билет живут TTL, флаги allowed/debtor/gone считаются актуальными только STATUS_TTL
+reader_cache: TTLCache[tuple[str, str], CachedReader] = TTLCache(
+    ttl=settings.OPAC_READER_CACHE["TTL"],
+    max_bytes=settings.OPAC_READER_CACHE["MAX_BYTES"],
+    group=lambda key: key[0],
+)
+
+
+def reader_keys(ticket=None, mira_id=None) -> list[tuple[str, str]]:
+    keys = []
+    if ticket:
+        keys.append(("ticket", str(ticket)))
+    if mira_id:
+        keys.append(("mira", str(mira_id)))
+    return keys
+
+
+def remember_reader(reader: OpacReader, mira_id=None):
+    cached = CachedReader(reader, reader_cache.clock())
+    for key in reader_keys(reader.ticket, mira_id):
+        reader_cache.set(key, cached)
+
+
+# Данные о читателе приходят и при входе, их тоже стоит запомнить
+def remember_login_info(info: UserInfo):
+    reader = OpacReader(
+        ticket=info.ticket,
+        name=info.name,
+        allowed=info.allowed,
+        debtor=info.debtor,
+        gone=info.gone,
+        academ=info.academ,
+        everlasting=info.everlasting,
+        category=info.category,
+        department=info.department,
+        mail=info.mail,
+    )
+    remember_reader(reader, info.mira)
+
+
+def invalidate_reader(ticket=None, mira_id=None):
+    for key in reader_keys(ticket, mira_id):
+        reader_cache.invalidate(key)
+
+
+def _cached(key: tuple[str, str], status: bool) -> OpacReader | None:
+    cached: CachedReader | None = reader_cache.get(key)
+    if cached is None:
+        return None
+    if status and reader_cache.clock() - cached.fetched_at >= settings.OPAC_READER_CACHE["STATUS_TTL"]:
+        return None
+    return cached.reader
+
+
+# status=True - вызывающему важны флаги allowed/debtor/gone (проверка права на заказ и т.п.)
+async def reader_info_by_ticket(client: ClientSession, ticket, status: bool = False) -> OpacReader:
+    reader = _cached(("ticket", str(ticket)), status)
+    if reader is None:
+        reader = await opac_reader_info_by_ticket(client, ticket)
+        remember_reader(reader)
+    return reader
+
+
+async def reader_info_by_mira(client: ClientSession, mira_id, status: bool = False) -> OpacReader:
+    reader = _cached(("mira", str(mira_id)), status)
+    if reader is None:
+        reader = await opac_reader_info_by_mira(client, mira_id)
+        remember_reader(reader, mira_id)
+    return reader
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, TypeVar
+
+from aiohttp import ClientSession
+
+from library_service.opac.client import opac_client_session
+from library_service.opac.singleflight import single_flight
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Snapshot(Generic[T]):
+    value: T
+    refreshed_at: float
+
+
+# Данные, которые обновляются в фоне раз в interval и отдаются из памяти.
+# Снимок заменяется целиком только после успешной загрузки; при ошибке OPAC остается последний удачный.
+# Если снимок старше max_staleness (например, фоновое обновление не запущено), запрос обновляет его сам.
+class PeriodicRefresher(Generic[T]):
+    def __init__(
+        self,
+        name: str,
+        load: Callable[[ClientSession], Awaitable[T]],
+        interval: float,
+        max_staleness: float,
+        clock: Callable[[], float] = time.monotonic,
+        register: bool = True,
+    ):
+        self.name = name
+        self.load = load
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self.clock = clock
+        self.snapshot: Snapshot[T] | None = None
+        self.refreshes = 0
+        self.failures = 0
+        self._task: asyncio.Task | None = None
+        if register:
+            refreshers.append(self)
+
+    def age(self) -> float | None:
+        return None if self.snapshot is None else self.clock() - self.snapshot.refreshed_at
+
+    async def refresh(self) -> Snapshot[T]:
+        async def load() -> Snapshot[T]:
+            async with opac_client_session() as client:
+                value = await self.load(client)
+            self.snapshot = Snapshot(value, self.clock())
+            self.refreshes += 1
+            return self.snapshot
+
+        try:
+            return await single_flight.do("refresh", self.name, load)
+        except Exception:
+            self.failures += 1
+            raise
+
+    async def get(self) -> T:
+        snapshot = self.snapshot
+        if snapshot is not None and self.clock() - snapshot.refreshed_at < self.max_staleness:
+            return snapshot.value
+
+        try:
+            return (await self.refresh()).value
+        except Exception:  # pylint: disable=broad-exception-caught
+            if snapshot is None:
+                raise
+            logger.warning("Serving stale %s snapshot", self.name, exc_info=True)
+            return snapshot.value
+
+    # Следующий get() обновит снимок; при ошибке по-прежнему отдается старый
+    def expire(self):
+        if self.snapshot is not None:
+            self.snapshot = Snapshot(self.snapshot.value, float("-inf"))
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.warning("Failed to refresh %s", self.name, exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        age = self.age()
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "age": None if age is None else round(age, 1),
+            "interval": self.interval,
+            "max_staleness": self.max_staleness,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+refreshers: list[PeriodicRefresher] = []
+
+
+async def start_refreshers():
+    for refresher in refreshers:
+        refresher.start()
+
+
+async def stop_refreshers():
+    for refresher in refreshers:
+        await refresher.stop()
+
+
+def refreshers_stats() -> dict:
+    return {refresher.name: refresher.stats() for refresher in refreshers}
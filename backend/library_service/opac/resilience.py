@@ -0,0 +1,185 @@
+import asyncio
+import functools
+import time
+import weakref
+from enum import Enum
+
+from aiohttp import ClientConnectionError, ClientResponseError
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class OpacUnavailableError(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "OPAC is temporarily unavailable"
+    default_code = "opac_unavailable"
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+def is_failure(error: BaseException) -> bool:
+    # 4xx - это ответ OPAC на некорректный запрос, а не его отказ
+    if isinstance(error, ClientResponseError):
+        return error.status >= 500
+    return isinstance(error, (ClientConnectionError, TimeoutError))
+
+
+# Таймаут, предохранитель (circuit breaker) и ограничение параллельности для одного семейства эндпоинтов OPAC
+class EndpointFamily:
+    def __init__(self, name: str, config: dict, clock=time.monotonic):
+        self.name = name
+        self.timeout: float = config["TIMEOUT"]
+        self.concurrency: int = config["CONCURRENCY"]
+        self.max_wait: float = config["MAX_WAIT"]
+        self.failure_threshold: int = config["FAILURE_THRESHOLD"]
+        self.latency_threshold: float = config["LATENCY_THRESHOLD"]
+        self.reset_timeout: float = config["RESET_TIMEOUT"]
+        self.clock = clock
+
+        self.state = BreakerState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.counters = {
+            "successes": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "slow_calls": 0,
+            "rejected_open": 0,
+            "rejected_bulkhead": 0,
+            "opened": 0,
+        }
+        # Семафор привязан к циклу событий, поэтому храним по одному на цикл
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    # True - этот вызов стал пробным запросом полуоткрытого предохранителя
+    def _before_call(self) -> bool:
+        if self.state == BreakerState.OPEN:
+            if self.clock() - self.opened_at < self.reset_timeout:
+                self.counters["rejected_open"] += 1
+                raise OpacUnavailableError()
+            self.state = BreakerState.HALF_OPEN
+
+        if self.state == BreakerState.HALF_OPEN:
+            # Пробный запрос только один, остальные отклоняем до его результата
+            if self.trial_in_flight:
+                self.counters["rejected_open"] += 1
+                raise OpacUnavailableError()
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def _record(self, failed: bool):
+        self.trial_in_flight = False
+        if not failed:
+            self.consecutive_failures = 0
+            self.state = BreakerState.CLOSED
+            return
+
+        self.consecutive_failures += 1
+        if self.state == BreakerState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != BreakerState.OPEN:
+                self.counters["opened"] += 1
+            self.state = BreakerState.OPEN
+            self.opened_at = self.clock()
+
+    async def call(self, factory):
+        trial = self._before_call()
+
+        semaphore = self._semaphore()
+        self.waiting += 1
+        acquired = False
+        try:
+            async with asyncio.timeout(self.max_wait):
+                await semaphore.acquire()
+            acquired = True
+        except TimeoutError as error:
+            self.counters["rejected_bulkhead"] += 1
+            raise OpacUnavailableError() from error
+        finally:
+            self.waiting -= 1
+            # Пробный запрос, не дождавшийся очереди (таймаут или отмена), освобождает место для следующего
+            if trial and not acquired:
+                self.trial_in_flight = False
+
+        self.in_flight += 1
+        started = self.clock()
+        try:
+            async with asyncio.timeout(self.timeout):
+                result = await factory()
+        except TimeoutError as error:
+            self.counters["timeouts"] += 1
+            self.counters["failures"] += 1
+            self._record(failed=True)
+            raise OpacUnavailableError() from error
+        except asyncio.CancelledError:
+            if trial:
+                self.trial_in_flight = False
+            raise
+        except Exception as error:
+            failed = is_failure(error)
+            self.counters["failures" if failed else "successes"] += 1
+            self._record(failed)
+            raise
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+        slow = self.clock() - started > self.latency_threshold
+        if slow:
+            self.counters["slow_calls"] += 1
+        self.counters["successes"] += 1
+        self._record(failed=slow)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "concurrency": self.concurrency,
+            "timeout": self.timeout,
+            **self.counters,
+        }
+
+
+_families: dict[str, EndpointFamily] = {}
+
+
+def get_family(name: str) -> EndpointFamily:
+    family = _families.get(name)
+    if family is None:
+        config = {**settings.OPAC_RESILIENCE["DEFAULT"], **settings.OPAC_RESILIENCE.get(name, {})}
+        family = _families[name] = EndpointFamily(name, config)
+    return family
+
+
+def resilience_stats() -> dict:
+    return {name: family.stats() for name, family in _families.items()}
+
+
+def guarded(family_name: str):
+    def decorator(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            return await get_family(family_name).call(lambda: function(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,66 @@
+import asyncio
+import functools
+from collections import Counter
+from typing import Any, Awaitable, Callable, Hashable
+
+from aiohttp import ClientSession
+
+from library_service.opac.client import get_client_session
+
+
+# Одинаковые одновременные запросы к OPAC выполняются один раз, остальные ждут результат первого
+class SingleFlight:
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self.coalesced_by_name: Counter[str] = Counter()
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, name: str, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        # Future нельзя ждать из другого цикла событий, поэтому цикл входит в ключ
+        key = (id(asyncio.get_running_loop()), name, key)
+        self.calls += 1
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            self.coalesced_by_name[name] += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+
+            def done(task: asyncio.Future):
+                self._in_flight.pop(key, None)
+                # Если все ожидающие отменены, исключение никто не заберет и asyncio напишет об этом в лог
+                if not task.cancelled():
+                    task.exception()
+
+            task.add_done_callback(done)
+
+        # shield: отмена одного из ожидающих не должна отменять запрос для остальных
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            "coalesced_by_endpoint": dict(self.coalesced_by_name),
+        }
+
+
+single_flight = SingleFlight()
+
+
+def coalesce(function):
+    name = function.__name__
+
+    @functools.wraps(function)
+    async def wrapper(client: ClientSession, *args, **kwargs):
+        # Запрос выполняется сессией первого вызова. Общий пул объединяется со всеми, а сессия на запрос
+        # (вне ASGI lifespan) - только с вызовами той же сессии, иначе она закроется под остальными ожидающими
+        session = None if client is get_client_session() else id(client)
+        key = (session, tuple(str(arg) for arg in args), tuple(sorted((k, str(v)) for k, v in kwargs.items())))
+        return await single_flight.do(name, key, lambda: function(client, *args, **kwargs))
+
+    return wrapper
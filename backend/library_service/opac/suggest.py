@@ -0,0 +1,134 @@
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Iterable
+
+from django.conf import settings
+
+from library_service.opac.api.book import OpacBook
+
+
+def normalize_suggestion(text: str) -> str:
+    return " ".join(text.casefold().replace("ё", "е").split())
+
+
+@dataclass
+class Suggestion:
+    text: str
+    kind: str
+    seen: int = 1
+    seen_at: int = 0
+
+
+# Индекс префиксов авторов, заглавий и рубрик для подсказок в строке поиска.
+# Ключи - отсортированный список строк "нормализованный текст\0вид", поиск - bisect по префиксу.
+# Новые значения копятся в pending и вливаются в список одной сортировкой при следующем поиске.
+# Если значений больше max_entries, вытесняются самые редко (при равенстве - давно) встречавшиеся, а счетчики
+# оставшихся уменьшаются вдвое, чтобы новые значения могли потеснить давно популярные.
+# Индекс пополняется свежими выдачами поиска (search_retrieve при промахе кэша) и фоновым сканированием
+# (feeds.scan_suggestions); значения повторяются часто, поэтому уже встречавшийся текст находится без нормализации
+class SuggestIndex:
+    def __init__(self, max_entries: int, max_length: int):
+        self.max_entries = max_entries
+        self.max_length = max_length
+        self._entries: dict[str, Suggestion] = {}
+        self._by_text: defaultdict[str, dict[str, Suggestion]] = defaultdict(dict)
+        self._keys: list[str] = []
+        self._pending: list[str] = []
+        self._tick = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, kind: str, values: Iterable[str]):
+        self._tick += 1
+        by_text = self._by_text[kind]
+        for text in values:
+            entry = by_text.get(text)
+            if entry is not None:
+                entry.seen += 1
+                entry.seen_at = self._tick
+                continue
+            if not text or len(text) > self.max_length:
+                continue
+
+            key = f"{normalize_suggestion(text)}\0{kind}"
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.seen += 1
+                entry.seen_at = self._tick
+            else:
+                entry = self._entries[key] = Suggestion(text.strip(), kind, seen_at=self._tick)
+                self._pending.append(key)
+            by_text[text] = entry
+
+        if len(self._entries) > self.max_entries:
+            self._evict()
+
+    # Авторы, коллективы, заглавия и рубрики записей выдачи
+    def add_records(self, records: Iterable[OpacBook]):
+        for record in records:
+            info = record.info
+            self.add("author", info.author)
+            self.add("author", info.collective)
+            self.add("title", info.title)
+            self.add("subject", info.subject)
+
+    def _evict(self):
+        # Удаляем с запасом, чтобы не вытеснять на каждой новой записи
+        keep = self.max_entries * 9 // 10
+        ranked = sorted(self._entries.items(), key=lambda item: (item[1].seen, item[1].seen_at), reverse=True)
+        self.evictions += len(ranked) - keep
+        self._entries = dict(ranked[:keep])
+        for entry in self._entries.values():
+            entry.seen //= 2
+        self._keys = sorted(self._entries)
+        self._pending = []
+
+        kept = {id(entry) for entry in self._entries.values()}
+        for by_text in self._by_text.values():
+            for text in [text for text, entry in by_text.items() if id(entry) not in kept]:
+                del by_text[text]
+
+    def _merge(self):
+        if self._pending:
+            self._keys = sorted(self._keys + self._pending)
+            self._pending = []
+
+    # Сначала чаще встречавшиеся; среди совпадений просматривается не больше scan ключей
+    def suggest(self, prefix: str, limit: int, scan: int) -> list[Suggestion]:
+        prefix = normalize_suggestion(prefix)
+        if not prefix:
+            return []
+
+        self._merge()
+        matches = []
+        for key in self._keys[bisect_left(self._keys, prefix) :]:
+            if not key.startswith(prefix) or len(matches) >= scan:
+                break
+            matches.append(self._entries[key])
+
+        matches.sort(key=lambda entry: -entry.seen)
+        return matches[:limit]
+
+    def clear(self):
+        self._tick = 0
+        self._entries.clear()
+        self._by_text.clear()
+        self._keys = []
+        self._pending = []
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "pending": len(self._pending),
+            "evictions": self.evictions,
+        }
+
+
+suggest_index = SuggestIndex(
+    max_entries=settings.CATALOG_SUGGEST["MAX_ENTRIES"],
+    max_length=settings.CATALOG_SUGGEST["MAX_LENGTH"],
+)
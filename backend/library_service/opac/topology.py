@@ -0,0 +1,75 @@
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from django.conf import settings
+
+from library_service.models.catalog import LibraryDatabase
+
+
+class UnknownDatabaseError(LookupError):
+    pass
+
+
+# Неизменяемый снимок связей "БД OPAC -> библиотека", чтобы не ходить в нашу БД за каждой книгой
+@dataclass(frozen=True)
+class CatalogTopology:
+    database_library: Mapping[str, int]
+    library_databases: Mapping[int, tuple[str, ...]]
+
+    @staticmethod
+    def from_pairs(pairs: list[tuple[str, int]]) -> "CatalogTopology":
+        database_library: dict[str, int] = {}
+        library_databases: dict[int, tuple[str, ...]] = {}
+        for database, library in pairs:
+            database_library.setdefault(database, library)  # Как afirst(): побеждает первая регистрация БД
+            library_databases[library] = library_databases.get(library, ()) + (database,)
+
+        return CatalogTopology(MappingProxyType(database_library), MappingProxyType(library_databases))
+
+    def library_of(self, database: str) -> int:
+        try:
+            return self.database_library[database]
+        except KeyError as error:
+            raise UnknownDatabaseError(f"Database {database} is not registered") from error
+
+    def has_database(self, database: str, library: int | None = None) -> bool:
+        if library is None:
+            return database in self.database_library
+        return database in self.library_databases.get(library, ())
+
+    # Пары (библиотека, БД) в порядке регистрации; library=None - по всем библиотекам
+    def databases(self, library: int | None = None) -> list[tuple[int, str]]:
+        libraries = self.library_databases.keys() if library is None else [library]
+        return [(lib, database) for lib in libraries for database in self.library_databases.get(lib, ())]
+
+
+_topology: CatalogTopology | None = None
+_loaded_at = 0.0
+_generation = 0
+
+
+def invalidate_topology():
+    global _topology, _generation  # pylint: disable=global-statement
+    _topology = None
+    _generation += 1
+
+
+# Сигналы сбрасывают снимок только в текущем воркере, поэтому в остальных он живет не дольше CATALOG_TOPOLOGY_TTL
+async def aget_topology() -> CatalogTopology:
+    global _topology, _loaded_at  # pylint: disable=global-statement
+
+    topology = _topology
+    if topology is not None and time.monotonic() - _loaded_at < settings.CATALOG_TOPOLOGY_TTL:
+        return topology
+
+    generation = _generation
+    queryset = LibraryDatabase.objects.order_by("library_id", "id").values_list("database", "library_id")
+    topology = CatalogTopology.from_pairs([pair async for pair in queryset])
+
+    # Если за время загрузки снимок сбросили, не сохраняем устаревшие данные
+    if generation == _generation:
+        _topology = topology
+        _loaded_at = time.monotonic()
+    return topology
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.core import signing
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from library_service.opac.api.expression import normalize_expression
+
+
+# Постраничная выдача поиска по каталогу. Курсор непрозрачен для клиента: подписанные выражение, библиотека,
+# фильтры и смещение, поэтому курсор от другого запроса или измененный вручную не принимается
+class SearchPagination:
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    salt = "library_service.pagination.search"
+
+    def __init__(self, request, expression: str, library: int | None, filters: list | None = None):
+        self.request = request
+        self.query = [normalize_expression(expression), library, filters or []]
+        self.page_size = self.get_page_size()
+        self.offset = self.decode_cursor()
+        self.count = 0
+
+    @classmethod
+    def is_requested(cls, request) -> bool:
+        return cls.cursor_query_param in request.query_params or cls.page_size_query_param in request.query_params
+
+    @property
+    def has_cursor(self) -> bool:
+        return self.cursor_query_param in self.request.query_params
+
+    def get_page_size(self) -> int:
+        config = settings.CATALOG_SEARCH_PAGINATION
+        try:
+            page_size = int(self.request.query_params.get(self.page_size_query_param, config["PAGE_SIZE"]))
+        except ValueError as error:
+            raise ValidationError("Invalid page size", code="invalid_page_size") from error
+        if page_size < 1:
+            raise ValidationError("Invalid page size", code="invalid_page_size")
+        return min(page_size, config["MAX_PAGE_SIZE"])
+
+    def encode_cursor(self, offset: int) -> str:
+        return signing.dumps([self.query, offset], salt=self.salt, compress=True)
+
+    def decode_cursor(self) -> int:
+        cursor = self.request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return 0
+        try:
+            query, offset = signing.loads(cursor, salt=self.salt)
+        except (signing.BadSignature, TypeError, ValueError) as error:
+            raise ValidationError("Invalid cursor", code="invalid_cursor") from error
+        if query != self.query or not isinstance(offset, int) or offset < 0:
+            raise ValidationError("Invalid cursor", code="invalid_cursor")
+        return offset
+
+    def paginate_list(self, results: list) -> list:
+        self.count = len(results)
+        return results[self.offset : self.offset + self.page_size]
+
+    def get_link(self, offset: int | None) -> str | None:
+        if offset is None:
+            return None
+        url = self.request.build_absolute_uri()
+        if offset == 0:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(offset))
+
+    def get_paginated_response(self, data, **extra) -> Response:
+        next_offset = self.offset + self.page_size if self.offset + self.page_size < self.count else None
+        previous_offset = max(self.offset - self.page_size, 0) if self.offset > 0 else None
+        return Response(
+            {
+                "count": self.count,
+                "next": self.get_link(next_offset),
+                "previous": self.get_link(previous_offset),
+                "results": data,
+                **extra,
+            }
+        )
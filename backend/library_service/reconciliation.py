@@ -0,0 +1,93 @@
+from dataclasses import dataclass, field
+
+from aiohttp import ClientSession
+from django.utils import timezone
+
+from library_service.models.order import Order, OrderItem
+from library_service.opac.api.ticket import OpacLoan, opac_reader_loans
+from library_service.opac.book import invalidate_book
+from library_service.opac.loans import loan_key, resolve_loans
+
+
+# Сверка заказа с выдачами читателя в OPAC.
+# found - заказанные книги, которые числятся за читателем; notfound - заказанные, но не выданные;
+# returned - книги, которые обещали вернуть с заказом и которых больше нет в выдачах;
+# additional - id книг из выдач, которых нет в заказе
+@dataclass
+class Reconciliation:
+    found: list[OrderItem] = field(default_factory=list)
+    notfound: list[OrderItem] = field(default_factory=list)
+    returned: list[OrderItem] = field(default_factory=list)
+    additional: list[str] = field(default_factory=list)
+    loans: dict[str, OpacLoan] = field(default_factory=dict)
+
+    # Проверка заказа: только переносим даты выдачи на найденные книги
+    async def save_loan_dates(self):
+        for item in self.found:
+            loan = self.loans[item.book_id]
+            item.handed_date = loan.date
+            item.to_return_date = loan.deadline
+
+        await OrderItem.objects.abulk_update(self.found, ["handed_date", "to_return_date"])
+
+    # Выполнение заказа: найденные выданы, не найденные отменены, недостающие из обещанных к возврату - возвращены
+    async def save_done(self):
+        for item in self.found:
+            loan = self.loans[item.book_id]
+            item.status = OrderItem.Status.HANDED
+            item.handed_date = loan.date
+            item.to_return_date = loan.deadline
+
+        cancelled = [item for item in self.notfound if item.status == OrderItem.Status.ORDERED]
+        for item in cancelled:
+            item.status = OrderItem.Status.CANCELLED
+
+        returned_date = timezone.now()
+        for item in self.returned:
+            item.status = OrderItem.Status.RETURNED
+            item.returned_date = returned_date
+
+        await OrderItem.objects.abulk_update(self.found, ["status", "handed_date", "to_return_date"])
+        await OrderItem.objects.abulk_update(cancelled, ["status"])
+        await OrderItem.objects.abulk_update(self.returned, ["status", "returned_date"])
+
+        # Выдача и возврат меняют количество доступных экземпляров
+        for item in self.found + self.returned:
+            invalidate_book(item.book_id)
+
+
+def reconcile(
+    items: list[OrderItem],
+    borrowed: list[OrderItem],
+    loans: list[OpacLoan],
+    resolved: dict[tuple[str, str], str],
+) -> Reconciliation:
+    result = Reconciliation()
+
+    # Если одна книга выдана в нескольких экземплярах, берем первую выдачу
+    for loan in loans:
+        book_id = resolved.get(loan_key(loan))
+        if book_id is not None:
+            result.loans.setdefault(book_id, loan)
+
+    ordered = set()
+    for item in items:
+        ordered.add(item.book_id)
+        (result.found if item.book_id in result.loans else result.notfound).append(item)
+
+    result.returned = [
+        item for item in borrowed if item.book_id not in result.loans and item.status != OrderItem.Status.RETURNED
+    ]
+    result.additional = [book_id for book_id in result.loans if book_id not in ordered]
+
+    return result
+
+
+async def reconcile_order(client: ClientSession, order: Order, library_card: str) -> Reconciliation:
+    loans = await opac_reader_loans(client, library_card)
+    resolved = await resolve_loans(client, loans)
+
+    items = [item async for item in OrderItem.objects.filter(order=order)]
+    borrowed = [item async for item in OrderItem.objects.filter(order_to_return=order)]
+
+    return reconcile(items, borrowed, loans, resolved)
@@ -0,0 +1,26 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+# Даты, Decimal и ленивые строки кодируются encoder_class, как у JSONRenderer, чтобы ответ не отличался
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+# JSONRenderer на orjson с тем же выводом. Отступы (запрошенные клиентом или для Browsable API),
+# ensure_ascii, не компактный или нестрогий JSON и то, что orjson закодировать не может (например, целые больше 64 бит),
+# отдаются стандартной реализации
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        compatible = not self.ensure_ascii and self.compact and self.strict and indent is None
+        if data is None or not compatible:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Как и JSONRenderer, экранируем U+2028 и U+2029, чтобы ответ был подмножеством JavaScript
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
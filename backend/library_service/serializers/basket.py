@@ -1,11 +1,10 @@
-import asyncio
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from adrf import serializers as aserializers
 
 from library_service.models.user import Basket, BasketItem
-from library_service.opac.book import book_retrieve_safe
+from library_service.opac.book import book_retrieve_many
 
 
 class AddBasketSerializer(aserializers.Serializer):
@@ -21,17 +20,14 @@ class AddBasketSerializer(aserializers.Serializer):
         books_current = [book.book_id async for book in BasketItem.objects.filter(basket=basket)]
         books_add: list[str] = validated_data["books"]
 
-        tasks = []
-        for book in set(books_add):
-            if book not in books_current:
+        books_new = [book for book in dict.fromkeys(books_add) if book not in books_current]
 
-                async def task(book=book):
-                    if await book_retrieve_safe(self.context["client_session"], book) is None:
-                        raise ValidationError(f"Invalid book id {book}", code="invalid_book_id")
-                    books_current.append(book)
-                    await BasketItem.objects.acreate(book_id=book, basket=basket)
+        # Сначала проверяем все книги разом, и только потом добавляем их в корзину
+        retrieved = await book_retrieve_many(self.context["client_session"], books_new)
+        for book, retrieved_book in zip(books_new, retrieved):
+            if retrieved_book is None:
+                raise ValidationError(f"Invalid book id {book}", code="invalid_book_id")
 
-                tasks.append(task())
-
-        await asyncio.gather(*tasks)
+        await BasketItem.objects.abulk_create([BasketItem(book_id=book, basket=basket) for book in books_new])
+        books_current += books_new
         return {"books": books_current}
@@ -1,10 +1,13 @@
-from rest_framework_dataclasses.serializers import DataclassSerializer
+from typing import Iterable
 
 from adrf import serializers as aserializers
 
 from library_service.models.catalog import Library
+from library_service.opac.api.databases import OpacDatabase
 from library_service.opac.api.scenarios import OpacScenario
-from library_service.opac.book import Book
+from library_service.opac.book import Book, book_retrieve, book_retrieve_many
+from library_service.opac.suggest import Suggestion
+from library_service.serializers.plain import PlainDataclassSerializer
 
 
 class LibrarySerializer(aserializers.ModelSerializer):
@@ -13,11 +16,51 @@ class LibrarySerializer(aserializers.ModelSerializer):
         fields = ["id", "description", "address"]
 
 
-class BookSerializer(DataclassSerializer):
+class BookSerializer(PlainDataclassSerializer):
     class Meta:
         dataclass = Book
 
 
-class ScenarioSerializer(DataclassSerializer):
+PREFETCHED_BOOKS = "prefetched_books"
+
+
+# Загружает книги одним пакетом в контекст, общий для всего дерева сериализаторов (см. ParallelListSerializer)
+async def prefetch_books(context: dict, book_ids: Iterable[str]):
+    books = context.setdefault(PREFETCHED_BOOKS, {})
+    missing = [book_id for book_id in dict.fromkeys(book_ids) if book_id not in books]
+    if missing:
+        books.update(zip(missing, await book_retrieve_many(context["client_session"], missing)))
+
+
+# Книга берется из загруженных заранее; не загруженная или не найденная пакетом запрашивается отдельно,
+# чтобы ошибка была такой же, как без предзагрузки
+async def book_representation(context: dict, book_id: str) -> dict:
+    book = context.get(PREFETCHED_BOOKS, {}).get(book_id)
+    if book is None:
+        book = await book_retrieve(context["client_session"], book_id)
+    return BookSerializer(book).data
+
+
+# Для сериализаторов позиций заказа: поле book и загрузка книг всех позиций списка одним пакетом
+class BookFieldMixin:
+    async def aprefetch(self, items: list):
+        await prefetch_books(self.context, [item.book_id for item in items])
+
+    async def get_book(self, obj):
+        return await book_representation(self.context, obj.book_id)
+
+
+class ScenarioSerializer(PlainDataclassSerializer):
     class Meta:
         dataclass = OpacScenario
+
+
+class DatabaseSerializer(PlainDataclassSerializer):
+    class Meta:
+        dataclass = OpacDatabase
+
+
+class SuggestionSerializer(PlainDataclassSerializer):
+    class Meta:
+        dataclass = Suggestion
+        fields = ["text", "kind"]
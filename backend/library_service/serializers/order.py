@@ -1,4 +1,3 @@
-import asyncio
 from django.db.models import Q
 from django.contrib.auth import get_user_model
 
@@ -9,10 +8,11 @@ from adrf import serializers as aserializers
 from adrf import fields as afields
 
 from library_service.models.order import Order, OrderHistory, OrderItem
-from library_service.opac.book import book_retrieve, book_retrieve_safe
+from library_service.opac.book import book_retrieve_many, split_book_id
+from library_service.opac.topology import aget_topology
 from library_service.models.catalog import Library
 
-from library_service.serializers.catalog import BookSerializer, LibrarySerializer
+from library_service.serializers.catalog import BookFieldMixin, LibrarySerializer, prefetch_books
 from library_service.serializers.parallel_list import ParallelListSerializer
 
 User = get_user_model()
@@ -39,7 +39,7 @@ class OrderUserSerializer(aserializers.ModelSerializer):
         fields = ["id", "username", "first_name", "last_name", "library_card", "campus_id", "mira_id", "fullname", "department"]
 
 
-class OrderItemSerializer(aserializers.ModelSerializer):
+class OrderItemSerializer(BookFieldMixin, aserializers.ModelSerializer):
     book = afields.SerializerMethodField()
 
     class Meta:
@@ -54,9 +54,6 @@ class OrderItemSerializer(aserializers.ModelSerializer):
         ]
         list_serializer_class = ParallelListSerializer
 
-    async def get_book(self, obj: OrderItem):
-        return BookSerializer(await book_retrieve(self.context["client_session"], obj.book_id)).data
-
 
 class OrderSerializer(aserializers.ModelSerializer):
     library = LibrarySerializer()
@@ -68,6 +65,10 @@ class OrderSerializer(aserializers.ModelSerializer):
         fields = ["id", "library", "statuses", "books"]
         list_serializer_class = ParallelListSerializer
 
+    # Книги позиций всех заказов списка загружаются одним пакетом
+    async def aprefetch(self, orders: list[Order]):
+        await prefetch_books(self.context, [item.book_id async for item in OrderItem.objects.filter(order__in=orders)])
+
 
 class UserOrderSerializer(aserializers.ModelSerializer):
     library = LibrarySerializer()
@@ -102,27 +103,23 @@ class CreateUpdateOrderSerializer(aserializers.Serializer):
             queryset = queryset.filter(~Q(order=order))
         current_books = [order_book.book_id async for order_book in queryset]
 
-        tasks = []
-        for book_id in set(books):
-
-            async def task(book_id=book_id):
-                if book_id in current_books:
-                    raise ValidationError(
-                        f"Can't order the same book {book_id} twice",
-                        code="same_book_twice",
-                    )
+        books_unique = list(dict.fromkeys(books))
+        for book_id in books_unique:
+            if book_id in current_books:
+                raise ValidationError(
+                    f"Can't order the same book {book_id} twice",
+                    code="same_book_twice",
+                )
 
-                book = await book_retrieve_safe(self.context["client_session"], book_id, library)
+        topology = await aget_topology()
+        retrieved = await book_retrieve_many(self.context["client_session"], books_unique)
 
-                if book is None:
-                    raise ValidationError(f"Invalid book id {book_id}", code="invalid_book_id")
+        for book_id, book in zip(books_unique, retrieved):
+            if book is None or not topology.has_database(split_book_id(book_id)[0], library.id):
+                raise ValidationError(f"Invalid book id {book_id}", code="invalid_book_id")
 
-                if not book.can_be_ordered:
-                    raise ValidationError(f"Can't order book {book_id}", code="cant_order_book")
-
-            tasks.append(task())
-
-        await asyncio.gather(*tasks)
+            if not book.can_be_ordered:
+                raise ValidationError(f"Can't order book {book_id}", code="cant_order_book")
 
         for book in borrowed_books:
             order_item = await OrderItem.objects.filter(pk=book).prefetch_related("order__user").afirst()
@@ -180,13 +177,10 @@ class CreateUpdateOrderSerializer(aserializers.Serializer):
         return validated_data
 
 
-class BorrowedBookSerializer(aserializers.ModelSerializer):
+class BorrowedBookSerializer(BookFieldMixin, aserializers.ModelSerializer):
     book = afields.SerializerMethodField()
 
     class Meta:
         model = OrderItem
         fields = ["id", "book", "order", "handed_date", "to_return_date"]
         list_serializer_class = ParallelListSerializer
-
-    async def get_book(self, obj: OrderItem):
-        return BookSerializer(await book_retrieve(self.context["client_session"], obj.book_id)).data
@@ -1,18 +1,33 @@
 import asyncio
+from django.conf import settings
 from django.db import models
 from adrf import serializers as aserializers
 
 
-# Как ListSerializer, но запускает сразу все таски to_representation, а не ждет поочередно каждую
+# Как ListSerializer, но представляет элементы параллельно: не больше concurrency одновременно
+# (по умолчанию PARALLEL_LIST_SERIALIZER["CONCURRENCY"]; у вложенных списков свой предел).
+# Если у дочернего сериализатора есть aprefetch(items), он вызывается один раз со всеми элементами
+# до их представления - например, чтобы загрузить все нужные книги одним пакетом
 class ParallelListSerializer(aserializers.ListSerializer):
+    concurrency: int | None = None
+
     async def ato_representation(self, data):
         if isinstance(data, models.Manager):
             data = data.all()
 
-        tasks = []
         if isinstance(data, models.query.QuerySet):
-            tasks = [self.child.ato_representation(item) async for item in data]
+            items = [item async for item in data]
         else:
-            tasks = [self.child.ato_representation(item) for item in data]
+            items = list(data)
+
+        prefetch = getattr(self.child, "aprefetch", None)
+        if prefetch is not None and items:
+            await prefetch(items)
+
+        semaphore = asyncio.Semaphore(self.concurrency or settings.PARALLEL_LIST_SERIALIZER["CONCURRENCY"])
+
+        async def represent(item):
+            async with semaphore:
+                return await self.child.ato_representation(item)
 
-        return await asyncio.gather(*tasks)
+        return await asyncio.gather(*map(represent, items))
@@ -0,0 +1,75 @@
+import dataclasses
+import types
+import typing
+from typing import Any, Callable
+
+from rest_framework import serializers
+
+_representers: dict[tuple[type, tuple[str, ...] | None], Callable[[Any], dict]] = {}
+
+
+def _expression(annotation, value: str, namespace: dict) -> str:
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin in (typing.Union, types.UnionType):
+        inner = [arg for arg in args if arg is not type(None)]
+        if len(inner) == 1:
+            converted = _expression(inner[0], value, namespace)
+            return value if converted == value else f"(None if {value} is None else {converted})"
+        return value
+
+    if origin in (list, tuple):
+        item = args[0] if args else Any
+        if dataclasses.is_dataclass(item):
+            name = f"represent_{item.__name__}"
+            namespace[name] = representer(item)
+            return f"[{name}(item) for item in {value}]"
+        return f"list({value})"
+
+    if dataclasses.is_dataclass(annotation):
+        name = f"represent_{annotation.__name__}"
+        namespace[name] = representer(annotation)
+        return f"{name}({value})"
+
+    return value
+
+
+# Собирает (один раз на класс и список полей) функцию dataclass -> dict без дерева полей DRF.
+# Вывод совпадает с DataclassSerializer: вложенные dataclass - словари, списки и кортежи - списки
+def representer(cls: type, fields: tuple[str, ...] | None = None) -> Callable[[Any], dict]:
+    key = (cls, fields)
+    if key in _representers:
+        return _representers[key]
+
+    hints = typing.get_type_hints(cls)
+    namespace: dict[str, Any] = {}
+    names = fields if fields is not None else [field.name for field in dataclasses.fields(cls)]
+    items = [f'"{name}": {_expression(hints[name], f"obj.{name}", namespace)}' for name in names]
+
+    source = "def represent(obj):\n    return {" + ", ".join(items) + "}"
+    exec(source, namespace)  # pylint: disable=exec-used
+
+    _representers[key] = namespace["represent"]
+    return _representers[key]
+
+
+class PlainListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        represent = self.child.represent
+        return [represent(item) for item in data]
+
+
+# Сериализатор только для чтения: Meta.dataclass и необязательный Meta.fields, как у DataclassSerializer.
+# Не строит поля при создании, поэтому дешев и для одной записи (например, книги в каждой позиции заказа)
+class PlainDataclassSerializer(serializers.BaseSerializer):  # pylint: disable=abstract-method
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = cls.Meta  # pylint: disable=no-member
+        fields = getattr(meta, "fields", None)
+        cls.represent = staticmethod(representer(meta.dataclass, tuple(fields) if fields else None))
+        if not hasattr(meta, "list_serializer_class"):
+            meta.list_serializer_class = PlainListSerializer
+
+    def to_representation(self, instance):
+        return self.represent(instance)
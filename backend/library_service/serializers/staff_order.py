@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Q
 
 from rest_framework import serializers
 
@@ -7,19 +8,14 @@ from adrf import fields as afields
 
 from library_service.models.order import Order, OrderHistory, OrderItem
 from library_service.models.user import UserProfile
-from library_service.opac.api.ticket import opac_reader_loans
-from library_service.opac.book import book_retrieve_by_id
-from library_service.opac.book import book_retrieve
+from library_service.opac.reader import invalidate_reader
+from library_service.reconciliation import reconcile_order
 
-from library_service.serializers.catalog import BookSerializer, LibrarySerializer
+from library_service.serializers.catalog import BookFieldMixin, BookSerializer, LibrarySerializer, prefetch_books
 from library_service.serializers.parallel_list import ParallelListSerializer
 
 from aiohttp import ClientSession
 
-from datetime import datetime
-
-from asgiref.sync import sync_to_async
-
 User = get_user_model()
 
 
@@ -59,7 +55,7 @@ class OrderUserSerializer(aserializers.ModelSerializer):
         model = User
         fields = ["id", "username", "first_name", "last_name", "library_card", "campus_id", "mira_id", "fullname", "department"]
 
-class BorrowedBookSerializer(aserializers.ModelSerializer):
+class BorrowedBookSerializer(BookFieldMixin, aserializers.ModelSerializer):
     book = afields.SerializerMethodField()
 
     class Meta:
@@ -67,11 +63,8 @@ class BorrowedBookSerializer(aserializers.ModelSerializer):
         fields = ["id", "book", "order", "handed_date", "to_return_date"]
         list_serializer_class = ParallelListSerializer
 
-    async def get_book(self, obj: OrderItem):
-        return BookSerializer(await book_retrieve(self.context["client_session"], obj.book_id)).data
 
-
-class OrderItemSerializer(aserializers.ModelSerializer):
+class OrderItemSerializer(BookFieldMixin, aserializers.ModelSerializer):
     book = afields.SerializerMethodField()
 
     class Meta:
@@ -88,9 +81,6 @@ class OrderItemSerializer(aserializers.ModelSerializer):
         ]
         list_serializer_class = ParallelListSerializer
 
-    async def get_book(self, obj: OrderItem):
-        return BookSerializer(await book_retrieve(self.context["client_session"], obj.book_id)).data
-
 
 class OrderSerializer(aserializers.ModelSerializer):
     library = LibrarySerializer()
@@ -104,13 +94,19 @@ class OrderSerializer(aserializers.ModelSerializer):
         fields = ["id", "library", "statuses", "books", "user", "books_to_return"]
         list_serializer_class = ParallelListSerializer
 
-    @sync_to_async
-    def get_books_to_return(self, obj: Order):
-        last_status = OrderHistory.objects.filter(order=obj).order_by("-date").values("status")[:1]
-        if (last_status == OrderHistory.Status.DONE):
-            return BorrowedBookSerializer(OrderItem.objects.filter(order_to_return = obj, status = OrderItem.Status.RETURNED).all(), many=True).data
-        else:
-            return BorrowedBookSerializer(OrderItem.objects.filter(order_to_return = obj).all(), many=True).data
+    # Книги позиций и книги к возврату всех заказов списка загружаются одним пакетом
+    async def aprefetch(self, orders: list[Order]):
+        items = OrderItem.objects.filter(Q(order__in=orders) | Q(order_to_return__in=orders))
+        await prefetch_books(self.context, [item.book_id async for item in items])
+
+    async def get_books_to_return(self, obj: Order):
+        items = OrderItem.objects.filter(order_to_return=obj)
+        last_status = (
+            await OrderHistory.objects.filter(order=obj).order_by("-date").values_list("status", flat=True).afirst()
+        )
+        if last_status == OrderHistory.Status.DONE:
+            items = items.filter(status=OrderItem.Status.RETURNED)
+        return await BorrowedBookSerializer(items, many=True, context=self.context).adata
 
 
 # TODO: нам нужно это повторение?
@@ -191,51 +187,14 @@ class UpdateOrderSerializer(aserializers.Serializer):
             order: Order = await Order.objects.prefetch_related("user").filter(id=instance.id).afirst()
             profile: UserProfile = await UserProfile.objects.prefetch_related("user").aget(user=order.user)
 
-            loans_id_list = []
-            loans = []
-
-            loans = await opac_reader_loans(self.context["client_session"], profile.library_card)
-
-            for loan in loans:
-                book = await book_retrieve_by_id(self.context["client_session"], loan.db, loan.book)
-                loans_id_list.append(book.id)
-                loan.book_id = book.id
-
-            books = await self.get_order_items(order)
-            found_books = []
-
-            async for book in books:
-                for loan in loans:
-                    if book.book_id == loan.book_id:
-                        found_books.append(book)
-
-            notfound_books = []
-
-            async for book in books:
-                if book.book_id not in loans_id_list:
-                    notfound_books.append(book)     
-
-            for item in found_books:
-                item.status = OrderItem.Status.HANDED
-                item.handed_date = loan.date
-                item.to_return_date = loan.deadline
-                await item.asave()
-
-            for item in notfound_books:
-                if item.status == OrderItem.Status.ORDERED:
-                    item.status = OrderItem.Status.CANCELLED
-                    await item.asave()
-            
-            books_to_return = await self.get_borroweds(order)
-
-            async for book in books_to_return:
-                if book.book_id not in loans_id_list:
-                    book.status = OrderItem.Status.RETURNED
-                    book.returned_date = datetime.now()
+            reconciliation = await reconcile_order(self.context["client_session"], order, profile.library_card)
+            await reconciliation.save_done()
 
             await OrderHistory.objects.acreate(
                 order=instance, status=OrderHistory.Status.DONE, description=new_status["description"], staff=user
             )
+            # Выдача и возврат меняют статус читателя (задолженность)
+            invalidate_reader(profile.library_card, profile.mira_id)
 
         elif new_status["status"] == OrderHistory.Status.CANCELLED:
             order_items_list: list[OrderItem] = OrderItem.objects.filter(order=instance).all()
@@ -258,14 +217,6 @@ class UpdateOrderSerializer(aserializers.Serializer):
             )
 
         return validated_data
-    
-    @sync_to_async
-    def get_order_items(self, order):
-        return OrderItem.objects.prefetch_related("order").filter(order=order).all()
-    
-    @sync_to_async
-    def get_borroweds(self, order):
-        return OrderItem.objects.filter(order_to_return = order).all()
 
 
 class CheckOrderSerializer(aserializers.Serializer):
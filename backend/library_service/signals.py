@@ -1,10 +1,12 @@
 from django.contrib.auth.models import Group
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_migrate, post_save
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
 
 from library_service.models.user import UserProfile
 from library_service.models.catalog import Library, LibraryDatabase
+from library_service.feeds import reference_data
+from library_service.opac.topology import invalidate_topology
 
 # TODO: async??
 
@@ -31,6 +33,13 @@ def save_user_profile(sender, instance, **kwargs):  # pylint: disable=unused-arg
         UserProfile.objects.create(user=instance)
 
 
+@receiver([post_save, post_delete], sender=Library)
+@receiver([post_save, post_delete], sender=LibraryDatabase)
+def reset_catalog_topology(sender, **kwargs):  # pylint: disable=unused-argument
+    invalidate_topology()
+    reference_data.expire()
+
+
 @receiver(post_migrate)
 def create_default_libraries(sender, **kwargs):
     if not Library.objects.exists():
@@ -39,3 +39,18 @@ def setup_database(django_db_setup, django_db_blocker):  # pylint: disable=unuse
 async def client_session():
     async with ClientSession() as client:
         yield client
+
+
+# Часы для кэшей, предохранителей и фоновых обновлений: время двигает сам тест через now
+# pylint: disable-next=too-few-public-methods
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock() -> FakeClock:
+    return FakeClock()
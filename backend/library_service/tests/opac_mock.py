@@ -1,10 +1,14 @@
 from enum import Enum
+import struct
+import zlib
+
 from aiohttp import web
 
 from library_service.opac.api.announces import OpacAnnounce
 from library_service.opac.api.book import OpacBook, OpacBookExemplar, OpacBookInfo
 from library_service.opac.api.databases import OpacDatabase
 from library_service.opac.api.scenarios import OpacScenario
+from library_service.opac.api.ticket import OpacReader
 
 PORT = 3740
 
@@ -15,6 +19,13 @@ SCENARIOS: list[OpacScenario] = [
     OpacScenario("IN=", "exemplar id"),
 ]
 
+READERS: list[OpacReader] = [
+    OpacReader("T1", "Иванов Иван", True, False, False, False, False, department="ИИТиАД"),
+    OpacReader("T2", "Петров Петр", False, True, False, False, False),
+]
+# mira id -> номер билета
+READERS_MIRA: dict[str, str] = {"101": "T1", "102": "T2"}
+
 
 class BookId(Enum):
     ISTU_AAAA_XXXX = "ISTU_1"
@@ -42,6 +53,7 @@ BOOKS: list[OpacBook] = [
         True,
         2025,
         [OpacBookExemplar("1235", 1, "ok")],
+        cover="/covers/broken.jpg",
     ),
     OpacBook(
         BookId.ISTU_CCCC_ZZZZ.value,
@@ -50,6 +62,7 @@ BOOKS: list[OpacBook] = [
         True,
         2025,
         [OpacBookExemplar("1236", 1, "ok")],
+        cover="/covers/istu3.png",
     ),
     OpacBook(
         BookId.NTD_AAAA_XXXX.value,
@@ -85,6 +98,12 @@ BOOKS: list[OpacBook] = [
     ),
 ]
 
+# БД с разрывом в MFN (записи 2-8 удалены) для загрузки зеркала; не зарегистрирована ни в одной библиотеке
+GAP_BOOKS: list[OpacBook] = [
+    OpacBook(f"GAPS_{mfn}", "", OpacBookInfo(["GGGG"], [], [f"GAP {mfn}"], [], [], [], [], [], [], []), True, 2025, [])
+    for mfn in (1, 9)
+]
+
 ANNOUNCES = [
     OpacAnnounce("/opac/index.html?db=ISTU&expression=IN=1235"),
     OpacAnnounce("/opac/index.html?db=ISTU&expression=IN=1236"),
@@ -107,12 +126,62 @@ def announces(request: web.Request):
     return web.json_response(OpacAnnounce.schema().dump(ANNOUNCES, many=True))
 
 
+def reader_response(ticket: str | None):
+    readers = [reader for reader in READERS if reader.ticket == ticket]
+    if not readers:
+        raise web.HTTPNotFound()
+    return web.json_response(readers[0].to_dict())
+
+
+def reader_by_ticket(request: web.Request):
+    return reader_response(request.match_info["ticket"])
+
+
+def reader_by_mira(request: web.Request):
+    return reader_response(READERS_MIRA.get(request.match_info["mira"]))
+
+
+# Однотонная PNG-картинка без зависимости от Pillow
+def make_png(width: int, height: int) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + b"\x80\x40\x20" * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+COVERS = {"istu3.png": (make_png(400, 600), "image/png"), "broken.jpg": (b"not an image", "image/jpeg")}
+
+
+def cover(request: web.Request):
+    if request.match_info["name"] not in COVERS:
+        raise web.HTTPNotFound()
+    body, content_type = COVERS[request.match_info["name"]]
+    return web.Response(body=body, content_type=content_type)
+
+
 def book_retrieve(request: web.Request):
     database = request.match_info["database"]
     mfn = request.match_info["mfn"]
     book_id = f"{database}_{mfn}"
-    book = [book for book in BOOKS if book.id == book_id][0]
-    return web.json_response(book.to_dict())
+    books = [book for book in BOOKS + GAP_BOOKS if book.id == book_id]
+    if not books:
+        raise web.HTTPNotFound()
+    return web.json_response(books[0].to_dict())
+
+
+# В моке идентификатор записи из выдачи совпадает с MFN
+def book_retrieve_by_id(request: web.Request):
+    book_id = f"{request.query.get('db')}_{request.query.get('id')}"
+    books = [book for book in BOOKS if book.id == book_id]
+    if not books:
+        raise web.HTTPNotFound()
+    return web.json_response(books[0].to_dict())
 
 
 async def search(request: web.Request):
@@ -125,7 +194,7 @@ async def search(request: web.Request):
     # NOTE: this is technically an incorrect type hint
     # (it's a list of lists, not a list of tuples)
     possible_books: list[tuple[OpacBook, bool, bool]] = [
-        [book, False, True] for book in BOOKS if book.id.split("_")[0] == database
+        [book, False, True] for book in BOOKS + GAP_BOOKS if book.id.split("_")[0] == database
     ]
 
     # pylint: disable-next=too-many-nested-blocks
@@ -146,6 +215,8 @@ async def search(request: web.Request):
                             book[2] &= expression in book[0].info.title
                     elif scenario == "IN":
                         book[2] &= any(exemplar.number == expression for exemplar in book[0].exemplars)
+                    elif scenario == "MFN":
+                        book[2] &= book[0].id.split("_")[1] == expression
 
         for book in possible_books:
             book[1] |= book[2]
@@ -162,7 +233,11 @@ def run_server():
             web.get("/api/scenarios/{database}", scenarios),
             web.get("/api/announces", announces),
             web.get("/api/books/by/mfn/{database}/{mfn}", book_retrieve),
+            web.get("/api/books/", book_retrieve_by_id),
+            web.get("/covers/{name}", cover),
             web.post("/api/search", search),
+            web.get("/api/readers/internal/{ticket}", reader_by_ticket),
+            web.get("/api/readers/mira/internal/{mira}", reader_by_mira),
         ]
     )
     web.run_app(app=app, port=PORT)
@@ -4,6 +4,7 @@ from library_service.tests import opac_mock
 # Use mock OPAC for tests
 OPAC_HOSTNAME = f"http://localhost:{opac_mock.PORT}"
 OPAC_INTERNAL_TOKEN = "internal-token"
+OPAC_BATCH_RETRIEVE = {"MFN_SEARCH_PREFIX": "MFN=", "MAX_IDS_PER_SEARCH": 2}
 
 # Override URL configuration to use TokenObtainPairView instead of OPAC-based auth
 ROOT_URLCONF = "library_service.tests.urls"
@@ -0,0 +1,260 @@
+import copy
+from dataclasses import FrozenInstanceError, replace
+import pickle
+
+from aiohttp import ClientConnectionError, ClientSession
+import pytest
+
+from library_service.models.catalog import Library, LibraryDatabase
+from library_service.opac.api.book import OpacBook, OpacBookInfo, OpacBookLink
+from library_service.opac import book as book_module
+from library_service.opac.api import book as api_book_module
+from library_service.opac.book import (
+    Book,
+    BookHolding,
+    book_retrieve_many,
+    books_list,
+    merge_results,
+    record_cache,
+    search_cache,
+    search_retrieve,
+)
+from library_service.opac.singleflight import single_flight
+from library_service.opac.topology import CatalogTopology, UnknownDatabaseError, aget_topology
+from library_service.tests.opac_mock import BookId
+
+
+@pytest.mark.django_db
+async def test_book_retrieve_many(client_session: ClientSession):
+    record_cache.clear()
+
+    ids = [
+        BookId.ZIMA_AAAA_XXXX.value,
+        BookId.ISTU_AAAA_XXXX.value,
+        "ISU_1",
+        BookId.ISTU_BBBB_YYYY.value,
+        BookId.ZIMA_AAAA_XXXX.value,
+        "ISTU_404",
+        "invalid",
+        BookId.ISTU_CCCC_ZZZZ.value,
+    ]
+    books = await book_retrieve_many(client_session, ids)
+
+    assert [book.id if book is not None else None for book in books] == [
+        BookId.ZIMA_AAAA_XXXX.value,
+        BookId.ISTU_AAAA_XXXX.value,
+        None,
+        BookId.ISTU_BBBB_YYYY.value,
+        BookId.ZIMA_AAAA_XXXX.value,
+        None,
+        None,
+        BookId.ISTU_CCCC_ZZZZ.value,
+    ]
+    assert books[0] == books[4]
+
+
+@pytest.mark.django_db
+async def test_book_retrieve_many_error(client_session: ClientSession, monkeypatch):
+    record_cache.clear()
+
+    async def unavailable(*args):
+        raise ClientConnectionError()
+
+    # Ошибка соединения с OPAC - не отсутствие книги: она пробрасывается, а не превращается в None
+    monkeypatch.setattr(api_book_module, "opac_search", unavailable)
+    monkeypatch.setattr(api_book_module, "opac_book_retrieve", unavailable)
+    with pytest.raises(ClientConnectionError):
+        await book_retrieve_many(client_session, [BookId.ISTU_AAAA_XXXX.value, "ISTU_404"])
+
+
+@pytest.mark.django_db
+async def test_book_retrieve_many_uses_cache(client_session: ClientSession):
+    record_cache.clear()
+    ids = [BookId.ISTU_AAAA_XXXX.value, BookId.NTD_AAAA_XXXX.value]
+
+    await book_retrieve_many(client_session, ids)
+    calls = single_flight.calls
+    books = await book_retrieve_many(client_session, ids)
+
+    assert [book.id for book in books] == ids
+    assert single_flight.calls == calls
+
+
+def test_topology_from_pairs():
+    topology = CatalogTopology.from_pairs([("ISTU", 1), ("NTD", 1), ("ZIMA", 2), ("ISTU", 2)])
+
+    assert topology.library_of("ISTU") == 1
+    assert topology.databases() == [(1, "ISTU"), (1, "NTD"), (2, "ZIMA"), (2, "ISTU")]
+    assert topology.databases(2) == [(2, "ZIMA"), (2, "ISTU")]
+    assert topology.databases(3) == []
+    assert topology.has_database("NTD", 1)
+    assert not topology.has_database("NTD", 2)
+
+    with pytest.raises(UnknownDatabaseError):
+        topology.library_of("ISU")
+
+
+@pytest.mark.django_db
+async def test_topology_invalidated_on_save():
+    # Асинхронный ORM работает вне транзакции теста, поэтому библиотека удаляется явно
+    library = await Library.objects.acreate(description="TOPOLOGY_LIB")
+    try:
+        await LibraryDatabase.objects.acreate(library=library, database="TOPO")
+        assert (await aget_topology()).library_of("TOPO") == library.id
+
+        await LibraryDatabase.objects.filter(database="TOPO").adelete()
+        assert not (await aget_topology()).has_database("TOPO")
+    finally:
+        await library.adelete()
+
+
+@pytest.mark.django_db
+async def test_books_list_cached(client_session: ClientSession):
+    search_cache.clear()
+
+    first = await books_list(client_session, "a=aaaa")
+    stats = search_cache.stats()
+    second = await books_list(client_session, " (A=AAAA) ")
+
+    # БД может быть зарегистрирована в нескольких библиотеках (интеграционные фикстуры добавляют свои),
+    # поэтому проверяется, что повторный поиск целиком отдан из кэша, а не точное число попаданий
+    assert [book.id for book in first] == [book.id for book in second]
+    assert search_cache.stats()["misses"] == stats["misses"]
+    assert search_cache.stats()["hits_by_group"].get("ZIMA", 0) > stats["hits_by_group"].get("ZIMA", 0)
+
+
+@pytest.mark.django_db
+async def test_books_list_sends_original_expression(client_session: ClientSession, monkeypatch):
+    search_cache.clear()
+    sent = []
+    opac_search = book_module.opac_search
+
+    async def search(client: ClientSession, database: str, expression: str):
+        sent.append(expression)
+        return await opac_search(client, database, expression)
+
+    monkeypatch.setattr(book_module, "opac_search", search)
+
+    # Нормализация - только ключ кэша: в OPAC уходит выражение пользователя
+    await books_list(client_session, " (a=aaaa) ")
+    assert set(sent) == {" (a=aaaa) "}
+    assert ("ZIMA", "A=AAAA") in search_cache
+
+
+async def test_search_retrieve_split(client_session: ClientSession):
+    search_cache.clear()
+
+    expression = "A=AAAA*T=XXXX+A=BBBB*T=XXXX"
+    unsplit = await search_retrieve(client_session, "ZIMA", expression, split=False)
+    search_cache.clear()
+    split = await search_retrieve(client_session, "ZIMA", expression)
+
+    assert [book.id for book in split] == [book.id for book in unsplit]
+    assert ("ZIMA", "A=AAAA*T=XXXX") in search_cache
+    assert ("ZIMA", "A=BBBB*T=XXXX") in search_cache
+
+    # Общая ветвь берется из кэша, в OPAC идет только новая
+    misses = search_cache.stats()["misses"]
+    overlapping = await search_retrieve(client_session, "ZIMA", "A=AAAA*T=XXXX+A=AAAA")
+    assert search_cache.stats()["misses"] == misses + 2
+    assert [book.id for book in overlapping] == [BookId.ZIMA_AAAA_XXXX.value]
+
+
+async def test_search_retrieve_split_order(client_session: ClientSession):
+    search_cache.clear()
+
+    # Ветви в алфавитном порядке дают ISTU_2, ISTU_1, ISTU_3 - выдача должна идти в порядке MFN, как у OPAC
+    expression = "A=BBBB+T=XXXX+T=ZZZZ"
+    unsplit = await search_retrieve(client_session, "ISTU", expression, split=False)
+    search_cache.clear()
+    split = await search_retrieve(client_session, "ISTU", expression)
+
+    assert [book.id for book in split] == [book.id for book in unsplit] == ["ISTU_1", "ISTU_2", "ISTU_3"]
+
+
+def make_book(book_id: str, title: str, author: str = "", isbn: list[str] | None = None, year: int = 2025) -> Book:
+    info = OpacBookInfo([author] if author else [], [], [title], isbn or [], [], [], [], [], [], [])
+    return Book.from_opac(OpacBook(book_id, "", info, True, year, []), 1)
+
+
+def test_merge_results():
+    istu = [
+        make_book("ISTU_1", "Математика", "Иванов"),
+        make_book("ISTU_2", "Физика", isbn=["978-5-02-000001-1"]),
+        make_book("ISTU_3", "Химия"),
+    ]
+    ntd = [
+        make_book("NTD_1", "Физика. ", isbn=["9785020000011"], year=2020),
+        make_book("NTD_2", " МАТЕМАТИКА", "иванов"),
+        make_book("NTD_3", "Математика", "Иванов", year=2000),
+    ]
+
+    merged = merge_results([istu, ntd])
+
+    # NTD_1 стоит выше ISTU_2 в своей выдаче, поэтому становится основной записью
+    assert [book.id for book in merged] == ["ISTU_1", "NTD_1", "ISTU_3", "NTD_3"]
+    assert [holding.id for holding in merged[0].holdings] == ["ISTU_1", "NTD_2"]
+    assert [holding.id for holding in merged[1].holdings] == ["NTD_1", "ISTU_2"]
+    # Исходные записи не меняются
+    assert [holding.id for holding in istu[0].holdings] == ["ISTU_1"]
+    assert merged[2] is istu[2]
+
+
+def test_merge_results_same_database():
+    # Тома одного издания в одной БД: общие название, автор, год и ISBN комплекта
+    istu = [
+        make_book("ISTU_1", "Собрание сочинений", "Толстой", ["978-5-00-000000-1"], 1990),
+        make_book("ISTU_2", "Собрание сочинений", "Толстой", ["978-5-00-000000-1"], 1990),
+    ]
+    ntd = [
+        make_book("NTD_1", "Собрание сочинений", "Толстой", ["978-5-00-000000-1"], 1990),
+        make_book("NTD_2", "Собрание сочинений", "Толстой", ["978-5-00-000000-1"], 1990),
+        make_book("NTD_3", "Собрание сочинений", "Толстой", ["978-5-00-000000-1"], 1990),
+    ]
+
+    merged = merge_results([istu, ntd])
+
+    # Записи одной БД не сворачиваются друг в друга; из другой БД в каждую сворачивается не больше одной
+    assert [book.id for book in merged] == ["ISTU_1", "ISTU_2", "NTD_3"]
+    assert [holding.id for holding in merged[0].holdings] == ["ISTU_1", "NTD_1"]
+    assert [holding.id for holding in merged[1].holdings] == ["ISTU_2", "NTD_2"]
+
+    # Та же запись из БД, зарегистрированной в двух библиотеках, сворачивается
+    first = make_book("ISTU_1", "Физика")
+    second = first.with_holdings((BookHolding(2, "ISTU_1", 0, True),))
+    merged = merge_results([[first], [second]])
+    assert [(holding.library, holding.id) for holding in merged[0].holdings] == [(1, "ISTU_1"), (2, "ISTU_1")]
+
+
+def test_merge_results_interleaves_databases():
+    first = [make_book(f"ISTU_{i}", f"A{i}") for i in range(3)]
+    second = [make_book(f"NTD_{i}", f"B{i}") for i in range(2)]
+
+    merged = merge_results([first, second])
+
+    assert [book.id for book in merged] == ["ISTU_0", "NTD_0", "ISTU_1", "NTD_1", "ISTU_2"]
+
+
+def test_book_immutable():
+    info = OpacBookInfo(["AAAA"], [], ["XXXX"], [], [], [], [], [], [], [])
+    record = OpacBook("ISTU/1", "", info, True, 2025, [], links=[OpacBookLink("http://link")], cover="/covers/1.jpg")
+    book = Book.from_opac(record, 1)
+
+    assert book.id == "ISTU_1"
+    assert book.cover == "/uz/api/cover/ISTU_1/"
+    assert book.links[0].url == "http://link"
+    assert book.author is info.author
+    assert not hasattr(book, "__dict__")
+
+    with pytest.raises(FrozenInstanceError):
+        book.copies = 2
+
+    doubled = book.with_holdings(book.holdings * 2)
+    assert len(doubled.holdings) == 2 and len(book.holdings) == 1
+    assert doubled == Book.from_opac(record, 1).with_holdings(book.holdings * 2)
+
+    # Обычный датакласс: копирование, pickle (кэши, процессы) и replace работают
+    assert copy.copy(book) == book
+    assert copy.deepcopy(book) == book
+    assert pickle.loads(pickle.dumps(book)) == book
+    assert replace(book, year=2000).year == 2000
@@ -1,8 +1,15 @@
+import json
 from typing import Literal
-from django.test import Client
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.test import Client, override_settings
 import pytest
 
+from library_service.models.catalog import LibraryDatabase
+from library_service.opac.api.databases import OpacDatabase
 from library_service.opac.api.scenarios import OpacScenario
+from library_service.opac.singleflight import single_flight
 from library_service.tests import opac_mock
 from library_service.tests.opac_mock import BookId
 
@@ -13,6 +20,22 @@ def get_library_id(client: Client, library: Literal["ISTU_LIB"] | Literal["ZIMA_
     return [i["id"] for i in json if i["description"] == library][0]
 
 
+# Ожидаемые фонды (библиотека, id) по тому, в каких библиотеках зарегистрированы БД книг
+# (ISTU есть и в библиотеке из миграции, и в ISTU_LIB фикстуры, интеграционные фикстуры добавляют свои)
+def expected_holdings(*book_ids: str) -> list[tuple[int, str]]:
+    return sorted(
+        (library_id, book_id)
+        for book_id in book_ids
+        for library_id in LibraryDatabase.objects.filter(database=book_id.split("_")[0]).values_list(
+            "library_id", flat=True
+        )
+    )
+
+
+def holdings(book: dict) -> list[tuple[int, str]]:
+    return sorted((holding["library"], holding["id"]) for holding in book["holdings"])
+
+
 @pytest.mark.django_db
 def test_libraries(client: Client):
     response = client.get("/api/library/")
@@ -31,6 +54,7 @@ def test_libraries(client: Client):
         assert json["description"] == library
 
 
+@pytest.mark.django_db
 def test_scenarios(client: Client):
     response = client.get("/api/scenario/")
     json = response.json()
@@ -38,6 +62,31 @@ def test_scenarios(client: Client):
     assert json == OpacScenario.schema().dump(opac_mock.SCENARIOS, many=True)
 
 
+@pytest.mark.django_db
+def test_scenarios_by_database(client: Client):
+    response = client.get("/api/scenario/", {"database": "ISTU"})
+    assert response.json() == OpacScenario.schema().dump(opac_mock.SCENARIOS, many=True)
+
+    response = client.get("/api/scenario/", {"database": "UNKNOWN"})
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_scenarios_etag(client: Client):
+    response = client.get("/api/scenario/")
+    etag = response["ETag"]
+
+    response = client.get("/api/scenario/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+
+@pytest.mark.django_db
+def test_databases(client: Client):
+    response = client.get("/api/database/")
+    assert response.json() == OpacDatabase.schema().dump(opac_mock.DATABASES, many=True)
+
+
 @pytest.mark.django_db
 def test_announcements(client: Client):
     response = client.get("/api/book/announcement/")
@@ -71,7 +120,16 @@ def test_search_all(client: Client):
     response = client.get("/api/book/", {"expression": "T=$"})
     json = response.json()
 
-    assert [book["id"] for book in json] == [book.id for book in opac_mock.BOOKS]
+    # Одинаковые книги из разных БД объединены, лучшие совпадения каждой БД идут первыми
+    assert [book["id"] for book in json] == [
+        BookId.ISTU_AAAA_XXXX.value,
+        BookId.ISTU_BBBB_YYYY.value,
+        BookId.ZIMA_BBBB_XXXX.value,
+        BookId.ISTU_CCCC_ZZZZ.value,
+    ]
+    assert holdings(json[0]) == expected_holdings(
+        BookId.ISTU_AAAA_XXXX.value, BookId.NTD_AAAA_XXXX.value, BookId.ZIMA_AAAA_XXXX.value
+    )
 
 
 @pytest.mark.django_db
@@ -80,7 +138,13 @@ def test_search_library(client: Client):
     json = response.json()
 
     assert [book["id"] for book in json] == [
-        book.id for book in opac_mock.BOOKS if book.id.startswith("ISTU") or book.id.startswith("NTD")
+        BookId.ISTU_AAAA_XXXX.value,
+        BookId.ISTU_BBBB_YYYY.value,
+        BookId.ISTU_CCCC_ZZZZ.value,
+    ]
+    assert [holding["id"] for holding in json[1]["holdings"]] == [
+        BookId.ISTU_BBBB_YYYY.value,
+        BookId.NTD_BBBB_AAA_YYYY.value,
     ]
 
 
@@ -95,16 +159,85 @@ def test_search_and_none(client: Client):
 def test_search_and_or(client: Client):
     response = client.get("/api/book/", {"expression": "A=AAAA*T=XXXX+A=BBBB*T=YYYY"})
     json = response.json()
-    assert [book["id"] for book in json] == [
-        BookId.ISTU_AAAA_XXXX.value,
-        BookId.ISTU_BBBB_YYYY.value,
-        BookId.NTD_AAAA_XXXX.value,
-        BookId.NTD_BBBB_AAA_YYYY.value,
-        BookId.ZIMA_AAAA_XXXX.value,
-    ]
+    assert [book["id"] for book in json] == [BookId.ISTU_AAAA_XXXX.value, BookId.ISTU_BBBB_YYYY.value]
+    assert holdings(json[0]) == expected_holdings(
+        BookId.ISTU_AAAA_XXXX.value, BookId.NTD_AAAA_XXXX.value, BookId.ZIMA_AAAA_XXXX.value
+    )
+    assert holdings(json[1]) == expected_holdings(BookId.ISTU_BBBB_YYYY.value, BookId.NTD_BBBB_AAA_YYYY.value)
 
 
 @pytest.mark.django_db
 def test_search_no_expression(client: Client):
     response = client.get("/api/book/")
     assert response.status_code == 400
+
+
+# Ссылки на страницы абсолютные и включают FORCE_SCRIPT_NAME, тестовый клиент ждет путь без него
+def follow(client: Client, url: str):
+    parts = urlsplit(url)
+    return client.get(f"{parts.path.removeprefix(settings.FORCE_SCRIPT_NAME or '')}?{parts.query}")
+
+
+@pytest.mark.django_db
+def test_search_pages(client: Client):
+    expected = [book["id"] for book in client.get("/api/book/", {"expression": "T=$"}).json()]
+
+    response = client.get("/api/book/", {"expression": "T=$", "page_size": 3})
+    page = response.json()
+    assert page["count"] == len(expected)
+    assert page["previous"] is None
+
+    ids = [book["id"] for book in page["results"]]
+    calls = single_flight.calls
+    while page["next"] is not None:
+        page = follow(client, page["next"]).json()
+        assert len(page["results"]) <= 3
+        ids += [book["id"] for book in page["results"]]
+
+    assert ids == expected
+    # Следующие страницы берутся из сохраненной выдачи без обращения к OPAC
+    assert single_flight.calls == calls
+
+
+@pytest.mark.django_db
+def test_search_pages_invalid_cursor(client: Client):
+    page = client.get("/api/book/", {"expression": "T=$", "page_size": 1}).json()
+    cursor = page["next"].split("cursor=")[1].split("&")[0]
+
+    response = client.get("/api/book/", {"expression": "T=$", "cursor": cursor + "x"})
+    assert response.status_code == 400
+
+    # Курсор от другого запроса
+    response = client.get("/api/book/", {"expression": "A=AAAA", "cursor": cursor})
+    assert response.status_code == 400
+
+    response = client.get("/api/book/", {"expression": "T=$", "page_size": 0})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@override_settings(CATALOG_SEARCH_PAGINATION={"PAGE_SIZE": 2, "MAX_PAGE_SIZE": 4})
+def test_search_page_size_cap(client: Client):
+    assert len(client.get("/api/book/", {"expression": "T=$", "cursor": ""}).json()["results"]) == 2
+    assert len(client.get("/api/book/", {"expression": "T=$", "page_size": 100}).json()["results"]) == 4
+
+
+@pytest.mark.django_db
+def test_search_stream(client: Client):
+    response = client.get("/api/book/stream/", {"expression": "T=$"})
+    assert response["Content-Type"] == "application/x-ndjson"
+    assert response["X-Accel-Buffering"] == "no"
+
+    records = [json.loads(line) for line in b"".join(response).splitlines()]
+    batches = [record for record in records if record["type"] == "books"]
+
+    assert records[-1]["type"] == "summary"
+    assert records[-1]["failed"] == []
+    assert records[-1]["total"] == sum(len(batch["books"]) for batch in batches)
+    assert {book["id"] for batch in batches for book in batch["books"]} == {book.id for book in opac_mock.BOOKS}
+
+
+@pytest.mark.django_db
+def test_search_stream_no_expression(client: Client):
+    response = client.get("/api/book/stream/")
+    assert response.status_code == 400
@@ -0,0 +1,68 @@
+from django.test import Client
+from django.urls import reverse, set_script_prefix
+import pytest
+
+from library_service.covers import THUMBNAIL_SUFFIX, content_path
+from library_service.opac.book import Book
+from library_service.thumbnails import Image
+from library_service.tests import opac_mock
+from library_service.tests.opac_mock import BookId
+
+
+@pytest.fixture(autouse=True)
+def covers_root(settings, tmp_path):
+    settings.COVERS = {**settings.COVERS, "ROOT": tmp_path, "THUMBNAIL_SIZE": (100, 150)}
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_cover_thumbnail(client: Client):
+    response = client.get(f"/api/cover/{BookId.ISTU_CCCC_ZZZZ.value}/")
+
+    assert response.status_code == 200
+    assert "max-age" in response["Cache-Control"]
+    if Image is not None:
+        assert response["Content-Type"] == "image/jpeg"
+        with Image.open(content_path(response["ETag"].strip('"').removesuffix("-thumb"), THUMBNAIL_SUFFIX)) as image:
+            assert image.size == (100, 150)
+
+    response = client.get(f"/api/cover/{BookId.ISTU_CCCC_ZZZZ.value}/", headers={"If-None-Match": response["ETag"]})
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_cover_full(client: Client):
+    response = client.get(f"/api/cover/{BookId.ISTU_CCCC_ZZZZ.value}/", {"size": "full"})
+
+    assert response.status_code == 200
+    assert response.content == opac_mock.COVERS["istu3.png"][0]
+    assert response["Content-Type"] == "image/png"
+
+
+@pytest.mark.django_db
+def test_cover_not_an_image(client: Client):
+    response = client.get(f"/api/cover/{BookId.ISTU_BBBB_YYYY.value}/")
+
+    # Миниатюру сделать нельзя - отдается исходный файл
+    assert response.status_code == 200
+    assert response.content == b"not an image"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("book_id", [BookId.ISTU_AAAA_XXXX.value, "ISTU_404", "..", "a_b_c"])
+def test_cover_not_found(client: Client, book_id: str):
+    response = client.get(f"/api/cover/{book_id}/")
+    assert response.status_code == 404
+
+
+# Клиент обращается к API под FORCE_SCRIPT_NAME (/uz/), поэтому ссылка на обложку включает этот префикс
+def test_book_cover_url():
+    book = next(book for book in opac_mock.BOOKS if book.id == BookId.ISTU_CCCC_ZZZZ.value)
+    cover = Book.from_opac(book, 1).cover
+    assert cover == f"/uz/api/cover/{BookId.ISTU_CCCC_ZZZZ.value}/"
+
+    set_script_prefix("/uz/")
+    try:
+        assert cover == reverse("cover", "app.urls", kwargs={"book_id": BookId.ISTU_CCCC_ZZZZ.value})
+    finally:
+        set_script_prefix("/")
@@ -0,0 +1,72 @@
+from django.test import Client
+import pytest
+
+from library_service.opac.api.book import OpacBook, OpacBookInfo
+from library_service.opac.book import Book
+from library_service.opac.facets import aggregate_facets, filter_books, parse_facets
+from library_service.opac.singleflight import single_flight
+from library_service.tests.opac_mock import BookId
+
+
+def make_book(book_id: str, year: int, language: list[str], subject: list[str]) -> Book:
+    info = OpacBookInfo([], [], [book_id], [], language, [], [], [], subject, [])
+    return Book.from_opac(OpacBook(book_id, "", info, True, year, []), 1)
+
+
+BOOKS = [
+    make_book("ISTU_1", 2020, ["rus"], ["Математика", "Физика"]),
+    make_book("ISTU_2", 2021, ["rus", "eng"], ["Физика"]),
+    make_book("ISTU_3", 2020, ["eng"], ["Химия"]),
+    make_book("ISTU_4", 2019, ["rus", "rus"], []),
+]
+
+
+def test_parse_facets():
+    assert parse_facets(None) == []
+    assert parse_facets("") == ["year", "language", "author", "publisher", "subject"]
+    assert parse_facets("subject,year,unknown") == ["year", "subject"]
+
+
+def test_aggregate_facets():
+    facets = aggregate_facets(BOOKS, ["year", "language", "subject"], limit=1)
+
+    assert facets["year"] == [
+        {"value": 2019, "count": 1},
+        {"value": 2020, "count": 2},
+        {"value": 2021, "count": 1},
+    ]
+    assert facets["language"] == [{"value": "rus", "count": 3}]
+    assert facets["subject"] == [{"value": "Физика", "count": 2}]
+
+
+def test_filter_books():
+    assert [book.id for book in filter_books(BOOKS, {"year": {"2020", "2021"}, "language": {"eng"}})] == [
+        "ISTU_2",
+        "ISTU_3",
+    ]
+    assert filter_books(BOOKS, {}) == BOOKS
+
+
+@pytest.mark.django_db
+def test_search_facets(client: Client):
+    response = client.get("/api/book/", {"expression": "T=$", "facets": "year,author"})
+    json = response.json()
+
+    assert json["facets"]["year"] == [{"value": 2025, "count": json["count"]}]
+    assert {"value": "CCCC", "count": 1} in json["facets"]["author"]
+
+    # Уточнение по фасету считается по сохраненной выдаче
+    calls = single_flight.calls
+    response = client.get("/api/book/", {"expression": "T=$", "author": "CCCC", "facets": "author"})
+    json = response.json()
+
+    assert [book["id"] for book in json["results"]] == [BookId.ISTU_CCCC_ZZZZ.value]
+    assert json["facets"]["author"] == [{"value": "CCCC", "count": 1}]
+    assert single_flight.calls == calls
+
+
+@pytest.mark.django_db
+def test_search_filter_without_facets(client: Client):
+    response = client.get("/api/book/", {"expression": "T=$", "author": ["CCCC", "AAAA"]})
+
+    assert [book["id"] for book in response.json()] == [BookId.ISTU_AAAA_XXXX.value, BookId.ISTU_CCCC_ZZZZ.value]
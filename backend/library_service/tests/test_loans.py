@@ -0,0 +1,41 @@
+from aiohttp import ClientSession
+import pytest
+
+from library_service.models.catalog import Library, LibraryDatabase, LoanRecord
+from library_service.opac.api.ticket import OpacLoan
+from library_service.opac.loans import loan_cache, resolve_loans
+from library_service.opac.singleflight import single_flight
+from library_service.tests.opac_mock import BookId
+
+
+def make_loan(database: str, record: str) -> OpacLoan:
+    return OpacLoan("loan", False, True, database, record, "1", "20250101", "20250201", 0)
+
+
+@pytest.mark.django_db
+async def test_resolve_loans(client_session: ClientSession):
+    # Асинхронный ORM работает вне транзакции теста, поэтому созданное удаляется явно
+    library = await Library.objects.acreate(description="Test", address="Test")
+    try:
+        await LibraryDatabase.objects.acreate(database="NTD", library=library)
+        loan_cache.clear()
+
+        loans = [make_loan("ISTU", "1"), make_loan("ISTU", "2"), make_loan("NTD", "1"), make_loan("ISTU", "404")]
+        resolved = await resolve_loans(client_session, loans)
+
+        assert resolved == {
+            ("ISTU", "1"): BookId.ISTU_AAAA_XXXX.value,
+            ("ISTU", "2"): BookId.ISTU_BBBB_YYYY.value,
+            ("NTD", "1"): BookId.NTD_AAAA_XXXX.value,
+        }
+        assert await LoanRecord.objects.acount() == 3
+        assert len(loan_cache) == 3
+
+        # Повторно - без обращений к OPAC, в том числе после перезапуска процесса
+        loan_cache.clear()
+        calls = single_flight.calls
+        assert await resolve_loans(client_session, loans[:3]) == resolved
+        assert single_flight.calls == calls
+    finally:
+        await LoanRecord.objects.all().adelete()
+        await library.adelete()
@@ -0,0 +1,142 @@
+from aiohttp import ClientError, ClientSession
+from django.test import override_settings
+from django.utils import timezone
+import pytest
+
+from library_service.models.catalog import MirrorRecord, MirrorWatermark
+from library_service.opac.api.book import opac_search
+from library_service.opac.api.expression import parse
+from library_service.opac import mirror
+from library_service.opac.book import books_list, search_cache
+from library_service.opac.mirror import fts5_query, harvest_catalog, harvest_database, mirror_search, tsquery
+from library_service.opac.singleflight import single_flight
+
+
+# Асинхронные запросы к БД идут вне транзакции теста, поэтому зеркало чистится явно.
+# Пачки маленькие: в тестах mock OPAC отдает по 2 записи на поиск по MFN
+@pytest.fixture(autouse=True)
+async def clean_mirror(db, settings):  # pylint: disable=unused-argument
+    settings.CATALOG_MIRROR = {**settings.CATALOG_MIRROR, "BATCH_SIZE": 4}
+    await MirrorWatermark.objects.all().adelete()
+    await MirrorRecord.objects.all().adelete()
+
+
+def test_fulltext_queries():
+    assert fts5_query(parse("A=AAA$")) == 'author : "aaa" *'
+    assert fts5_query(parse('"T=ВОЙНА  И МИР"')) == 'title : "война и мир"'
+    assert fts5_query(parse("A=AAAA*T=XXXX+A=BBBB")) == '((author : "aaaa" AND title : "xxxx") OR author : "bbbb")'
+    assert fts5_query(parse("A=AAAA^T=XXXX")) == 'author : "aaaa"'
+    assert fts5_query(parse("T=$")) is None
+    assert fts5_query(parse("T=$+A=AAAA")) is None
+    assert fts5_query(parse("T=$*A=AAAA")) == '(author : "aaaa")'
+
+    assert tsquery(parse('"T=ВОЙНА И МИР$"')) == "(война:B <-> и:B <-> мир:*B)"
+    assert tsquery(parse("A=AAAA+S=XX")) == "((aaaa:A) | (xx:C))"
+
+
+@pytest.mark.django_db
+async def test_harvest(client_session: ClientSession, settings):
+    assert await mirror_search("ISTU", "T=$") is None
+
+    with override_settings(CATALOG_MIRROR={**settings.CATALOG_MIRROR, "BATCH_SIZE": 2, "RECHECK": 1}):
+        results = await harvest_catalog(client_session, ["ISTU", "ZIMA", "EMPTY"])
+        assert [(result.database, result.harvested, result.watermark) for result in results] == [
+            ("ISTU", 3, 3),
+            ("ZIMA", 2, 2),
+            ("EMPTY", 0, 0),
+        ]
+        assert await MirrorRecord.objects.acount() == 5
+        assert await mirror_search("EMPTY", "T=$") == []
+
+        # Повторный проход перечитывает только последние RECHECK записей
+        result = await harvest_database(client_session, "ISTU")
+        assert (result.harvested, result.deleted, result.watermark) == (1, 0, 3)
+
+        # Записи, которых больше нет в OPAC, удаляются из зеркала
+        await MirrorRecord.objects.acreate(database="ISTU", mfn=4, record={}, harvested_at=timezone.now())
+        result = await harvest_database(client_session, "ISTU", full=True)
+        assert (result.harvested, result.deleted, result.watermark) == (3, 1, 3)
+
+
+@pytest.mark.django_db
+async def test_harvest_after_deleted_records(client_session: ClientSession, settings):
+    config = {**settings.CATALOG_MIRROR, "BATCH_SIZE": 2}
+
+    # В GAPS есть MFN 1 и 9: пачки 3-4, 5-6 и 7-8 пустые. Разрыв длиннее END_EMPTY_BATCHES пачек - конец БД
+    with override_settings(CATALOG_MIRROR={**config, "END_EMPTY_BATCHES": 3}):
+        result = await harvest_database(client_session, "GAPS")
+    assert (result.harvested, result.watermark) == (1, 1)
+
+    with override_settings(CATALOG_MIRROR={**config, "END_EMPTY_BATCHES": 4}):
+        result = await harvest_database(client_session, "GAPS")
+    assert (result.harvested, result.watermark) == (2, 9)
+    assert [book.id for book in await mirror_search("GAPS", "A=GGGG")] == ["GAPS_1", "GAPS_9"]
+
+    # Пустые пачки до отметки концом не считаются
+    with override_settings(CATALOG_MIRROR={**config, "END_EMPTY_BATCHES": 1}):
+        result = await harvest_database(client_session, "GAPS", full=True)
+    assert (result.harvested, result.watermark) == (2, 9)
+
+
+@pytest.mark.django_db
+async def test_harvest_interrupted(client_session: ClientSession, monkeypatch):
+    fetch_records = mirror.fetch_records
+
+    async def failing(client: ClientSession, database: str, mfns: list[int]):
+        if mfns[0] > 1:
+            raise ClientError("OPAC went away")
+        return await fetch_records(client, database, mfns)
+
+    monkeypatch.setattr(mirror, "fetch_records", failing)
+    with pytest.raises(ClientError):
+        await harvest_database(client_session, "ISTU")
+
+    # Загружена только часть БД: поиск идет в OPAC, следующий проход продолжит с отметки
+    watermark = await MirrorWatermark.objects.aget(database="ISTU")
+    assert watermark.mfn > 0 and watermark.harvested_at is None
+    assert await mirror_search("ISTU", "T=$") is None
+
+    monkeypatch.setattr(mirror, "fetch_records", fetch_records)
+    result = await harvest_database(client_session, "ISTU")
+    assert result.watermark == 3
+    assert len(await mirror_search("ISTU", "T=$")) == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "expression",
+    ["T=$", "A=AAAA", "A=AAA$", "T=YYYY", "A=AAAA*T=XXXX", "A=AAAA+T=YYYY", "A=AAAA*T=XXXX+A=BBBB*T=XXXX", "A=ZZZ"],
+)
+async def test_mirror_search_matches_opac(client_session: ClientSession, expression: str):
+    await harvest_catalog(client_session, ["ISTU", "NTD", "ZIMA"])
+
+    for database in ["ISTU", "NTD", "ZIMA"]:
+        expected = await opac_search(client_session, database, expression)
+        assert [book.id for book in await mirror_search(database, expression)] == [book.id for book in expected]
+
+
+@pytest.mark.django_db
+async def test_mirror_search_unsupported(client_session: ClientSession):
+    await harvest_catalog(client_session, ["ISTU"])
+
+    assert await mirror_search("ISTU", "IN=1234") is None
+    assert await mirror_search("ISTU", "A=X (G) T=Y") is None
+    assert await mirror_search("NTD", "T=$") is None
+
+
+@pytest.mark.django_db
+@override_settings(CATALOG_SEARCH_BACKEND="mirror")
+async def test_books_list_from_mirror(client_session: ClientSession, settings):
+    await harvest_catalog(client_session, ["ISTU", "NTD", "ZIMA"])
+    search_cache.clear()
+
+    with override_settings(CATALOG_MIRROR={**settings.CATALOG_MIRROR, "LIVE_AVAILABILITY": 0}):
+        calls = single_flight.stats()["calls"]
+        books = await books_list(client_session, "A=AAAA")
+        assert single_flight.stats()["calls"] == calls
+
+    search_cache.clear()
+    with override_settings(CATALOG_SEARCH_BACKEND="opac"):
+        expected = await books_list(client_session, "A=AAAA")
+
+    assert [book.id for book in books] == [book.id for book in expected]
@@ -1,9 +1,25 @@
+import asyncio
+import gc
 from aiohttp import ClientSession
+import pytest
 
-from library_service.opac.api.book import opac_book_retrieve, opac_search
+from library_service.management.samples import generate_books
+from library_service.opac.api.book import OpacBook, opac_book_retrieve, opac_search
+from library_service.opac.api.decoding import LazyList, OpacDecodeError, decode, decode_list
 from library_service.opac.api.databases import opac_databases
+from library_service.opac.api.expression import (
+    ExpressionSyntaxError,
+    Operation,
+    Term,
+    normalize,
+    normalize_expression,
+    parse,
+    plan_search,
+    to_string,
+)
 from library_service.opac.api.scenarios import opac_scenarios
 from library_service.opac.api.announces import opac_announces_list
+from library_service.opac.singleflight import single_flight
 from library_service.tests import opac_mock
 from library_service.tests.opac_mock import BookId, books_by_id
 
@@ -62,3 +78,109 @@ async def test_search_and_or(client_session: ClientSession):
     assert await opac_search(client_session, "ZIMA", "A=AAAA*T=XXXX+A=BBBB*T=XXXX") == books_by_id(
         BookId.ZIMA_AAAA_XXXX, BookId.ZIMA_BBBB_XXXX
     )
+
+
+async def test_search_coalesced(client_session: ClientSession):
+    coalesced = single_flight.coalesced
+
+    results = await asyncio.gather(*[opac_search(client_session, "ISTU", "T=$") for _ in range(5)])
+    assert all(result is results[0] for result in results)
+    assert single_flight.coalesced == coalesced + 4
+
+    # Разные запросы не объединяются
+    await asyncio.gather(opac_search(client_session, "ISTU", "A=AAAA"), opac_search(client_session, "NTD", "A=AAAA"))
+    assert single_flight.coalesced == coalesced + 4
+    assert single_flight.stats()["in_flight"] == 0
+
+
+async def test_search_not_coalesced_across_sessions(client_session: ClientSession):
+    coalesced = single_flight.coalesced
+
+    # Сессия на запрос может закрыться раньше, чем запрос другого вызова, поэтому с ней не объединяются
+    async with ClientSession() as other:
+        await asyncio.gather(opac_search(client_session, "ISTU", "T=$"), opac_search(other, "ISTU", "T=$"))
+    assert single_flight.coalesced == coalesced
+
+
+async def test_single_flight_all_waiters_cancelled():
+    errors = []
+    loop = asyncio.get_running_loop()
+    loop.set_exception_handler(lambda _, context: errors.append(context["message"]))
+    started = asyncio.Event()
+
+    async def fail():
+        started.set()
+        await asyncio.sleep(0.01)
+        raise ValueError()
+
+    waiter = asyncio.ensure_future(single_flight.do("fail", "key", fail))
+    await started.wait()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    # Отмененный ожидающий держит ссылку на запрос через traceback; о незабранном исключении asyncio пишет при сборке
+    del waiter
+    await asyncio.sleep(0.05)
+    gc.collect()
+
+    loop.set_exception_handler(None)
+
+    assert single_flight.stats()["in_flight"] == 0
+    assert errors == []
+
+
+def test_normalize_expression():
+    assert normalize_expression("  a=aaaa *  t=xxxx ") == "A=AAAA*T=XXXX"
+    assert normalize_expression("((A=AAAA))") == "A=AAAA"
+    assert normalize_expression("(A=AAAA)+(T=YYYY)") == "A=AAAA+T=YYYY"
+    assert normalize_expression("((A=AAAA*T=XXXX)+(A=BBBB))") == "(A=AAAA*T=XXXX)+A=BBBB"
+    assert normalize_expression('"T=ВОЙНА  И МИР$"') == '"T=ВОЙНА И МИР$"'
+    assert normalize_expression("A=X (G) T=Y") == "A=X(G)T=Y"
+
+
+def test_parse_expression():
+    assert parse("A=X*T=Y+A=Z") == Operation("+", (Operation("*", (Term("A=X"), Term("T=Y"))), Term("A=Z")))
+    assert parse("A=X*(T=Y+A=Z)") == Operation("*", (Term("A=X"), Operation("+", (Term("T=Y"), Term("A=Z")))))
+    assert parse('"T=ВОЙНА И МИР$"') == Term('"T=ВОЙНА И МИР$"')
+
+    for expression in ["", "A=X+", "(A=X", "A=X)", "A=X (G) T=Y", "+A=X"]:
+        with pytest.raises(ExpressionSyntaxError):
+            parse(expression)
+
+
+def test_normalize_ast():
+    assert to_string(normalize(parse("T=Y+(A=X+T=Y)"))) == "A=X+T=Y"
+    assert to_string(normalize(parse("(T=Y*A=X)+A=Z"))) == "A=X*T=Y+A=Z"
+    assert to_string(normalize(parse("A=Z*(T=Y+A=X)"))) == "(A=X+T=Y)*A=Z"
+    # ^ не коммутативен
+    assert to_string(normalize(parse("T=Y^A=X"))) == "T=Y^A=X"
+    assert to_string(normalize(parse("A=X^(T=Y^A=Z)"))) == "A=X^(T=Y^A=Z)"
+
+
+def test_plan_search():
+    assert plan_search("A=AAAA*T=XXXX", 8) == ["A=AAAA*T=XXXX"]
+    assert plan_search("A=X (G) T=Y", 8) == ["A=X (G) T=Y"]
+    assert plan_search("A=AAAA*T=XXXX+A=BBBB*T=XXXX", 8) == ["A=AAAA*T=XXXX", "A=BBBB*T=XXXX"]
+    assert plan_search("A=1+A=2+A=3+A=4+A=5", 2) == ["A=1+A=2+A=3", "A=4+A=5"]
+    assert plan_search("A=1+A=2", 1) == ["A=1+A=2"]
+
+    # Каждую ветвь понимает OPAC: итог совпадает с исходным выражением
+    for branch in plan_search("A=AAAA*T=XXXX+A=BBBB*T=XXXX+T=ZZZZ", 2):
+        assert "(" not in branch
+
+
+def test_decode_matches_schema():
+    payload = OpacBook.schema().dump(generate_books(50), many=True)
+    decoded = decode_list(OpacBook, payload)
+
+    assert decoded == OpacBook.schema().load(payload, many=True)
+    assert isinstance(decoded[0].exemplars, LazyList)
+    assert len(decoded[0].exemplars) == 5
+
+
+def test_decode_missing_field():
+    payload = OpacBook.schema().dump(opac_mock.BOOKS[0])
+    del payload["info"]["title"]
+
+    with pytest.raises(OpacDecodeError):
+        decode(OpacBook, payload)
@@ -0,0 +1,69 @@
+from aiohttp import ClientSession
+import pytest
+
+from library_service.opac.book import book_retrieve, invalidate_book, record_cache
+from library_service.opac.cache import TTLCache
+from library_service.tests.opac_mock import BookId
+
+
+def test_ttl_expiration(fake_clock):
+    cache = TTLCache(ttl=10, max_bytes=1024, sizeof=lambda _: 1, clock=fake_clock)
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    fake_clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction_by_bytes():
+    cache = TTLCache(ttl=10, max_bytes=3, sizeof=lambda _: 1)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") == 1  # "b" становится самым старым
+
+    cache.set("d", 4)
+    assert "b" not in cache
+    assert all(key in cache for key in ["a", "c", "d"])
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 3
+
+
+def test_oversized_value_is_not_cached():
+    cache = TTLCache(ttl=10, max_bytes=3, sizeof=len)
+
+    cache.set("a", "abcd")
+    assert "a" not in cache
+
+
+def test_invalidation():
+    cache = TTLCache(ttl=10, max_bytes=1024, sizeof=lambda _: 1)
+
+    cache.set(("ISTU", "1"), 1)
+    cache.set(("ISTU", "2"), 2)
+    cache.set(("NTD", "1"), 3)
+
+    assert cache.invalidate(("NTD", "1"))
+    assert not cache.invalidate(("NTD", "1"))
+    assert cache.invalidate_where(lambda key: key[0] == "ISTU") == 2
+    assert len(cache) == 0
+    assert cache.stats()["bytes"] == 0
+
+
+@pytest.mark.django_db
+async def test_book_retrieve_cached(client_session: ClientSession):
+    record_cache.clear()
+    hits = record_cache.counters.hits
+
+    first = await book_retrieve(client_session, BookId.ISTU_AAAA_XXXX.value)
+    second = await book_retrieve(client_session, BookId.ISTU_AAAA_XXXX.value)
+    assert first == second
+    assert record_cache.counters.hits == hits + 1
+
+    assert invalidate_book(BookId.ISTU_AAAA_XXXX.value)
+    assert ("ISTU", "1") not in record_cache
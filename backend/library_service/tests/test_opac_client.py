@@ -0,0 +1,63 @@
+from library_service.lifespan import LifespanApplication
+from library_service.opac.api.databases import opac_databases
+from library_service.opac.client import (
+    close_client_session,
+    get_client_session,
+    opac_client_session,
+    open_client_session,
+    pool_stats,
+)
+from library_service.tests import opac_mock
+
+
+async def test_session_without_pool():
+    assert get_client_session() is None
+
+    async with opac_client_session() as first, opac_client_session() as second:
+        assert first is not second
+
+    assert first.closed
+
+
+async def test_pooled_session():
+    await open_client_session()
+    try:
+        async with opac_client_session() as first:
+            assert await opac_databases(first) == opac_mock.DATABASES
+        async with opac_client_session() as second:
+            assert await opac_databases(second) == opac_mock.DATABASES
+
+        assert first is second
+        assert not first.closed
+
+        stats = pool_stats()
+        assert stats["active"]
+        assert stats["connections_reused"] >= 1
+        assert stats["idle"] >= 1
+    finally:
+        await close_client_session()
+
+    assert first.closed
+    assert not pool_stats()["active"]
+
+
+async def test_lifespan():
+    events = []
+    messages = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+
+    async def startup():
+        events.append("startup")
+
+    async def shutdown():
+        events.append("shutdown")
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        events.append(message["type"])
+
+    application = LifespanApplication(None, startup=[startup], shutdown=[shutdown])
+    await application({"type": "lifespan"}, receive, send)
+
+    assert events == ["startup", "lifespan.startup.complete", "shutdown", "lifespan.shutdown.complete"]
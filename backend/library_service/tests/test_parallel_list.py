@@ -0,0 +1,123 @@
+import asyncio
+
+from adrf import serializers as aserializers
+from aiohttp import ClientSession
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+import pytest
+
+from library_service.models.catalog import Library
+from library_service.models.order import Order, OrderHistory, OrderItem
+from library_service.opac.book import book_retrieve
+from library_service.serializers import catalog, staff_order
+from library_service.serializers.catalog import BookSerializer
+from library_service.serializers.order import OrderSerializer
+from library_service.serializers.parallel_list import ParallelListSerializer
+from library_service.tests.opac_mock import BookId
+
+User = get_user_model()
+
+
+class ItemSerializer(aserializers.Serializer):  # pylint: disable=abstract-method
+    running = 0
+    peak = 0
+    prefetched: list[list[int]] = []
+
+    class Meta:
+        list_serializer_class = ParallelListSerializer
+
+    async def aprefetch(self, items: list[int]):
+        self.prefetched.append(items)
+
+    async def ato_representation(self, instance):
+        ItemSerializer.running += 1
+        ItemSerializer.peak = max(ItemSerializer.peak, ItemSerializer.running)
+        await asyncio.sleep(0.001 * (instance % 3))
+        ItemSerializer.running -= 1
+        return instance * 2
+
+
+@override_settings(PARALLEL_LIST_SERIALIZER={"CONCURRENCY": 4})
+async def test_bounded_concurrency():
+    ItemSerializer.peak = 0
+    ItemSerializer.prefetched = []
+
+    assert await ItemSerializer(range(20), many=True).adata == [i * 2 for i in range(20)]
+    assert ItemSerializer.peak == 4
+    assert ItemSerializer.prefetched == [list(range(20))]
+
+    assert await ItemSerializer([], many=True).adata == []
+    assert ItemSerializer.prefetched == [list(range(20))]
+
+
+@pytest.fixture(name="orders")
+async def fixture_orders(db):  # pylint: disable=unused-argument
+    await User.objects.filter(username="parallel").adelete()
+    user = await User.objects.acreate(username="parallel")
+    library = await Library.objects.afirst()
+
+    book_ids = [
+        [BookId.ISTU_AAAA_XXXX.value, BookId.ISTU_BBBB_YYYY.value],
+        [BookId.ISTU_BBBB_YYYY.value, BookId.NTD_AAAA_XXXX.value],
+        [BookId.ZIMA_AAAA_XXXX.value],
+    ]
+    for ids in book_ids:
+        order = await Order.objects.acreate(user=user, library=library)
+        for book_id in ids:
+            await OrderItem.objects.acreate(order=order, book_id=book_id)
+
+    yield [order async for order in Order.objects.filter(user=user).select_related("library").order_by("id")]
+    await user.adelete()
+
+
+@pytest.fixture(name="batches")
+def fixture_batches(monkeypatch) -> list[list[str]]:
+    batches = []
+    book_retrieve_many = catalog.book_retrieve_many
+
+    async def retrieve_many(client: ClientSession, book_ids: list[str]):
+        batches.append(sorted(book_ids))
+        return await book_retrieve_many(client, book_ids)
+
+    async def retrieve(client: ClientSession, book_id: str):
+        raise AssertionError(f"{book_id} was not prefetched")
+
+    monkeypatch.setattr(catalog, "book_retrieve_many", retrieve_many)
+    monkeypatch.setattr(catalog, "book_retrieve", retrieve)
+    return batches
+
+
+@pytest.mark.django_db
+async def test_order_list_prefetch(client_session: ClientSession, orders: list[Order], batches: list[list[str]]):
+    data = await OrderSerializer(orders, many=True, context={"client_session": client_session}).adata
+
+    assert batches == [["ISTU_1", "ISTU_2", "NTD_1", "ZIMA_1"]]
+    assert [sorted(item["book"]["id"] for item in order["books"]) for order in data] == [
+        ["ISTU_1", "ISTU_2"],
+        ["ISTU_2", "NTD_1"],
+        ["ZIMA_1"],
+    ]
+    book = next(item["book"] for item in data[0]["books"] if item["book"]["id"] == "ISTU_1")
+    assert book == BookSerializer(await book_retrieve(client_session, "ISTU_1")).data
+
+
+@pytest.mark.django_db
+async def test_staff_order_list_prefetch(client_session: ClientSession, orders: list[Order], batches: list[list[str]]):
+    # Книги первого заказа (его нет в списке) возвращаются со вторым и третьим, третий выполнен
+    await OrderItem.objects.filter(order=orders[0]).aupdate(order_to_return=orders[1], status=OrderItem.Status.HANDED)
+    await OrderItem.objects.filter(order=orders[0], book_id=BookId.ISTU_AAAA_XXXX.value).aupdate(
+        order_to_return=orders[2], status=OrderItem.Status.RETURNED
+    )
+    await OrderHistory.objects.acreate(order=orders[2], status=OrderHistory.Status.DONE)
+    orders = [
+        order
+        async for order in Order.objects.filter(id__in=[order.id for order in orders[1:]])
+        .prefetch_related("library", "user", "user__profile", "statuses", "statuses__staff")
+        .order_by("id")
+    ]
+
+    data = await staff_order.OrderSerializer(orders, many=True, context={"client_session": client_session}).adata
+
+    assert batches == [["ISTU_1", "ISTU_2", "NTD_1", "ZIMA_1"]]
+    assert [[item["book"]["id"] for item in order["books_to_return"]] for order in data] == [["ISTU_2"], ["ISTU_1"]]
+    assert data[0]["books_to_return"][0]["book"] == BookSerializer(await book_retrieve(client_session, "ISTU_2")).data
@@ -0,0 +1,68 @@
+from aiohttp import ClientResponseError, ClientSession
+import pytest
+
+from library_service.opac.api.login import UserInfo
+from library_service.opac.reader import (
+    invalidate_reader,
+    reader_cache,
+    reader_info_by_mira,
+    reader_info_by_ticket,
+    remember_login_info,
+)
+from library_service.opac.singleflight import single_flight
+from library_service.tests import opac_mock
+
+
+async def test_reader_cached_by_ticket_and_mira(client_session: ClientSession):
+    reader_cache.clear()
+
+    reader = await reader_info_by_mira(client_session, 101)
+    assert reader == opac_mock.READERS[0]
+
+    # Запрос по mira запомнил читателя и по номеру билета
+    calls = single_flight.calls
+    assert await reader_info_by_ticket(client_session, "T1") == reader
+    assert await reader_info_by_mira(client_session, "101") == reader
+    assert single_flight.calls == calls
+
+
+async def test_reader_status_ttl(client_session: ClientSession, settings):
+    reader_cache.clear()
+    settings.OPAC_READER_CACHE = {**settings.OPAC_READER_CACHE, "STATUS_TTL": 0}
+
+    await reader_info_by_ticket(client_session, "T2")
+
+    calls = single_flight.calls
+    await reader_info_by_ticket(client_session, "T2")
+    assert single_flight.calls == calls
+
+    # Флаги устарели, нужен повторный запрос
+    await reader_info_by_ticket(client_session, "T2", status=True)
+    assert single_flight.calls == calls + 1
+
+
+async def test_reader_invalidate(client_session: ClientSession):
+    reader_cache.clear()
+
+    await reader_info_by_mira(client_session, 102)
+    invalidate_reader("T2", 102)
+
+    assert ("ticket", "T2") not in reader_cache
+    assert ("mira", "102") not in reader_cache
+
+
+async def test_reader_not_found_not_cached(client_session: ClientSession):
+    reader_cache.clear()
+
+    with pytest.raises(ClientResponseError):
+        await reader_info_by_ticket(client_session, "T404")
+    assert len(reader_cache) == 0
+
+
+def test_remember_login_info():
+    reader_cache.clear()
+
+    remember_login_info(UserInfo("T1", "Иванов Иван", True, False, False, False, False, mira="101"))
+
+    assert ("ticket", "T1") in reader_cache
+    assert ("mira", "101") in reader_cache
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+import pytest
+
+from library_service.models.catalog import Library
+from library_service.models.order import Order, OrderItem
+from library_service.opac.api.ticket import OpacLoan
+from library_service.reconciliation import reconcile
+
+User = get_user_model()
+
+DATE = "2025-01-01T00:00:00+00:00"
+DEADLINE = "2025-02-01T00:00:00+00:00"
+
+
+def make_loan(database: str, record: str) -> OpacLoan:
+    return OpacLoan("loan", False, True, database, record, "1", DATE, DEADLINE, 0)
+
+
+def test_reconcile_large_loan_list():
+    loans = [make_loan("ISTU", str(i)) for i in range(5000)]
+    # Одна запись не нашлась в OPAC
+    resolved = {("ISTU", str(i)): f"ISTU_{i}" for i in range(1, 5000)}
+
+    items = [OrderItem(book_id=f"ISTU_{i}") for i in range(0, 10000, 2)]
+    borrowed = [
+        OrderItem(book_id="ISTU_1"),
+        OrderItem(book_id="ISTU_0"),
+        OrderItem(book_id="ISTU_99999"),
+        OrderItem(book_id="ISTU_99998", status=OrderItem.Status.RETURNED),
+    ]
+
+    result = reconcile(items, borrowed, loans, resolved)
+
+    assert [item.book_id for item in result.found] == [f"ISTU_{i}" for i in range(2, 5000, 2)]
+    assert len(result.notfound) == 2501
+    assert [item.book_id for item in result.returned] == ["ISTU_0", "ISTU_99999"]
+    assert result.additional == [f"ISTU_{i}" for i in range(1, 5000, 2)]
+
+
+def test_reconcile_duplicate_loans():
+    loans = [make_loan("ISTU", "1"), make_loan("ISTU", "1")]
+    items = [OrderItem(book_id="ISTU_1")]
+
+    result = reconcile(items, [], loans, {("ISTU", "1"): "ISTU_1"})
+
+    assert result.found == items
+    assert not result.additional
+
+
+@pytest.mark.django_db
+async def test_reconciliation_save_done():
+    user = await User.objects.acreate(username="reconcile")
+    library = await Library.objects.afirst()
+    order = await Order.objects.acreate(user=user, library=library)
+    previous = await Order.objects.acreate(user=user, library=library)
+
+    handed = await OrderItem.objects.acreate(order=order, book_id="ISTU_1")
+    missing = await OrderItem.objects.acreate(order=order, book_id="ISTU_2")
+    analogous = await OrderItem.objects.acreate(order=order, book_id="ISTU_3", status=OrderItem.Status.ANALOGOUS)
+    borrowed = await OrderItem.objects.acreate(
+        order=previous, book_id="ISTU_4", status=OrderItem.Status.HANDED, order_to_return=order
+    )
+
+    result = reconcile([handed, missing, analogous], [borrowed], [make_loan("ISTU", "1")], {("ISTU", "1"): "ISTU_1"})
+    await result.save_done()
+
+    handed = await OrderItem.objects.aget(pk=handed.pk)
+    assert handed.status == OrderItem.Status.HANDED
+    assert handed.handed_date.isoformat() == DATE
+    assert handed.to_return_date.isoformat() == DEADLINE
+    assert (await OrderItem.objects.aget(pk=missing.pk)).status == OrderItem.Status.CANCELLED
+    assert (await OrderItem.objects.aget(pk=analogous.pk)).status == OrderItem.Status.ANALOGOUS
+
+    borrowed = await OrderItem.objects.aget(pk=borrowed.pk)
+    assert borrowed.status == OrderItem.Status.RETURNED
+    assert borrowed.returned_date is not None
@@ -0,0 +1,79 @@
+import asyncio
+
+from aiohttp import ClientConnectionError
+import pytest
+
+from library_service.opac.refresher import PeriodicRefresher
+
+
+# pylint: disable-next=too-few-public-methods
+class FakeLoad:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self, client):
+        self.calls += 1
+        if self.fail:
+            raise ClientConnectionError()
+        return [self.calls]
+
+
+def make_refresher(load, clock, interval=10.0):
+    return PeriodicRefresher("test", load, interval=interval, max_staleness=60, clock=clock, register=False)
+
+
+async def test_snapshot_served_until_stale(fake_clock):
+    load = FakeLoad()
+    refresher = make_refresher(load, fake_clock)
+
+    assert await refresher.get() == [1]
+    fake_clock.now = 30
+    assert await refresher.get() == [1]
+    assert load.calls == 1
+
+    fake_clock.now = 61
+    assert await refresher.get() == [2]
+    assert load.calls == 2
+
+
+async def test_last_good_snapshot_on_failure(fake_clock):
+    load = FakeLoad()
+    refresher = make_refresher(load, fake_clock)
+
+    await refresher.get()
+    load.fail = True
+    fake_clock.now = 100
+
+    assert await refresher.get() == [1]
+    assert refresher.stats()["failures"] == 1
+
+
+async def test_failure_without_snapshot_raises(fake_clock):
+    load = FakeLoad()
+    load.fail = True
+    refresher = make_refresher(load, fake_clock)
+
+    with pytest.raises(ClientConnectionError):
+        await refresher.get()
+
+
+async def test_concurrent_refreshes_coalesced(fake_clock):
+    load = FakeLoad()
+    refresher = make_refresher(load, fake_clock)
+
+    results = await asyncio.gather(*(refresher.get() for _ in range(5)))
+    assert results == [[1]] * 5
+    assert load.calls == 1
+
+
+async def test_background_refresh(fake_clock):
+    load = FakeLoad()
+    refresher = make_refresher(load, fake_clock, interval=0.01)
+
+    refresher.start()
+    await asyncio.sleep(0.05)
+    await refresher.stop()
+
+    assert load.calls > 1
+    assert refresher.stats()["running"] is False
@@ -0,0 +1,62 @@
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO
+from uuid import UUID
+
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+import pytest
+
+from library_service.opac.book import Book
+from library_service.parsers import ORJSONParser
+from library_service.renderers import ORJSONRenderer
+from library_service.serializers.catalog import BookSerializer
+from library_service.tests.opac_mock import BOOKS
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        None,
+        {"date": datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc), "naive": datetime(2025, 3, 1, 12)},
+        [date(2025, 3, 1), time(12, 30, 15, 500), timedelta(days=1, seconds=5)],
+        {"price": Decimal("12.50"), "status": gettext_lazy("Выдан"), "id": UUID(int=7)},
+        {1: "int key", "text": "строка с разделителем ", "big": 2**70},
+        ReturnDict(
+            {"books": BookSerializer([Book.from_opac(book, 1) for book in BOOKS], many=True).data}, serializer=None
+        ),
+    ],
+)
+def test_renderer_output(data):
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_renderer_indent():
+    data = {"books": [1, 2]}
+    media_type = "application/json; indent=2"
+    assert ORJSONRenderer().render(data, media_type) == JSONRenderer().render(data, media_type)
+    assert (
+        ORJSONRenderer().render(data, renderer_context={"indent": 4})
+        == b'{\n    "books": [\n        1,\n        2\n    ]\n}'
+    )
+
+
+@pytest.mark.parametrize(
+    "content", [b'{"title": "\xd0\x92\xd0\xbe\xd0\xb9\xd0\xbd\xd0\xb0", "ids": [1, 2.5, null]}', b"[]"]
+)
+def test_parser(content: bytes):
+    assert ORJSONParser().parse(BytesIO(content)) == JSONParser().parse(BytesIO(content))
+
+
+def test_parser_encoding():
+    content = '{"title": "Война и мир"}'.encode("cp1251")
+    assert ORJSONParser().parse(BytesIO(content), parser_context={"encoding": "cp1251"}) == {"title": "Война и мир"}
+
+
+@pytest.mark.parametrize("content", [b"", b"{", b'{"value": NaN}', b"\xff"])
+def test_parser_errors(content: bytes):
+    with pytest.raises(ParseError):
+        ORJSONParser().parse(BytesIO(content))
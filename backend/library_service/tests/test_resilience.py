@@ -0,0 +1,121 @@
+import asyncio
+
+from aiohttp import ClientConnectionError
+import pytest
+
+from library_service.opac.resilience import BreakerState, EndpointFamily, OpacUnavailableError
+
+CONFIG = {
+    "TIMEOUT": 0.2,
+    "CONCURRENCY": 2,
+    "MAX_WAIT": 0.05,
+    "FAILURE_THRESHOLD": 2,
+    "LATENCY_THRESHOLD": 0.1,
+    "RESET_TIMEOUT": 10,
+}
+
+
+async def fail():
+    raise ClientConnectionError()
+
+
+async def succeed():
+    return "ok"
+
+
+async def test_breaker_opens_and_recovers(fake_clock):
+    family = EndpointFamily("test", CONFIG, clock=fake_clock)
+
+    for _ in range(2):
+        with pytest.raises(ClientConnectionError):
+            await family.call(fail)
+    assert family.state == BreakerState.OPEN
+
+    # Пока предохранитель разомкнут, OPAC не вызывается
+    with pytest.raises(OpacUnavailableError):
+        await family.call(succeed)
+    assert family.stats()["rejected_open"] == 1
+
+    fake_clock.now = 11
+    assert await family.call(succeed) == "ok"
+    assert family.state == BreakerState.CLOSED
+
+
+async def test_half_open_failure_reopens(fake_clock):
+    family = EndpointFamily("test", CONFIG, clock=fake_clock)
+
+    for _ in range(2):
+        with pytest.raises(ClientConnectionError):
+            await family.call(fail)
+
+    fake_clock.now = 11
+    with pytest.raises(ClientConnectionError):
+        await family.call(fail)
+    assert family.state == BreakerState.OPEN
+    assert family.stats()["opened"] == 2
+
+
+async def test_timeout():
+    family = EndpointFamily("test", CONFIG)
+
+    async def hang():
+        await asyncio.sleep(1)
+
+    with pytest.raises(OpacUnavailableError):
+        await family.call(hang)
+    assert family.stats()["timeouts"] == 1
+    assert family.consecutive_failures == 1
+
+
+async def test_bulkhead():
+    family = EndpointFamily("test", {**CONFIG, "LATENCY_THRESHOLD": 1})
+    release = asyncio.Event()
+
+    async def wait():
+        await release.wait()
+        return "ok"
+
+    busy = [asyncio.create_task(family.call(wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert family.stats()["in_flight"] == 2
+
+    with pytest.raises(OpacUnavailableError):
+        await family.call(succeed)
+    assert family.stats()["rejected_bulkhead"] == 1
+
+    release.set()
+    assert await asyncio.gather(*busy) == ["ok", "ok"]
+    assert family.state == BreakerState.CLOSED
+
+
+async def test_half_open_trial_cancelled_while_waiting(fake_clock):
+    family = EndpointFamily(
+        "test", {**CONFIG, "CONCURRENCY": 1, "MAX_WAIT": 1, "LATENCY_THRESHOLD": 100}, clock=fake_clock
+    )
+    release = asyncio.Event()
+
+    async def wait():
+        await release.wait()
+        return "ok"
+
+    # Вызов, начатый до размыкания, занимает единственное место
+    busy = asyncio.create_task(family.call(wait))
+    await asyncio.sleep(0)
+    family.state = BreakerState.OPEN
+    fake_clock.now = 11
+
+    # Пробный запрос отменяется в очереди (например, клиент отключился)
+    trial = asyncio.create_task(family.call(succeed))
+    await asyncio.sleep(0)
+    assert family.trial_in_flight
+    with pytest.raises(OpacUnavailableError):
+        await family.call(succeed)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    assert not family.trial_in_flight
+
+    release.set()
+    assert await busy == "ok"
+    assert await family.call(succeed) == "ok"
+    assert family.state == BreakerState.CLOSED
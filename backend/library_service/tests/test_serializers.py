@@ -0,0 +1,55 @@
+from rest_framework_dataclasses.serializers import DataclassSerializer
+import pytest
+
+from library_service.opac.api.book import OpacBook, OpacBookInfo
+from library_service.opac.api.databases import OpacDatabase
+from library_service.opac.api.scenarios import OpacScenario
+from library_service.opac.book import Book
+from library_service.opac.suggest import Suggestion
+from library_service.serializers.catalog import (
+    BookSerializer,
+    DatabaseSerializer,
+    ScenarioSerializer,
+    SuggestionSerializer,
+)
+from library_service.serializers.plain import PlainListSerializer
+from library_service.serializers.staff_order import CheckOrderSerializer
+from library_service.management.samples import generate_books
+from library_service.tests.opac_mock import BOOKS, SCENARIOS
+
+
+# Эталон - DataclassSerializer с теми же Meta
+def reference(serializer: type) -> type:
+    attrs = vars(serializer.Meta).items()
+    meta = type("Meta", (), {key: value for key, value in attrs if key[0] != "_" and key != "list_serializer_class"})
+    return type(f"Reference{serializer.__name__}", (DataclassSerializer,), {"Meta": meta})
+
+
+def bare_book() -> Book:
+    info = OpacBookInfo([], [], [], [], [], [], [], [], [], [])
+    return Book.from_opac(OpacBook("ISTU_9", "", info, False, None, []), 1)
+
+
+@pytest.mark.parametrize(
+    "serializer, instances",
+    [
+        (BookSerializer, [Book.from_opac(book, 1) for book in BOOKS + generate_books(3, 2)] + [bare_book()]),
+        (ScenarioSerializer, SCENARIOS + [OpacScenario("X=")]),
+        (DatabaseSerializer, [OpacDatabase("ISTU", True, "ИРНИТУ"), OpacDatabase("NTD", False)]),
+        (SuggestionSerializer, [Suggestion("Толстой Л. Н.", "author", 3)]),
+    ],
+)
+def test_plain_serializer_output(serializer: type, instances: list):
+    expected = reference(serializer)(instances, many=True).data
+
+    assert isinstance(serializer(instances, many=True), PlainListSerializer)
+    assert serializer(instances, many=True).data == expected
+    assert [serializer(instance).data for instance in instances] == expected
+    assert list(serializer(instances[0]).data) == list(expected[0])
+
+
+def test_plain_serializer_nested():
+    books = [Book.from_opac(book, 1) for book in BOOKS[:2]]
+    serializer = CheckOrderSerializer(instance={"found_books": [], "notfound_books": [], "additional_books": books})
+
+    assert serializer.data["additional_books"] == BookSerializer(books, many=True).data
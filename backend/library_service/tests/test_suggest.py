@@ -0,0 +1,109 @@
+from aiohttp import ClientSession
+from django.conf import settings
+from django.test import Client, override_settings
+import pytest
+
+from library_service.feeds import scan_suggestions
+from library_service.opac.book import book_retrieve, books_list, search_cache
+from library_service.opac.singleflight import single_flight
+from library_service.opac.suggest import SuggestIndex, suggest_index
+from library_service.tests.opac_mock import BookId
+
+
+def test_suggest_prefix():
+    index = SuggestIndex(max_entries=100, max_length=50)
+    index.add("title", ["Война и мир", "Война миров", "Воскресение"])
+    index.add("author", ["Толстой, Лев Николаевич"])
+    index.add("title", ["Война и мир"])
+
+    assert [entry.text for entry in index.suggest("ВОЙНА", 10, 100)] == ["Война и мир", "Война миров"]
+    assert [entry.text for entry in index.suggest("  война   и ", 10, 100)] == ["Война и мир"]
+    assert [(entry.text, entry.kind) for entry in index.suggest("толст", 10, 100)] == [
+        ("Толстой, Лев Николаевич", "author")
+    ]
+    assert index.suggest("вос", 10, 100)[0].text == "Воскресение"
+    assert not index.suggest("Ёж", 10, 100)
+    assert not index.suggest("", 10, 100)
+
+    index.add("subject", ["Ежи"])
+    assert [entry.text for entry in index.suggest("ёж", 10, 100)] == ["Ежи"]
+
+
+def test_suggest_memory_cap():
+    index = SuggestIndex(max_entries=10, max_length=20)
+    index.add("title", ["Частое"] * 5)
+    index.add("title", ["Слишком длинное заглавие для индекса"])
+    index.add("title", [f"Редкое {i}" for i in range(20)])
+
+    assert len(index) <= 10
+    assert index.evictions > 0
+    assert [entry.text for entry in index.suggest("част", 10, 100)] == ["Частое"]
+    assert not index.suggest("слишком", 10, 100)
+
+
+def test_suggest_new_entries_displace_old():
+    index = SuggestIndex(max_entries=10, max_length=20)
+    index.add("title", [f"Старое {i}" for i in range(10)] * 3)
+
+    # Первое появление вытесняется, но счетчики старых значений при этом стареют,
+    # и повторно встреченное новое значение остается в индексе
+    index.add("title", ["Новое"])
+    assert not index.suggest("нов", 10, 100)
+    for i in range(3):
+        index.add("title", ["Новое"])
+        index.add("title", [f"Другое {i}"])
+
+    assert [entry.text for entry in index.suggest("нов", 10, 100)] == ["Новое"]
+    assert len(index) <= 10
+
+
+@pytest.mark.django_db
+def test_suggest_harvested_from_search(client: Client):
+    suggest_index.clear()
+    search_cache.clear()
+    assert client.get("/api/book/suggest/", {"prefix": "aa"}).json() == []
+
+    client.get("/api/book/", {"expression": "A=AAAA"})
+
+    # Подсказки отдаются без запросов к OPAC
+    calls = single_flight.stats()["calls"]
+    response = client.get("/api/book/suggest/", {"prefix": "aa"})
+    assert response.status_code == 200
+    assert response.json() == [{"text": "AAAA", "kind": "author"}]
+    assert single_flight.stats()["calls"] == calls
+
+
+@pytest.mark.django_db
+async def test_suggest_not_harvested_from_records(client_session: ClientSession):
+    suggest_index.clear()
+    search_cache.clear()
+
+    # Книги корзины, заказов и т. п. не попадают в подсказки - только выдачи поиска
+    await book_retrieve(client_session, BookId.ISTU_AAAA_XXXX.value)
+    assert len(suggest_index) == 0
+
+    await books_list(client_session, "A=AAAA")
+    assert len(suggest_index) > 0
+
+    # Повторный поиск отдается из кэша и не завышает счетчики
+    seen = [entry.seen for entry in suggest_index.suggest("aa", 10, 100)]
+    await books_list(client_session, "A=AAAA")
+    assert [entry.seen for entry in suggest_index.suggest("aa", 10, 100)] == seen
+
+
+@pytest.mark.django_db
+def test_suggest_params(client: Client):
+    assert client.get("/api/book/suggest/").status_code == 400
+    assert client.get("/api/book/suggest/", {"prefix": "aa", "limit": "x"}).status_code == 400
+    assert client.get("/api/book/suggest/", {"prefix": "a"}).json() == []
+
+
+@pytest.mark.django_db
+async def test_scan_suggestions(client_session: ClientSession):
+    suggest_index.clear()
+
+    with override_settings(CATALOG_SUGGEST={**settings.CATALOG_SUGGEST, "SCAN_EXPRESSIONS": ["T=$"]}):
+        assert await scan_suggestions(client_session) > 0
+
+    assert {entry.text for entry in suggest_index.suggest("zz", 10, 100)} == {"ZZZZ"}
+    assert {entry.text for entry in suggest_index.suggest("bb", 10, 100)} == {"BBBB"}
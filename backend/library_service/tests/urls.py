@@ -13,6 +13,8 @@ from rest_framework_simplejwt.views import (
 from app.urls import router
 from library_service.views.bitrix import BitrixAuthView
 from library_service.views.auth import AuthThirdPartyViewset
+from library_service.views.catalog import CoverView
+from library_service.views.opac import OpacMetricsView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -22,5 +24,7 @@ urlpatterns = [
     path("api/auth/third-party/", AuthThirdPartyViewset.as_view()),
     path("api/auth/refresh/", TokenRefreshView.as_view()),
     path("api/auth/logout/", TokenBlacklistView.as_view()),
+    path("api/opac/metrics/", OpacMetricsView.as_view()),
+    path("api/cover/<str:book_id>/", CoverView.as_view(), name="cover"),
     path("api/", include(router.urls)),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,24 @@
+import os
+
+# Модуль выполняется в отдельных процессах, поэтому не импортирует Django
+try:
+    from PIL import Image
+except ImportError:  # Pillow необязателен: без него обложки отдаются в исходном размере
+    Image = None
+
+
+def make_thumbnail(source: str, target: str, size: tuple[int, int]) -> bool:
+    if Image is None:
+        return False
+
+    temporary = f"{target}.{os.getpid()}.tmp"
+    try:
+        with Image.open(source) as image:
+            image.thumbnail(size)
+            image.convert("RGB").save(temporary, "JPEG", quality=85, optimize=True)
+        os.replace(temporary, target)
+        return True
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        return False
@@ -1,4 +1,4 @@
-from aiohttp import ClientSession, ClientResponseError
+from aiohttp import ClientResponseError
 from django.http import Http404
 from asgiref.sync import sync_to_async
 
@@ -20,6 +20,8 @@ from rest_framework.response import Response
 from library_service.opac.api.login import login_reader, login_librarian, login_admin, get_login_info, AuthResponse, UserInfo, login_universal, AuthUniversalResponse
 
 from library_service.models.user import UserProfile
+from library_service.opac.client import opac_client_session
+from library_service.opac.reader import remember_login_info
 
 User = get_user_model()
 
@@ -51,7 +53,7 @@ class AuthViewset(AsyncAPIView):
         serializer = self.Serializer(data=self.request.data)
         serializer.is_valid(raise_exception=True)
 
-        async with ClientSession() as client:
+        async with opac_client_session() as client:
             error = ""
             response: AuthUniversalResponse | None = None
 
@@ -62,6 +64,7 @@ class AuthViewset(AsyncAPIView):
             
             if error == "":
                 info: UserInfo = await get_login_info(client, response.accessToken)
+                remember_login_info(info)
                 user, created = await User.objects.prefetch_related("profile").aget_or_create(
                     profile__library_card=info.ticket,
                     defaults={
@@ -112,10 +115,11 @@ class AuthThirdPartyViewset(AsyncAPIView):
         serializer = self.Serializer(data=self.request.data)
         serializer.is_valid(raise_exception=True)
 
-        async with ClientSession() as client:
+        async with opac_client_session() as client:
 
             try:
                 info: UserInfo = await get_login_info(client, serializer.validated_data["token"])
+                remember_login_info(info)
                 user, created = await User.objects.prefetch_related("profile").aget_or_create(
                     username = serializer.validated_data["username"],
                     defaults={
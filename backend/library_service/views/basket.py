@@ -1,5 +1,3 @@
-import asyncio
-from aiohttp import ClientSession
 from django.http import Http404
 
 from rest_framework.decorators import action
@@ -13,7 +11,8 @@ from library_service.mixins import SessionCreateModelMixin
 from library_service.models.user import BasketItem
 from library_service.serializers.basket import AddBasketSerializer
 from library_service.serializers.catalog import BookSerializer
-from library_service.opac.book import book_retrieve
+from library_service.opac.book import book_retrieve_many
+from library_service.opac.client import opac_client_session
 
 
 class BasketViewset(SessionCreateModelMixin, amixins.DestroyModelMixin, AsyncGenericViewSet):
@@ -39,8 +38,9 @@ class BasketViewset(SessionCreateModelMixin, amixins.DestroyModelMixin, AsyncGen
         return item
 
     async def alist(self, request, *args, **kwargs):
-        async with ClientSession() as client:
-            books = await asyncio.gather(*[book_retrieve(client, book.book_id) async for book in self.get_queryset()])
+        async with opac_client_session() as client:
+            books = await book_retrieve_many(client, [item.book_id async for item in self.get_queryset()])
+            books = [book for book in books if book is not None]
             serializer = self.get_serializer(books, many=True)
             return Response(serializer.data)
 
@@ -1,4 +1,4 @@
-from aiohttp import ClientSession, ClientResponseError
+from aiohttp import ClientResponseError
 from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -12,7 +12,9 @@ from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from adrf.views import APIView as AsyncAPIView
 
-from library_service.opac.api.ticket import opac_reader_info_by_mira, OpacReader
+from library_service.opac.api.ticket import OpacReader
+from library_service.opac.client import opac_client_session
+from library_service.opac.reader import reader_info_by_mira
 
 User = get_user_model()
 
@@ -27,7 +29,7 @@ class BitrixAuthView(AsyncAPIView):
         serializer = self.Serializer(data=self.request.data)
         serializer.is_valid(raise_exception=True)
 
-        async with ClientSession() as client:
+        async with opac_client_session() as client:
             token_response = await client.get(
                 "https://int.istu.edu/oauth/token/?grant_type=authorization_code",
                 params={
@@ -86,7 +88,7 @@ class BitrixAuthView(AsyncAPIView):
                 user.profile.mira_id = mira_id
 
             try:
-                user_info: OpacReader = await opac_reader_info_by_mira(client, user.profile.mira_id)
+                user_info: OpacReader = await reader_info_by_mira(client, user.profile.mira_id)
                 user.profile.library_card = user_info.ticket
                 user.profile.fullname = user_info.name
                 user.profile.department = user_info.department
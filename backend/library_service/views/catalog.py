@@ -1,52 +1,160 @@
-from aiohttp import ClientSession
+import asyncio
+import json
+import time
+
+from aiohttp import ClientResponseError
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import status
 from rest_framework.decorators import action
 
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError, NotFound
+from rest_framework.utils.encoders import JSONEncoder
 
+from adrf.views import APIView as AsyncAPIView
 from adrf.viewsets import GenericViewSet as AsyncGenericViewSet
 from adrf import mixins as amixins
 
+from library_service.covers import cover_retrieve
+from library_service.feeds import ReferenceEntry, announcements_feed, reference_data, scenarios_key
 from library_service.models.catalog import Library
-from library_service.opac.api.scenarios import opac_scenarios
-from library_service.opac.book import book_retrieve_safe, books_announces_list, books_list
-from library_service.serializers.catalog import BookSerializer, LibrarySerializer, ScenarioSerializer
+from library_service.opac.book import book_retrieve_safe, books_list, books_list_iter, books_result
+from library_service.opac.client import opac_client_session
+from library_service.opac.facets import aggregate_facets, filter_books, filters_key, parse_facets, parse_filters
+from library_service.opac.suggest import suggest_index
+from library_service.pagination import SearchPagination
+from library_service.serializers.catalog import (
+    BookSerializer,
+    DatabaseSerializer,
+    LibrarySerializer,
+    ScenarioSerializer,
+    SuggestionSerializer,
+)
+
+
+# Ответ со справочником: при совпадении If-None-Match тело не отправляется
+def reference_response(request, entry: ReferenceEntry) -> Response:
+    if entry.etag in request.headers.get("If-None-Match", ""):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": entry.etag})
+    return Response(entry.data, headers={"ETag": entry.etag})
 
 
 class BookViewset(amixins.RetrieveModelMixin, AsyncGenericViewSet):
     serializer_class = BookSerializer
 
-    # TODO: по идее, можно использовать миксин, но тогда придется реализовать ленивый get_queryset
-    async def alist(self, request, *args, **kwargs):
+    def get_search_params(self) -> tuple[str, int | None]:
         library: str | None = self.request.query_params.get("library")
         expression: str | None = self.request.query_params.get("expression")
 
         if expression is None:
             raise ValidationError("No expression provided", code="no_expression")
 
-        libraries = Library.objects.all()
-        if library is not None:
-            libraries = libraries.filter(id=int(library))
+        return expression, int(library) if library is not None else None
 
-        async with ClientSession() as client:
-            books = await books_list(client, libraries, expression)
-            serializer = self.get_serializer(books, many=True)
-            return Response(serializer.data)
+    # TODO: по идее, можно использовать миксин, но тогда придется реализовать ленивый get_queryset
+    async def alist(self, request, *args, **kwargs):
+        expression, library = self.get_search_params()
+
+        facets = parse_facets(request.query_params.get("facets"))
+        filters = parse_filters(request.query_params)
+
+        async with opac_client_session() as client:
+            # Без cursor/page_size/facets и фильтров - вся выдача одним списком, как раньше
+            if not (SearchPagination.is_requested(request) or facets or filters):
+                books = await books_list(client, expression, library)
+                serializer = self.get_serializer(books, many=True)
+                return Response(serializer.data)
+
+            # Уточнение фильтрами и следующие страницы считаются по сохраненной выдаче, без запросов к OPAC
+            paginator = SearchPagination(request, expression, library, filters_key(filters))
+            books = await books_result(client, expression, library, cached=paginator.has_cursor or bool(filters))
+            books = filter_books(books, filters)
+
+            if not SearchPagination.is_requested(request) and not facets:
+                return Response(self.get_serializer(books, many=True).data)
+
+            extra = {}
+            if facets:
+                extra["facets"] = aggregate_facets(books, facets, settings.CATALOG_FACETS["LIMIT"])
+
+            serializer = self.get_serializer(paginator.paginate_list(books), many=True)
+            return paginator.get_paginated_response(serializer.data, **extra)
+
+    # Та же выдача, но в NDJSON: по строке на каждую БД сразу по готовности и итоговая строка в конце
+    @action(url_path="stream", methods=["GET"], detail=False)
+    async def stream(self, request, *args, **kwargs):
+        expression, library = self.get_search_params()
+
+        def dump(record: dict) -> bytes:
+            return json.dumps(record, cls=JSONEncoder, ensure_ascii=False).encode() + b"\n"
+
+        async def records():
+            started = time.monotonic()
+            total = 0
+            failed = []
+
+            async with opac_client_session() as client:
+                async for library_id, database, result in books_list_iter(client, expression, library):
+                    if isinstance(result, Exception):
+                        failed.append(database)
+                        yield dump({"type": "error", "library": library_id, "database": database})
+                        continue
+
+                    total += len(result)
+                    yield dump(
+                        {
+                            "type": "books",
+                            "library": library_id,
+                            "database": database,
+                            "books": self.get_serializer(result, many=True).data,
+                        }
+                    )
+
+            yield dump(
+                {
+                    "type": "summary",
+                    "total": total,
+                    "failed": failed,
+                    "elapsed_ms": round((time.monotonic() - started) * 1000),
+                }
+            )
+
+        # Иначе nginx (proxy_buffering on) держит строки до конца ответа
+        return StreamingHttpResponse(
+            records(), content_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"}
+        )
 
     async def aget_object(self):
         pk = self.kwargs["pk"]
-        async with ClientSession() as client:
+        async with opac_client_session() as client:
             book = await book_retrieve_safe(client, pk)
             if book is None:
                 raise NotFound(f"Book {pk} not found", "book_not_found")
             return book
 
+    # Подсказки для строки поиска из локального индекса, без запросов к OPAC
+    @action(url_path="suggest", methods=["GET"], detail=False)
+    async def suggest(self, request, *args, **kwargs):
+        prefix: str | None = request.query_params.get("prefix")
+        if prefix is None:
+            raise ValidationError("No prefix provided", code="no_prefix")
+
+        config = settings.CATALOG_SUGGEST
+        try:
+            limit = min(int(request.query_params.get("limit", config["LIMIT"])), config["MAX_LIMIT"])
+        except ValueError as error:
+            raise ValidationError("Invalid limit", code="invalid_limit") from error
+
+        if len(prefix.strip()) < config["MIN_PREFIX"]:
+            return Response([])
+
+        suggestions = suggest_index.suggest(prefix, max(limit, 0), config["SCAN"])
+        return Response(SuggestionSerializer(suggestions, many=True).data)
+
     @action(url_path="announcement", methods=["GET"], detail=False)
     async def announcements_list(self, request, *args, **kwargs):
-        async with ClientSession() as client:
-            books = await books_announces_list(client)
-            serializer = self.get_serializer(books, many=True)
-            return Response(serializer.data)
+        return Response(await announcements_feed.get())
 
 
 class LibraryViewset(amixins.ListModelMixin, amixins.RetrieveModelMixin, AsyncGenericViewSet):
@@ -57,9 +165,42 @@ class LibraryViewset(amixins.ListModelMixin, amixins.RetrieveModelMixin, AsyncGe
 class ScenarioViewset(AsyncGenericViewSet):
     serializer_class = ScenarioSerializer
 
+    # Без параметра - сценарии всех БД каталога, с ?database= - только указанной
+    async def alist(self, request, *args, **kwargs):
+        database: str | None = request.query_params.get("database")
+
+        entry = (await reference_data.get()).get(scenarios_key(database))
+        if entry is None:
+            raise NotFound(f"Database {database} not found", "database_not_found")
+        return reference_response(request, entry)
+
+
+class DatabaseViewset(AsyncGenericViewSet):
+    serializer_class = DatabaseSerializer
+
     async def alist(self, request, *args, **kwargs):
-        async with ClientSession() as client:
-            # TODO: по идее, сценарии сильно не отличаются между БД, но лучше все же убрать хардкод
-            scenarios = await opac_scenarios(client, "ISTU")
-            serializer = self.get_serializer(scenarios, many=True)
-            return Response(serializer.data)
+        return reference_response(request, (await reference_data.get())["databases"])
+
+
+# Обложка книги через наш кэш: по умолчанию миниатюра, ?size=full - исходное изображение
+class CoverView(AsyncAPIView):
+    async def get(self, request, book_id: str, *args, **kwargs):
+        full = request.query_params.get("size") == "full"
+
+        async with opac_client_session() as client:
+            try:
+                cover = await cover_retrieve(client, book_id, full)
+            except ClientResponseError as error:
+                if error.status != 404:
+                    raise
+                cover = None
+
+        if cover is None:
+            raise NotFound(f"Cover for {book_id} not found", "cover_not_found")
+
+        etag = f'"{cover.digest}"'
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.COVERS['MAX_AGE']}"}
+        if etag in request.headers.get("If-None-Match", ""):
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        content = await asyncio.to_thread(cover.path.read_bytes)
+        return HttpResponse(content, content_type=cover.content_type, headers=headers)
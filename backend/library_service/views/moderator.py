@@ -16,6 +16,7 @@ from library_service.serializers.moderator import (
     ModeratorOrderSerializer
 )
 
+from library_service.opac.client import opac_client_session
 from library_service.permissions import IsAdmin
 
 
@@ -183,9 +184,7 @@ class ReadersViewset(AsyncGenericViewSet):
             
             orders = await get_orders_for_user(reader.user_id)
             
-            from aiohttp import ClientSession
-            
-            async with ClientSession() as client_session:
+            async with opac_client_session() as client_session:
                 context = {
                     'request': request,
                     'format': self.format_kwarg,
@@ -237,9 +236,7 @@ class ReadersViewset(AsyncGenericViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            from aiohttp import ClientSession
-            
-            async with ClientSession() as client_session:
+            async with opac_client_session() as client_session:
                 context = {
                     'request': request,
                     'format': self.format_kwarg,
@@ -346,10 +343,7 @@ class StaffViewset(AsyncGenericViewSet):
             
             orders = await get_staff_orders(staff_profile.user_id)
             
-            # Добавляем ClientSession как в ReadersViewset
-            from aiohttp import ClientSession
-            
-            async with ClientSession() as client_session:
+            async with opac_client_session() as client_session:
                 context = {
                     'request': request,
                     'format': self.format_kwarg,
@@ -408,10 +402,7 @@ class StaffViewset(AsyncGenericViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Добавляем ClientSession как в ReadersViewset
-            from aiohttp import ClientSession
-            
-            async with ClientSession() as client_session:
+            async with opac_client_session() as client_session:
                 context = {
                     'request': request,
                     'format': self.format_kwarg,
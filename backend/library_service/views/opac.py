@@ -0,0 +1,34 @@
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from adrf.views import APIView as AsyncAPIView
+
+from library_service.opac.book import record_cache, result_cache, search_cache
+from library_service.opac.client import pool_stats
+from library_service.opac.loans import loan_cache
+from library_service.opac.reader import reader_cache
+from library_service.opac.refresher import refreshers_stats
+from library_service.opac.resilience import resilience_stats
+from library_service.opac.singleflight import single_flight
+from library_service.opac.suggest import suggest_index
+from library_service.permissions import IsAdmin
+
+
+# Статистика работы с OPAC в текущем воркере (для подбора размеров пулов и кэшей под нагрузкой)
+class OpacMetricsView(AsyncAPIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    async def get(self, request, *args, **kwargs):
+        return Response(
+            {
+                "pool": pool_stats(),
+                "record_cache": record_cache.stats(),
+                "search_cache": search_cache.stats(),
+                "result_cache": result_cache.stats(),
+                "reader_cache": reader_cache.stats(),
+                "loan_cache": loan_cache.stats(),
+                "coalescing": single_flight.stats(),
+                "endpoints": resilience_stats(),
+                "refreshers": refreshers_stats(),
+                "suggest_index": suggest_index.stats(),
+            }
+        )
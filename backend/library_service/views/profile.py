@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from adrf.viewsets import GenericViewSet as AsyncGenericViewSet
 
 from library_service.models.user import UserProfile
+from library_service.opac.reader import invalidate_reader
 from library_service.serializers.profile import ProfileSerializer
 
 from asgiref.sync import sync_to_async
@@ -102,6 +103,7 @@ class ProfileBannedViewset(ModelViewSet):
             
             user_profile.banned_status_our = True
             user_profile.save()
+            invalidate_reader(user_profile.library_card, user_profile.mira_id)
             
             return Response({
                 "message": f"User {user_profile.user.username} has been banned",
@@ -135,6 +137,7 @@ class ProfileBannedViewset(ModelViewSet):
             
             user_profile.banned_status_our = False
             user_profile.save()
+            invalidate_reader(user_profile.library_card, user_profile.mira_id)
             
             return Response({
                 "message": f"User {user_profile.user.username} has been unbanned",
@@ -6,14 +6,12 @@ from django.db.models import OuterRef, Subquery, Prefetch
 
 from adrf.viewsets import GenericViewSet as AsyncGenericViewSet
 
-from aiohttp import ClientSession
-
 from library_service.permissions import IsLibrarian, IsAdmin
 
 from library_service.models.user import UserProfile
-from library_service.opac.api.ticket import opac_reader_loans
-from library_service.opac.book import book_retrieve_by_id
-from library_service.opac.book import book_retrieve
+from library_service.opac.book import book_retrieve_many
+from library_service.opac.client import opac_client_session
+from library_service.reconciliation import reconcile_order
 
 from library_service.mixins import (
     SessionListModelMixin,
@@ -125,47 +123,21 @@ class StaffOrderGetUpdateViewset(
         order: Order = await self.get_queryset().prefetch_related("user").filter(id=order_id).afirst()
         profile: UserProfile = await UserProfile.objects.prefetch_related("user").aget(user=order.user)
 
-        loans_id_list = []
-        loans = []
-
-        async with ClientSession() as client:
+        async with opac_client_session() as client:
             self.client_session = client
-            loans = await opac_reader_loans(client, profile.library_card)
-
-            for loan in loans:
-                book = await book_retrieve_by_id(client, loan.db, loan.book)
-                loans_id_list.append(book.id)
-                loan.book_id = book.id
-
-            books = OrderItem.objects.prefetch_related("order").filter(order=order).all()
-            found_books = []
-
-            async for book in books:
-                for loan in loans:
-                    if book.book_id == loan.book_id:
-                        found_books.append(book)
-                        book.handed_date = loan.date
-                        book.to_return_date = loan.deadline
-                        await book.asave()
-
-            notfound_books = []
-
-            async for book in books:
-                if book.book_id not in loans_id_list:
-                    notfound_books.append(book)
-
-            additional_books = []
+            reconciliation = await reconcile_order(client, order, profile.library_card)
+            await reconciliation.save_loan_dates()
 
-            for loan in loans_id_list:
-                if loan not in books:
-                    additional_books.append(await book_retrieve(client, loan))
+            additional_books = [
+                book for book in await book_retrieve_many(client, reconciliation.additional) if book is not None
+            ]
 
             response = {
                 "found_books": await OrderItemSerializer(
-                    found_books, many=True, context=self.get_serializer_context()
+                    reconciliation.found, many=True, context=self.get_serializer_context()
                 ).adata,
                 "notfound_books": await OrderItemSerializer(
-                    notfound_books, many=True, context=self.get_serializer_context()
+                    reconciliation.notfound, many=True, context=self.get_serializer_context()
                 ).adata,
                 "additional_books": BookSerializer(
                     additional_books, many=True, context=self.get_serializer_context()